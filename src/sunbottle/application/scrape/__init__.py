@@ -1,4 +1,6 @@
+from ._backfill import BackfillResult, backfill
 from ._electricity import (
+    ScrapeResult,
     scrape_buysell,
     scrape_consumption,
     scrape_consumption_range,
@@ -6,3 +8,4 @@ from ._electricity import (
     scrape_generation,
     scrape_storage,
 )
+from ._replay import ReplayResult, replay
@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import datetime
+import logging
+import queue
+import threading
+from concurrent import futures
+from dataclasses import dataclass, field
+from typing import Iterable, Optional
+
+from django import db
+from django.conf import settings
+
+from sunbottle.domain.scrape import operations as scrape_ops
+from sunbottle.domain.scrape import queries as scrape_queries
+from sunbottle.domain.sharp import throttle, waits
+
+from . import _browsers, _electricity
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BackfillResult:
+    scraped: int = 0
+    skipped: int = 0
+    failed: list[tuple[str, datetime.date]] = field(default_factory=list)
+    scrape: _electricity.ScrapeResult = field(default_factory=_electricity.ScrapeResult)
+    # Seconds spent waiting on each step of the Sharp pages.
+    waits: dict[str, float] = field(default_factory=dict)
+
+
+def backfill(
+    start_date: datetime.date,
+    end_date: datetime.date,
+    metrics: Iterable[str],
+    workers: int = 1,
+    restart: bool = False,
+) -> BackfillResult:
+    """
+    Scrape every metric for every date from start_date up to, but not including, end_date.
+
+    Dates are shared between workers, each with its own browser or HTTP session, and every request to Sharp is rate
+    limited across all of them. Finished (metric, date) pairs are stored so an interrupted backfill continues where it
+    stopped.
+    """
+    metrics = list(metrics)
+    if restart:
+        scrape_ops.reset_backfill(metrics, start_date, end_date)
+
+    done = scrape_queries.get_backfilled(metrics, start_date, end_date)
+    result = BackfillResult()
+    pending: queue.SimpleQueue[tuple[str, datetime.date]] = queue.SimpleQueue()
+    for date in _electricity._date_range(start_date, end_date):
+        for metric in metrics:
+            if (metric, date) in done:
+                result.skipped += 1
+            else:
+                pending.put((metric, date))
+
+    rate_limiter = throttle.RateLimiter(settings.SHARP_MAX_REQUESTS_PER_MINUTE)
+    # SQLite allows a single writer, so workers scrape in parallel but take turns recording.
+    write_lock = threading.Lock()
+    result_lock = threading.Lock()
+    pool = _browsers.BrowserPool(
+        size=workers,
+        max_page_loads=settings.SCRAPE_BROWSER_MAX_PAGE_LOADS,
+        max_memory_mb=settings.SCRAPE_BROWSER_MAX_MEMORY_MB,
+    )
+
+    def work() -> None:
+        # Each worker runs in its own thread, so the HTTP retrievers give it its own client and session.
+        retrievers = _electricity.get_retrievers()
+        try:
+            with throttle.rate_limited(rate_limiter):
+                while True:
+                    try:
+                        metric, date = pending.get_nowait()
+                    except queue.Empty:
+                        return
+                    scrape = _scrape_date(pool, retrievers, metric, date, write_lock, force=restart)
+                    with result_lock:
+                        if scrape is None:
+                            result.failed.append((metric, date))
+                        else:
+                            result.scraped += 1
+                            result.scrape += scrape
+        finally:
+            db.connection.close()
+
+    waits.reset_wait_totals()
+    try:
+        with futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            for worker in [executor.submit(work) for _ in range(workers)]:
+                worker.result()
+    finally:
+        pool.close()
+    result.waits = waits.get_wait_totals()
+    return result
+
+
+def _scrape_date(
+    pool: _browsers.BrowserPool,
+    retrievers: dict[str, _electricity.Retriever],
+    metric: str,
+    date: datetime.date,
+    write_lock: threading.Lock,
+    force: bool,
+) -> Optional[_electricity.ScrapeResult]:
+    retriever = retrievers[metric]
+    try:
+        with _browsers.session_for(retriever, pool=pool) as session:
+            scrape = _electricity.scrape_metric(session, metric, retriever, date, write_lock=write_lock, force=force)
+        if scrape.failed:
+            logger.warning("Failed to backfill %s for %s, no readings were retrieved", metric, date)
+            return None
+        with write_lock:
+            scrape_ops.mark_backfilled(metric, date)
+    except Exception:
+        logger.exception("Failed to backfill %s for %s", metric, date)
+        return None
+    logger.info("Backfilled %s for %s", metric, date)
+    return scrape
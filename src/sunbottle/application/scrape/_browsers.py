@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import atexit
+import contextlib
+import logging
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Iterator, Optional
+
+from django.conf import settings
+from selenium import webdriver
+from selenium.common import exceptions
+from selenium.webdriver.firefox.service import Service as FirefoxService
+from webdriver_manager.firefox import GeckoDriverManager
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BrowserSession:
+    """
+    A browser handed out by the pool along with how much it has been used.
+    """
+
+    browser: Optional[webdriver.Firefox]
+    page_loads: int = 0
+
+    def record_page_load(self) -> None:
+        self.page_loads += 1
+
+
+class BrowserPool:
+    """
+    Keeps logged-in browsers warm between scrapes.
+
+    Sessions are health-checked before being handed out and are recycled once they have loaded too many pages or
+    Firefox grows past the memory ceiling, so a long-lived worker doesn't accumulate an ever-growing browser.
+    """
+
+    def __init__(
+        self,
+        size: int,
+        max_page_loads: int,
+        max_memory_mb: int,
+        factory: Optional[Callable[[], webdriver.Firefox]] = None,
+    ) -> None:
+        self.max_page_loads = max_page_loads
+        self.max_memory_mb = max_memory_mb
+        self._factory = factory or _start_browser
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._idle: list[BrowserSession] = []
+
+    @contextlib.contextmanager
+    def session(self) -> Iterator[BrowserSession]:
+        """
+        Borrow a browser for the duration of the block.
+
+        A browser that raised is assumed to be in an unknown state and is thrown away rather than returned.
+        """
+        self._slots.acquire()
+        try:
+            session = self._checkout()
+            try:
+                yield session
+            except Exception:
+                _quit(session.browser)
+                raise
+            self._checkin(session)
+        finally:
+            self._slots.release()
+
+    def close(self) -> None:
+        """
+        Quit every idle browser.
+        """
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for session in idle:
+            _quit(session.browser)
+
+    def _checkout(self) -> BrowserSession:
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                # Most recently used first, it's the one most likely to still have a live login.
+                session = self._idle.pop()
+            if _is_healthy(session.browser):
+                return session
+            logger.info("Discarding unresponsive browser")
+            _quit(session.browser)
+        return BrowserSession(browser=self._factory())
+
+    def _checkin(self, session: BrowserSession) -> None:
+        if session.page_loads >= self.max_page_loads:
+            logger.info("Recycling browser after %s page loads", session.page_loads)
+            _quit(session.browser)
+            return
+        memory_mb = _get_memory_mb(session.browser)
+        if memory_mb is not None and memory_mb >= self.max_memory_mb:
+            logger.info("Recycling browser using %s MB", memory_mb)
+            _quit(session.browser)
+            return
+        with self._lock:
+            self._idle.append(session)
+
+
+@contextlib.contextmanager
+def session_for(*retrievers: Any, pool: Optional[BrowserPool] = None) -> Iterator[BrowserSession]:
+    """
+    Borrow a pooled browser if any of the retrievers need one, otherwise hand out an empty session.
+    """
+    if any(retriever.requires_browser for retriever in retrievers):
+        with (pool or get_browser_pool()).session() as session:
+            yield session
+    else:
+        yield BrowserSession(browser=None)
+
+
+_pool: Optional[BrowserPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_browser_pool() -> BrowserPool:
+    """
+    Return the process wide browser pool, creating it on first use.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = BrowserPool(
+                size=settings.SCRAPE_BROWSER_POOL_SIZE,
+                max_page_loads=settings.SCRAPE_BROWSER_MAX_PAGE_LOADS,
+                max_memory_mb=settings.SCRAPE_BROWSER_MAX_MEMORY_MB,
+            )
+            atexit.register(_pool.close)
+        return _pool
+
+
+def _start_browser() -> webdriver.Firefox:
+    service = FirefoxService(executable_path=GeckoDriverManager(path=settings.WEBDRIVER_INSTALL_PATH).install())
+    driver = webdriver.Firefox(service=service)
+    return driver
+
+
+def _is_healthy(browser: webdriver.Firefox) -> bool:
+    try:
+        return browser.execute_script("return document.readyState") is not None
+    except exceptions.WebDriverException:
+        return False
+
+
+def _quit(browser: webdriver.Firefox) -> None:
+    """
+    Close the browser and quit the web driver
+    """
+    try:
+        browser.close()
+        browser.quit()
+    except exceptions.WebDriverException:
+        logger.warning("Browser did not shut down cleanly", exc_info=True)
+
+
+def _get_memory_mb(browser: webdriver.Firefox) -> Optional[int]:
+    """
+    Return the resident memory of Firefox and its content processes, if the platform lets us see it.
+    """
+    pid = browser.capabilities.get("moz:processID")
+    if not pid:
+        return None
+    try:
+        return sum(_get_rss_kb(process_id) for process_id in _get_process_tree(pid)) // 1024
+    except OSError:
+        return None
+
+
+def _get_process_tree(pid: int) -> list[int]:
+    pids = [pid]
+    for children in Path(f"/proc/{pid}/task").glob("*/children"):
+        for child in children.read_text().split():
+            pids.extend(_get_process_tree(int(child)))
+    return pids
+
+
+def _get_rss_kb(pid: int) -> int:
+    for line in Path(f"/proc/{pid}/status").read_text().splitlines():
+        if line.startswith("VmRSS:"):
+            return int(line.split()[1])
+    return 0
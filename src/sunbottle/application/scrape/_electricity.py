@@ -1,142 +1,317 @@
+from __future__ import annotations
+
+import contextlib
 import datetime
+import functools
 import logging
-from typing import Iterable, Optional
+import threading
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, Optional, Union
 
 from django.conf import settings
-from selenium import webdriver
-from selenium.webdriver.firefox.service import Service as FirefoxService
-from webdriver_manager.firefox import GeckoDriverManager
+from django.db import transaction
 
 from sunbottle.data.electricity import models as electricity_models
+from sunbottle.data.scrape import models as scrape_models
 from sunbottle.domain.electricity import buysell, consumption, generation
 from sunbottle.domain.electricity import operations as electricity_ops
 from sunbottle.domain.electricity import queries, storage
+from sunbottle.domain.scrape import fingerprints
+from sunbottle.domain.scrape import operations as scrape_ops
+from sunbottle.domain.scrape import queries as scrape_queries
+from sunbottle.domain.scrape import series as scrape_series
+from sunbottle.domain.sharp import waits
+
+from . import _browsers
 
 logger = logging.getLogger(__name__)
 
+Retriever = Union[
+    generation.GenerationRetriever,
+    storage.StorageRetriever,
+    buysell.BuySellRetriever,
+    consumption.ConsumptionRetriever,
+]
+
 
 def scrape_generation(generator: electricity_models.Generator, date: Optional[datetime.date] = None) -> None:
     """
     Scrapes generation data and associates it with a generator.
     """
     retriever = generation.get_generation_retriever()
-    browser = _get_browser()
 
-    # Record generation readings
-    readings = retriever.retrieve(browser=browser, date=date)
+    with _browsers.session_for(retriever) as session:
+        # Record generation readings
+        readings = retriever.retrieve(browser=session.browser, date=date)
+        session.record_page_load()
     electricity_ops.record_generation_readings(generator, readings)
 
-    browser.quit()
-
 
 def scrape_storage(battery: electricity_models.Battery, date: Optional[datetime.date] = None) -> None:
     """
     Scrapes storage data and associates it with a battery.
     """
     retriever = storage.get_storage_retriever()
-    browser = _get_browser()
 
-    # Record battery level readings
-    readings = retriever.retrieve(browser=browser, date=date)
+    with _browsers.session_for(retriever) as session:
+        # Record battery level readings
+        readings = retriever.retrieve(browser=session.browser, date=date)
+        session.record_page_load()
     electricity_ops.record_storage_readings(battery, readings)
 
-    browser.quit()
-
 
 def scrape_buysell(date: Optional[datetime.date] = None) -> None:
     """
     Scrapes electricity buy/sell information.
     """
     retriever = buysell.get_buysell_retriever()
-    browser = _get_browser()
 
-    # Record generation readings
-    readings = retriever.retrieve(browser=browser, date=date)
+    with _browsers.session_for(retriever) as session:
+        # Record generation readings
+        readings = retriever.retrieve(browser=session.browser, date=date)
+        session.record_page_load()
     electricity_ops.record_buy_sell_readings(readings)
 
-    browser.quit()
-
 
 def scrape_consumption(date: Optional[datetime.date] = None) -> None:
     """
     Scrapes consumption information.
     """
     retriever = consumption.get_consumption_retriever()
-    browser = _get_browser()
 
-    # Record consumption readings
-    readings = retriever.retrieve(browser=browser, date=date)
+    with _browsers.session_for(retriever) as session:
+        # Record consumption readings
+        readings = retriever.retrieve(browser=session.browser, date=date)
+        session.record_page_load()
     electricity_ops.record_consumption_readings(readings)
 
-    _cleanup_browser(browser)
-
 
 def scrape_consumption_range(start_date: datetime.date, end_date: datetime.date) -> None:
     """
     Scrapes consumption information.
     """
     retriever = consumption.get_consumption_retriever()
-    browser = _get_browser()
 
-    # Record consumption readings
-    for date in _date_range(start_date, end_date):
-        print(f"Scraping {date}")
-        readings = retriever.retrieve(browser=browser, date=date)
-        electricity_ops.record_consumption_readings(readings)
+    with _browsers.session_for(retriever) as session:
+        # Record consumption readings
+        for date in _date_range(start_date, end_date):
+            print(f"Scraping {date}")
+            readings = retriever.retrieve(browser=session.browser, date=date)
+            session.record_page_load()
+            electricity_ops.record_consumption_readings(readings)
+
+
+@dataclass
+class ScrapeResult:
+    """
+    Counters for a scrape, showing how much writing change detection saved.
+    """
 
-    _cleanup_browser(browser)
+    # Pages retrieved from the source.
+    fetched: int = 0
+    # Pages the retriever gave up on, e.g. because they timed out, that should be scraped again.
+    failed: int = 0
+    # Series whose values hadn't changed, so nothing was written for them.
+    series_unchanged: int = 0
+    # Readings that were retrieved but never sent to the database.
+    readings_skipped: int = 0
+    ingest: electricity_ops.IngestResult = field(default_factory=electricity_ops.IngestResult)
+
+    def __add__(self, other: ScrapeResult) -> ScrapeResult:
+        return ScrapeResult(
+            fetched=self.fetched + other.fetched,
+            failed=self.failed + other.failed,
+            series_unchanged=self.series_unchanged + other.series_unchanged,
+            readings_skipped=self.readings_skipped + other.readings_skipped,
+            ingest=self.ingest + other.ingest,
+        )
 
 
 def scrape_everything(date: Optional[datetime.date]) -> None:
     """
     Scrapes all generation, storage, and buy sell data.
-    """
 
-    browser = _get_browser()
+    Without a date, today is scraped along with yesterday until yesterday's last intervals have been finalized.
+    """
+    retrievers = get_retrievers()
+    today = datetime.date.today()
+    dates = [date] if date else [today - datetime.timedelta(days=1), today]
 
+    waits.reset_wait_totals()
     try:
-        _scrape_everything(browser, date)
+        with _browsers.session_for(*retrievers.values()) as session:
+            for scrape_date in dates:
+                _scrape_everything(session, scrape_date, retrievers)
     except Exception as e:
         logger.exception("Error scarping %s" % e)
-
-    _cleanup_browser(browser)
+    _log_wait_totals()
 
 
-def _scrape_everything(browser: webdriver.Firefox, date: Optional[datetime.date]) -> None:
-    generation_retriever = generation.get_generation_retriever()
-    storage_retriever = storage.get_storage_retriever()
-    buysell_retriever = buysell.get_buysell_retriever()
-    consumption_retreiver = consumption.get_consumption_retriever()
-
-    # Record generation readings
-    for generator in queries.get_generators():
-        generation_readings = generation_retriever.retrieve(browser=browser, date=date)
-        electricity_ops.record_generation_readings(generator, generation_readings)
+def _log_wait_totals() -> None:
+    """
+    Log the time spent waiting on each step of the Sharp pages since the totals were last reset.
+    """
+    totals = waits.get_wait_totals()
+    if totals:
+        logger.info(
+            "Waited on Sharp pages: %s",
+            ", ".join(f"{step} {seconds:.1f}s" for step, seconds in sorted(totals.items())),
+        )
 
-    for battery in queries.get_batteries():
-        # Record battery level readings
-        readings = storage_retriever.retrieve(browser=browser, date=date)
-        electricity_ops.record_storage_readings(battery, readings)
 
-    buysell_readings = buysell_retriever.retrieve(browser=browser, date=date)
-    electricity_ops.record_buy_sell_readings(buysell_readings)
+def get_retrievers() -> dict[str, Retriever]:
+    """
+    Return the configured retriever for each metric.
+    """
+    return {
+        scrape_models.Metric.GENERATION: generation.get_generation_retriever(),
+        scrape_models.Metric.STORAGE: storage.get_storage_retriever(),
+        scrape_models.Metric.BUYSELL: buysell.get_buysell_retriever(),
+        scrape_models.Metric.CONSUMPTION: consumption.get_consumption_retriever(),
+    }
+
+
+def scrape_metric(
+    session: _browsers.BrowserSession,
+    metric: str,
+    retriever: Retriever,
+    date: Optional[datetime.date],
+    write_lock: Optional[threading.Lock] = None,
+    force: bool = False,
+) -> ScrapeResult:
+    """
+    Scrape one metric for a date and record it against every entity it belongs to.
 
-    consumption_readings = consumption_retreiver.retrieve(browser=browser, date=date)
-    electricity_ops.record_consumption_readings(consumption_readings)
+    Sharp only has one aggregate page per metric, so the page is fetched once and its readings are fanned out to every
+    generator or battery rather than retrieved again for each of them.
 
+    Only readings after each series' watermark, the last interval Sharp had finished publishing when we last recorded
+    it, are written. Dates where every series is complete aren't fetched at all unless force is set. Each series' values
+    are fingerprinted, so a series that hasn't changed since the last scrape isn't written at all and otherwise only
+    the intervals that changed are.
 
-def _cleanup_browser(browser: webdriver.Firefox) -> None:
+    Readings are recorded while holding write_lock, if given, so parallel scrapers don't contend for the database.
     """
-    Close the browser and quit the web driver
+    write_lock = write_lock or contextlib.nullcontext()
+    date = date or datetime.date.today()
+    result = ScrapeResult()
+
+    metric_series = _get_series(metric)
+    if not metric_series:
+        return result
+
+    watermarks = {} if force else scrape_queries.get_watermarks([s.key for s in metric_series], date)
+    if all(scrape_queries.is_complete(s.key, date, watermarks.get(s.key)) for s in metric_series):
+        logger.debug("Skipping %s for %s, it's complete", metric, date)
+        return result
+
+    readings = retriever.retrieve(browser=session.browser, date=date)
+    session.record_page_load()
+
+    result.fetched += 1
+    if not readings:
+        # Nothing is recorded, not even a fingerprint or watermark, so the next scrape tries the page again.
+        logger.warning("No %s readings retrieved for %s", metric, date)
+        result.failed += 1
+        return result
+
+    previous_fingerprints = {} if force else scrape_queries.get_fingerprints([s.key for s in metric_series], date)
+    finalized_before = datetime.datetime.now() - datetime.timedelta(minutes=settings.SHARP_PUBLISHING_DELAY_MINUTES)
+    finalized = {}
+    current_fingerprints = {}
+    with write_lock, transaction.atomic():
+        for s in metric_series:
+            series_readings = s.select(readings)
+            fingerprint = fingerprints.fingerprint(series_readings)
+            current_fingerprints[s.key] = fingerprint
+            # Only write intervals that changed since the last scrape and that weren't already final.
+            watermark = watermarks.get(s.key)
+            previous = previous_fingerprints.get(s.key)
+            to_write = [
+                r
+                for r in fingerprints.get_changed(series_readings, fingerprint, previous)
+                if watermark is None or r.occurred_at > watermark
+            ]
+            if to_write:
+                result.ingest += s.record(to_write)
+            if previous is not None and previous.digest == fingerprint.digest:
+                result.series_unchanged += 1
+            result.readings_skipped += len(series_readings) - len(to_write)
+
+            interval = scrape_series.get_interval(s.key)
+            settled = [r.occurred_at for r in series_readings if r.occurred_at + interval <= finalized_before]
+            if settled:
+                finalized[s.key] = max(settled)
+        scrape_ops.set_watermarks(date, finalized)
+        scrape_ops.set_fingerprints(date, current_fingerprints)
+    return result
+
+
+@dataclass
+class _Series:
+    """
+    A series of readings on a scraped page and how to record it.
     """
-    browser.close()
-    browser.quit()
-
 
-def _get_browser() -> webdriver.Firefox:
-    service = FirefoxService(executable_path=GeckoDriverManager(path=settings.WEBDRIVER_INSTALL_PATH).install())
-    driver = webdriver.Firefox(service=service)
-    return driver
+    key: str
+    record: Callable[[list], electricity_ops.IngestResult]
+    select: Callable[[list], list] = list
+
+
+def _get_series(metric: str) -> list[_Series]:
+    if metric == scrape_models.Metric.GENERATION:
+        return [
+            _Series(
+                key=scrape_series.generation(generator),
+                record=functools.partial(electricity_ops.record_generation_readings, generator),
+            )
+            for generator in queries.get_generators()
+        ]
+    elif metric == scrape_models.Metric.STORAGE:
+        return [
+            _Series(
+                key=scrape_series.storage(battery),
+                record=functools.partial(electricity_ops.record_storage_readings, battery),
+            )
+            for battery in queries.get_batteries()
+        ]
+    elif metric == scrape_models.Metric.BUYSELL:
+        return [
+            _Series(
+                key=scrape_series.PURCHASE,
+                record=electricity_ops.record_buy_sell_readings,
+                select=lambda readings: [r for r in readings if isinstance(r, buysell.BuyReading)],
+            ),
+            _Series(
+                key=scrape_series.SALE,
+                record=electricity_ops.record_buy_sell_readings,
+                select=lambda readings: [r for r in readings if isinstance(r, buysell.SellReading)],
+            ),
+        ]
+    elif metric == scrape_models.Metric.CONSUMPTION:
+        return [_Series(key=scrape_series.CONSUMPTION, record=electricity_ops.record_consumption_readings)]
+    raise ValueError(f"Unknown metric {metric}")
+
+
+def _scrape_everything(
+    session: _browsers.BrowserSession, date: Optional[datetime.date], retrievers: dict[str, Retriever]
+) -> None:
+    result = ScrapeResult()
+    for metric, retriever in retrievers.items():
+        result += scrape_metric(session, metric, retriever, date)
+
+    logger.info(
+        "Scraped %s: %s pages fetched, %s failed, %s series unchanged, %s readings skipped, "
+        "%s readings inserted, %s updated, %s unchanged",
+        date,
+        result.fetched,
+        result.failed,
+        result.series_unchanged,
+        result.readings_skipped,
+        result.ingest.inserted,
+        result.ingest.updated,
+        result.ingest.unchanged,
+    )
 
 
 def _date_range(start_date: datetime.date, end_date: datetime.date) -> Iterable[datetime.date]:
@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import datetime
+import logging
+from dataclasses import dataclass, field
+from typing import Iterable
+
+from django.db import transaction
+
+from sunbottle.domain.electricity import operations as electricity_ops
+from sunbottle.domain.sharp import archive
+
+from . import _electricity
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ReplayResult:
+    replayed: int = 0
+    missing: list[tuple[str, datetime.date]] = field(default_factory=list)
+    ingest: electricity_ops.IngestResult = field(default_factory=electricity_ops.IngestResult)
+
+
+def replay(start_date: datetime.date, end_date: datetime.date, metrics: Iterable[str]) -> ReplayResult:
+    """
+    Rebuild readings from start_date up to, but not including, end_date from the archived Sharp payloads.
+
+    The latest payload archived for each metric and date is parsed as it would have been when it was fetched and
+    recorded against every generator or battery, without touching a browser or Sharp.
+    """
+    result = ReplayResult()
+    metric_series = {metric: _electricity._get_series(metric) for metric in metrics}
+    for date in _electricity._date_range(start_date, end_date):
+        for metric, series in metric_series.items():
+            archived = archive.get_latest(metric, date)
+            if archived is None:
+                result.missing.append((metric, date))
+                continue
+            readings = archive.to_readings(archived)
+            with transaction.atomic():
+                for s in series:
+                    result.ingest += s.record(s.select(readings))
+            result.replayed += 1
+            logger.info("Replayed %s for %s fetched at %s", metric, date, archived.fetched_at)
+    return result
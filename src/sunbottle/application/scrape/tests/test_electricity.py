@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import datetime
+from typing import Optional
+
+from django.test import TestCase
+
+from sunbottle.application.scrape import _browsers, _electricity
+from sunbottle.data.electricity import models as electricity_models
+from sunbottle.data.scrape import models as scrape_models
+from sunbottle.domain.electricity import consumption
+from sunbottle.domain.electricity import operations as electricity_ops
+
+DATE = datetime.date(2023, 6, 1)
+
+
+class StubConsumptionRetriever(consumption.ConsumptionRetriever):
+    requires_browser = False
+
+    def __init__(self, wh: list[int]) -> None:
+        self.wh = wh
+
+    def retrieve(self, browser=None, date: Optional[datetime.date] = None) -> list[consumption.ConsumptionReading]:
+        start = datetime.datetime(date.year, date.month, date.day)
+        return [
+            consumption.ConsumptionReading(occurred_at=start + datetime.timedelta(minutes=15 * n), wh=wh)
+            for n, wh in enumerate(self.wh)
+        ]
+
+
+class ScrapeMetricTests(TestCase):
+    def scrape(self, wh: list[int]) -> _electricity.ScrapeResult:
+        return _electricity.scrape_metric(
+            _browsers.BrowserSession(browser=None),
+            scrape_models.Metric.CONSUMPTION,
+            StubConsumptionRetriever(wh),
+            DATE,
+        )
+
+    def test_deleted_readings_are_written_again(self) -> None:
+        wh = list(range(1, 97))
+        self.scrape(wh)
+        self.assertEqual(96, electricity_models.ConsumptionReading.objects.count())
+
+        electricity_ops.delete_readings(electricity_models.ConsumptionReading.objects.filter(occurred_on=DATE))
+        result = self.scrape(wh)
+
+        self.assertEqual(96, result.ingest.inserted)
+        self.assertEqual(96, electricity_models.ConsumptionReading.objects.count())
+
+    def test_readings_of_a_cleared_series_are_written_again_after_rebuilding_rollups(self) -> None:
+        wh = list(range(1, 97))
+        self.scrape(wh)
+
+        electricity_models.ConsumptionReading.objects.all().delete()
+        electricity_models.DailySeries.objects.all().delete()
+        electricity_ops.rebuild_rollups(electricity_models.RollupMetric.CONSUMPTION)
+        result = self.scrape(wh)
+
+        self.assertEqual(96, result.ingest.inserted)
+
+    def test_days_left_packed_are_restored_before_writing(self) -> None:
+        wh = list(range(1, 97))
+        self.scrape(wh)
+        # What compact_readings does once the day is older than row_days.
+        electricity_models.ConsumptionReading.objects.all().delete()
+
+        result = electricity_ops.record_consumption_readings(StubConsumptionRetriever([5]).retrieve(date=DATE))
+
+        self.assertEqual(1, result.updated)
+        self.assertEqual(96, electricity_models.ConsumptionReading.objects.count())
+        self.assertEqual(sum(wh) - 1 + 5, electricity_ops.reconcile_lifetime_total("consumption", repair=False).actual)
+
+    def test_only_series_with_the_same_digest_are_unchanged(self) -> None:
+        # Half a day, so the date isn't complete and is scraped again.
+        wh = list(range(1, 49))
+        self.scrape(wh)
+
+        # The changed interval is behind the watermark, so nothing is written, but the series did change.
+        changed = self.scrape([100, *wh[1:]])
+        self.assertEqual(0, changed.ingest.written)
+        self.assertEqual(0, changed.series_unchanged)
+
+        unchanged = self.scrape([100, *wh[1:]])
+        self.assertEqual(1, unchanged.series_unchanged)
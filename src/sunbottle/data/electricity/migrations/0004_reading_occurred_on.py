@@ -0,0 +1,43 @@
+from django.db import migrations, models
+from django.db.models.functions import TruncDate
+
+READING_MODELS = [
+    "generationreading",
+    "batterylevelreading",
+    "electricitypurchase",
+    "electricitysale",
+    "consumptionreading",
+]
+
+
+def populate_occurred_on(apps, schema_editor):
+    for model_name in READING_MODELS:
+        model = apps.get_model("electricity", model_name)
+        model.objects.update(occurred_on=TruncDate("occurred_at"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("electricity", "0003_consumptionreading_alter_batterylevelreading_battery"),
+    ]
+
+    operations = [
+        *[
+            migrations.AddField(
+                model_name=model_name,
+                name="occurred_on",
+                field=models.DateField(editable=False, null=True),
+            )
+            for model_name in READING_MODELS
+        ],
+        migrations.RunPython(populate_occurred_on, migrations.RunPython.noop),
+        *[
+            migrations.AlterField(
+                model_name=model_name,
+                name="occurred_on",
+                field=models.DateField(db_index=True, editable=False),
+            )
+            for model_name in READING_MODELS
+        ],
+    ]
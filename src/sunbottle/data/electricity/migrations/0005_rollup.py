@@ -0,0 +1,84 @@
+# Generated by Django 4.2.2 on 2026-10-18 19:34
+
+import datetime
+import decimal
+from collections import defaultdict
+
+from django.db import migrations, models
+from django.db.models import Sum
+from django.db.models.functions import TruncHour
+
+# Matches the models of the rollup metrics in sunbottle.domain.electricity.retention.SOURCES.
+ROLLUP_SOURCES = {
+    "generation": "generationreading",
+    "consumption": "consumptionreading",
+    "purchase": "electricitypurchase",
+    "sale": "electricitysale",
+}
+
+
+def populate_rollups(apps, schema_editor):
+    Rollup = apps.get_model("electricity", "Rollup")
+    for metric, model_name in ROLLUP_SOURCES.items():
+        model = apps.get_model("electricity", model_name)
+        hourly = dict(
+            model.objects.annotate(hour=TruncHour("occurred_at"))
+            .values("hour")
+            .annotate(total=Sum("kwh"))
+            .order_by()
+            .values_list("hour", "total")
+        )
+        daily = defaultdict(decimal.Decimal)
+        for hour, kwh in hourly.items():
+            daily[datetime.datetime(hour.year, hour.month, hour.day)] += kwh
+        monthly = defaultdict(decimal.Decimal)
+        for day, kwh in daily.items():
+            monthly[datetime.datetime(day.year, day.month, 1)] += kwh
+        Rollup.objects.bulk_create(
+            [
+                Rollup(metric=metric, resolution=resolution, period_start=period_start, kwh=kwh)
+                for resolution, totals in [("hour", hourly), ("day", daily), ("month", monthly)]
+                for period_start, kwh in totals.items()
+            ],
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("electricity", "0004_reading_occurred_on"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Rollup",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                (
+                    "metric",
+                    models.CharField(
+                        choices=[
+                            ("generation", "Generation"),
+                            ("consumption", "Consumption"),
+                            ("purchase", "Purchase"),
+                            ("sale", "Sale"),
+                        ],
+                        max_length=32,
+                    ),
+                ),
+                (
+                    "resolution",
+                    models.CharField(choices=[("hour", "Hour"), ("day", "Day"), ("month", "Month")], max_length=8),
+                ),
+                ("period_start", models.DateTimeField()),
+                ("kwh", models.DecimalField(decimal_places=3, max_digits=12)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "unique_together": {("metric", "resolution", "period_start")},
+            },
+        ),
+        migrations.RunPython(populate_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,71 @@
+from django.db import migrations, models
+from django.db.models import F
+from django.db.models.functions import Cast, Round
+
+# Readings were stored as kWh with three decimal places, so every value is a whole number of Wh.
+READING_MODELS = [
+    "generationreading",
+    "electricityusage",
+    "electricitypurchase",
+    "electricitysale",
+    "consumptionreading",
+]
+MODELS = [*READING_MODELS, "rollup"]
+
+
+def kwh_to_wh(apps, schema_editor):
+    for model_name in MODELS:
+        model = apps.get_model("electricity", model_name)
+        model.objects.update(wh=Cast(Round(F("kwh") * 1000), output_field=models.BigIntegerField()))
+
+
+def wh_to_kwh(apps, schema_editor):
+    for model_name in MODELS:
+        model = apps.get_model("electricity", model_name)
+        model.objects.update(kwh=Cast(F("wh"), output_field=models.FloatField()) / 1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("electricity", "0005_rollup"),
+    ]
+
+    operations = [
+        *[
+            migrations.AlterField(
+                model_name=model_name,
+                name="kwh",
+                field=models.DecimalField(decimal_places=3, max_digits=6, null=True),
+            )
+            for model_name in READING_MODELS
+        ],
+        migrations.AlterField(
+            model_name="rollup",
+            name="kwh",
+            field=models.DecimalField(decimal_places=3, max_digits=12, null=True),
+        ),
+        *[
+            migrations.AddField(
+                model_name=model_name,
+                name="wh",
+                field=models.BigIntegerField(null=True),
+            )
+            for model_name in MODELS
+        ],
+        migrations.RunPython(kwh_to_wh, wh_to_kwh),
+        *[migrations.RemoveField(model_name=model_name, name="kwh") for model_name in MODELS],
+        *[
+            migrations.AlterField(
+                model_name=model_name,
+                name="wh",
+                field=models.IntegerField(),
+            )
+            for model_name in READING_MODELS
+        ],
+        migrations.AlterField(
+            model_name="rollup",
+            name="wh",
+            field=models.BigIntegerField(),
+        ),
+    ]
@@ -0,0 +1,79 @@
+# Generated by Django 4.2.2 on 2026-10-18 19:40
+
+import datetime
+import itertools
+import struct
+
+from django.db import migrations, models
+
+# (model, value field, scope field or None, series prefix, interval minutes), matching the series in
+# sunbottle.domain.scrape.series and the packing in sunbottle.domain.electricity.packing.
+SOURCES = [
+    ("generationreading", "wh", "generator_id", "generation", 15),
+    ("batterylevelreading", "charge_percent", "battery_id", "storage", 15),
+    ("electricitypurchase", "wh", None, "purchase", 60),
+    ("electricitysale", "wh", None, "sale", 60),
+    ("consumptionreading", "wh", None, "consumption", 15),
+]
+
+
+def populate_daily_series(apps, schema_editor):
+    DailySeries = apps.get_model("electricity", "DailySeries")
+    for model_name, value_field, scope_field, prefix, interval_minutes in SOURCES:
+        model = apps.get_model("electricity", model_name)
+        field = model._meta.get_field(value_field)
+        scale = 10 ** field.decimal_places if isinstance(field, models.DecimalField) else 1
+        order = [scope_field, "occurred_at"] if scope_field else ["occurred_at"]
+        readings = model.objects.order_by(*order).values_list(scope_field or "pk", "occurred_at", value_field)
+        rows = []
+        for (scope_id, date), day in itertools.groupby(
+            readings.iterator(), key=lambda reading: (reading[0] if scope_field else None, reading[1].date())
+        ):
+            values = [None] * (24 * 60 // interval_minutes)
+            start = datetime.datetime(date.year, date.month, date.day)
+            for _, occurred_at, value in day:
+                values[(occurred_at - start) // datetime.timedelta(minutes=interval_minutes)] = int(value * scale)
+            present = bytearray((len(values) + 7) // 8)
+            for index, value in enumerate(values):
+                if value is not None:
+                    present[index // 8] |= 1 << (index % 8)
+            rows.append(
+                DailySeries(
+                    series=f"{prefix}:{scope_id}" if scope_field else prefix,
+                    date=date,
+                    interval_minutes=interval_minutes,
+                    values=struct.pack(f"<{len(values)}i", *(value or 0 for value in values)),
+                    present=bytes(present),
+                )
+            )
+            if len(rows) >= 1000:
+                DailySeries.objects.bulk_create(rows)
+                rows = []
+        DailySeries.objects.bulk_create(rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("electricity", "0006_watt_hours"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DailySeries",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("series", models.CharField(max_length=64)),
+                ("date", models.DateField()),
+                ("interval_minutes", models.PositiveSmallIntegerField()),
+                ("values", models.BinaryField()),
+                ("present", models.BinaryField()),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "unique_together": {("series", "date")},
+            },
+        ),
+        migrations.RunPython(populate_daily_series, migrations.RunPython.noop),
+    ]
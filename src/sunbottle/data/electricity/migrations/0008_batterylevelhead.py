@@ -0,0 +1,55 @@
+# Generated by Django 4.2.2 on 2026-10-18 19:43
+
+import datetime
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Matches sunbottle.domain.electricity.operations.BATTERY_HEAD_WINDOW.
+BATTERY_HEAD_WINDOW = datetime.timedelta(hours=2)
+
+
+def populate_heads(apps, schema_editor):
+    Battery = apps.get_model("electricity", "Battery")
+    BatteryLevelReading = apps.get_model("electricity", "BatteryLevelReading")
+    BatteryLevelHead = apps.get_model("electricity", "BatteryLevelHead")
+    for battery in Battery.objects.all():
+        latest = BatteryLevelReading.objects.filter(battery=battery).order_by("occurred_at").last()
+        if latest is None:
+            continue
+        readings = BatteryLevelReading.objects.filter(
+            battery=battery, occurred_at__gt=latest.occurred_at - BATTERY_HEAD_WINDOW
+        ).order_by("occurred_at")
+        BatteryLevelHead.objects.create(
+            battery=battery,
+            recent=[[reading.occurred_at.isoformat(), str(reading.charge_percent)] for reading in readings],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("electricity", "0007_dailyseries"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BatteryLevelHead",
+            fields=[
+                (
+                    "battery",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="level_head",
+                        serialize=False,
+                        to="electricity.battery",
+                    ),
+                ),
+                ("recent", models.JSONField(default=list)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(populate_heads, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.2 on 2026-10-18 19:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("electricity", "0008_batterylevelhead"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BillingPeriodSnapshot",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("start_on", models.DateField(unique=True)),
+                ("end_on", models.DateField()),
+                ("stats", models.JSONField()),
+                ("rates", models.JSONField()),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,105 @@
+# Generated by Django 4.2.2 on 2026-10-18 19:49
+
+import datetime
+import decimal
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# The rates that used to be configured in settings.py.
+FUEL_ADJUSTMENT_CHARGES = {
+    datetime.date(2022, 10, 15): "9.72",
+    datetime.date(2022, 11, 15): "11.92",
+    datetime.date(2022, 12, 15): "12.99",
+    datetime.date(2023, 1, 15): "13.04",
+    datetime.date(2023, 2, 15): "11.69",
+    datetime.date(2023, 3, 15): "10.25",
+    datetime.date(2023, 4, 15): "9.21",
+    datetime.date(2023, 5, 15): "7.21",
+    datetime.date(2023, 6, 15): "6.54",
+}
+RENEWABLE_ENERGY_CHARGES = {
+    datetime.date(2022, 10, 15): "3.45",
+    datetime.date(2023, 5, 15): "1.40",
+}
+GREEN_OCTOPUS = [(0, 120, "19.68"), (121, 300, "24.05"), (301, None, "26.45")]
+
+
+def populate_rates(apps, schema_editor):
+    Charge = apps.get_model("electricity", "Charge")
+    Tariff = apps.get_model("electricity", "Tariff")
+    TariffTier = apps.get_model("electricity", "TariffTier")
+    for kind, charges in [
+        ("fuel_adjustment", FUEL_ADJUSTMENT_CHARGES),
+        ("renewable_energy", RENEWABLE_ENERGY_CHARGES),
+    ]:
+        Charge.objects.bulk_create(
+            Charge(kind=kind, effective_on=effective_on, yen_per_kwh=decimal.Decimal(yen_per_kwh))
+            for effective_on, yen_per_kwh in charges.items()
+        )
+    tariff = Tariff.objects.create(name="Green Octopus", effective_on=datetime.date(2022, 10, 15))
+    TariffTier.objects.bulk_create(
+        TariffTier(tariff=tariff, min_kwh=min_kwh, max_kwh=max_kwh, yen_per_kwh=decimal.Decimal(yen_per_kwh))
+        for min_kwh, max_kwh, yen_per_kwh in GREEN_OCTOPUS
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("electricity", "0009_billingperiodsnapshot"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Tariff",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("name", models.CharField(max_length=64)),
+                ("effective_on", models.DateField(unique=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="Charge",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[("fuel_adjustment", "Fuel Adjustment"), ("renewable_energy", "Renewable Energy")],
+                        max_length=32,
+                    ),
+                ),
+                ("effective_on", models.DateField()),
+                ("yen_per_kwh", models.DecimalField(decimal_places=2, max_digits=8)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "unique_together": {("kind", "effective_on")},
+            },
+        ),
+        migrations.CreateModel(
+            name="TariffTier",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("min_kwh", models.PositiveIntegerField()),
+                ("max_kwh", models.PositiveIntegerField(blank=True, null=True)),
+                ("yen_per_kwh", models.DecimalField(decimal_places=2, max_digits=8)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "tariff",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, related_name="tiers", to="electricity.tariff"
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("tariff", "min_kwh")},
+            },
+        ),
+        migrations.RunPython(populate_rates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 4.2.2 on 2026-10-18 19:56
+
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def populate_totals(apps, schema_editor):
+    Rollup = apps.get_model("electricity", "Rollup")
+    LifetimeTotal = apps.get_model("electricity", "LifetimeTotal")
+    for metric in ["generation", "consumption", "purchase", "sale"]:
+        total = Rollup.objects.filter(metric=metric, resolution="day").aggregate(total=Sum("wh"))["total"]
+        LifetimeTotal.objects.create(metric=metric, wh=total or 0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("electricity", "0011_time_of_use"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LifetimeTotal",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                (
+                    "metric",
+                    models.CharField(
+                        choices=[
+                            ("generation", "Generation"),
+                            ("consumption", "Consumption"),
+                            ("purchase", "Purchase"),
+                            ("sale", "Sale"),
+                        ],
+                        max_length=32,
+                        unique=True,
+                    ),
+                ),
+                ("wh", models.BigIntegerField(default=0)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(populate_totals, migrations.RunPython.noop),
+    ]
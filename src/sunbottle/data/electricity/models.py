@@ -1,6 +1,17 @@
+from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
 
 
+class OccurredOnMixin:
+    """
+    Keeps occurred_on, the local date of occurred_at, in step with it so daily lookups can use an index.
+    """
+
+    def save(self, *args, **kwargs):
+        self.occurred_on = self.occurred_at.date()
+        super().save(*args, **kwargs)
+
+
 class Generator(models.Model):
     """
     An electricity generator e.g. solar panels.
@@ -13,16 +24,17 @@ class Generator(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
 
 
-class GenerationReading(models.Model):
+class GenerationReading(OccurredOnMixin, models.Model):
     """
     An individual reading.
     """
 
     generator = models.ForeignKey(Generator, on_delete=models.CASCADE)
 
-    kwh = models.DecimalField(max_digits=6, decimal_places=3)
+    wh = models.IntegerField()
 
     occurred_at = models.DateTimeField()
+    occurred_on = models.DateField(db_index=True, editable=False)
 
     # Audit fields
     created_at = models.DateTimeField(auto_now_add=True)
@@ -45,12 +57,13 @@ class Battery(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
 
 
-class BatteryLevelReading(models.Model):
+class BatteryLevelReading(OccurredOnMixin, models.Model):
     battery = models.ForeignKey(Battery, on_delete=models.CASCADE, related_name="level_readings")
 
     charge_percent = models.DecimalField(max_digits=6, decimal_places=3)
 
     occurred_at = models.DateTimeField()
+    occurred_on = models.DateField(db_index=True, editable=False)
 
     # Audit fields
     created_at = models.DateTimeField(auto_now_add=True)
@@ -60,12 +73,28 @@ class BatteryLevelReading(models.Model):
         unique_together = ("battery", "occurred_at")
 
 
+class BatteryLevelHead(models.Model):
+    """
+    A battery's most recent level readings, kept up to date on ingest so its current charge can be read without
+    touching the history.
+
+    recent holds [occurred_at, charge_percent] pairs in ISO format and as strings, oldest first.
+    """
+
+    battery = models.OneToOneField(Battery, on_delete=models.CASCADE, primary_key=True, related_name="level_head")
+    recent = models.JSONField(default=list)
+
+    # Audit fields
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+
 class ElectricityUsage(models.Model):
     """
     Records the total electricity usage for a given period.
     """
 
-    kwh = models.DecimalField(max_digits=6, decimal_places=3)
+    wh = models.IntegerField()
 
     occurred_at = models.DateTimeField(unique=True)
 
@@ -74,34 +103,248 @@ class ElectricityUsage(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
 
 
-class ElectricityPurchase(models.Model):
-    kwh = models.DecimalField(max_digits=6, decimal_places=3)
+class ElectricityPurchase(OccurredOnMixin, models.Model):
+    wh = models.IntegerField()
 
     occurred_at = models.DateTimeField(unique=True)
+    occurred_on = models.DateField(db_index=True, editable=False)
 
     # Audit fields
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
 
-class ElectricitySale(models.Model):
-    kwh = models.DecimalField(max_digits=6, decimal_places=3)
+class ElectricitySale(OccurredOnMixin, models.Model):
+    wh = models.IntegerField()
 
     occurred_at = models.DateTimeField(unique=True)
+    occurred_on = models.DateField(db_index=True, editable=False)
 
     # Audit fields
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
 
-class ConsumptionReading(models.Model):
+class ConsumptionReading(OccurredOnMixin, models.Model):
     """
     An individual consumption reading.
     """
 
-    kwh = models.DecimalField(max_digits=6, decimal_places=3)
+    wh = models.IntegerField()
 
     occurred_at = models.DateTimeField(unique=True)
+    occurred_on = models.DateField(db_index=True, editable=False)
+
+    # Audit fields
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+
+class RollupMetric(models.TextChoices):
+    """
+    The kWh readings that are rolled up.
+    """
+
+    GENERATION = "generation"
+    CONSUMPTION = "consumption"
+    PURCHASE = "purchase"
+    SALE = "sale"
+
+
+class Resolution(models.TextChoices):
+    HOUR = "hour"
+    DAY = "day"
+    MONTH = "month"
+
+
+class Rollup(models.Model):
+    """
+    The total Wh of a metric over the hour, day or month starting at period_start.
+
+    Kept up to date as readings are recorded so reads don't need to sum the raw readings.
+    """
+
+    metric = models.CharField(max_length=32, choices=RollupMetric.choices)
+    resolution = models.CharField(max_length=8, choices=Resolution.choices)
+    period_start = models.DateTimeField()
+
+    wh = models.BigIntegerField()
+
+    # Audit fields
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("metric", "resolution", "period_start")
+
+
+class DailySeries(models.Model):
+    """
+    Every interval of a series on a date packed into a single row.
+
+    values holds one little-endian 32 bit integer per interval, Wh or thousandths of a percent for battery levels, and
+    present has a bit set for each interval that has a reading. See sunbottle.domain.electricity.packing.
+    """
+
+    series = models.CharField(max_length=64)
+    date = models.DateField()
+    interval_minutes = models.PositiveSmallIntegerField()
+
+    values = models.BinaryField()
+    present = models.BinaryField()
+
+    # Audit fields
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("series", "date")
+
+
+class BillingPeriodSnapshot(models.Model):
+    """
+    The stats of a closed billing period, frozen once its readings have settled.
+
+    stats holds sunbottle.domain.electricity.queries.BillingPeriodStats as JSON and rates the charges and tariff it was
+    priced with, so a snapshot whose rates have since changed can be recognized as stale. Snapshots are deleted when
+    readings are written into their period.
+    """
+
+    start_on = models.DateField(unique=True)
+    end_on = models.DateField()
+
+    stats = models.JSONField()
+    rates = models.JSONField()
+
+    # Audit fields
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+
+class ChargeKind(models.TextChoices):
+    FUEL_ADJUSTMENT = "fuel_adjustment"
+    RENEWABLE_ENERGY = "renewable_energy"
+
+
+class Charge(models.Model):
+    """
+    A charge per kWh on top of the tariff.
+
+    It applies to billing periods starting on or after effective_on, until the next charge of the same kind.
+    """
+
+    kind = models.CharField(max_length=32, choices=ChargeKind.choices)
+    effective_on = models.DateField()
+    yen_per_kwh = models.DecimalField(max_digits=8, decimal_places=2)
+
+    # Audit fields
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("kind", "effective_on")
+
+    def __str__(self) -> str:
+        return f"{self.get_kind_display()} from {self.effective_on}"
+
+
+class Tariff(models.Model):
+    """
+    The price per kWh of billing periods starting on or after effective_on, until the next tariff.
+
+    A tariff with bands prices each hour by time of use and its tiers are ignored, otherwise the kWh used over the
+    period are priced by tier.
+    """
+
+    name = models.CharField(max_length=64)
+    effective_on = models.DateField(unique=True)
+
+    # Audit fields
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f"{self.name} from {self.effective_on}"
+
+
+class TariffTier(models.Model):
+    """
+    The price of each kWh from min_kwh up to max_kwh used in a billing period. The last tier has no max_kwh.
+    """
+
+    tariff = models.ForeignKey(Tariff, on_delete=models.CASCADE, related_name="tiers")
+    min_kwh = models.PositiveIntegerField()
+    max_kwh = models.PositiveIntegerField(null=True, blank=True)
+    yen_per_kwh = models.DecimalField(max_digits=8, decimal_places=2)
+
+    # Audit fields
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("tariff", "min_kwh")
+
+
+class BandDays(models.TextChoices):
+    ALL = "all"
+    WEEKDAYS = "weekdays"
+    # Weekends and Holidays.
+    HOLIDAYS = "holidays"
+
+
+class TariffBand(models.Model):
+    """
+    The price of each kWh used from start_hour until end_hour on the days and months of a time of use tariff.
+
+    Hours and months wrap around, so 22 to 6 is overnight and November to March is winter. When start_hour equals
+    end_hour the band covers the whole day. An hour is priced by the first band in order that covers it.
+    """
+
+    tariff = models.ForeignKey(Tariff, on_delete=models.CASCADE, related_name="bands")
+    name = models.CharField(max_length=64, blank=True)
+    order = models.PositiveSmallIntegerField(default=0)
+
+    days = models.CharField(max_length=16, choices=BandDays.choices, default=BandDays.ALL)
+    start_month = models.PositiveSmallIntegerField(default=1, validators=[MinValueValidator(1), MaxValueValidator(12)])
+    end_month = models.PositiveSmallIntegerField(default=12, validators=[MinValueValidator(1), MaxValueValidator(12)])
+    start_hour = models.PositiveSmallIntegerField(default=0, validators=[MaxValueValidator(23)])
+    end_hour = models.PositiveSmallIntegerField(default=0, validators=[MaxValueValidator(23)])
+
+    yen_per_kwh = models.DecimalField(max_digits=8, decimal_places=2)
+
+    # Audit fields
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["order", "id"]
+
+
+class Holiday(models.Model):
+    """
+    A public holiday, priced by the holiday bands of time of use tariffs like a weekend.
+    """
+
+    date = models.DateField(unique=True)
+    name = models.CharField(max_length=64)
+
+    # Audit fields
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f"{self.name} ({self.date})"
+
+
+class LifetimeTotal(models.Model):
+    """
+    The Wh of a metric since installation.
+
+    Kept up to date as the rollups are, so lifetime figures are a single row read. See reconcile_lifetime_totals.
+    """
+
+    metric = models.CharField(max_length=32, choices=RollupMetric.choices, unique=True)
+    wh = models.BigIntegerField(default=0)
 
     # Audit fields
     created_at = models.DateTimeField(auto_now_add=True)
@@ -0,0 +1,46 @@
+"""
+Routes reads made while serving public pages to a read-only connection.
+
+The scrape and backfill jobs write through the default connection. Views wrapped in read_only() read through the
+"readonly" alias instead, which is the same SQLite file opened with query_only, so a long write transaction never holds
+a page up and a view can't write by accident.
+"""
+import contextlib
+import contextvars
+from typing import Iterator, Optional
+
+from django.conf import settings
+
+READ_ONLY_DATABASE = "readonly"
+
+_read_only = contextvars.ContextVar("read_only", default=False)
+
+
+@contextlib.contextmanager
+def read_only() -> Iterator[None]:
+    """
+    Send reads made in the block to the read-only connection.
+    """
+    token = _read_only.set(True)
+    try:
+        yield
+    finally:
+        _read_only.reset(token)
+
+
+class ReadOnlyRouter:
+    def db_for_read(self, model, **hints) -> Optional[str]:
+        if _read_only.get() and READ_ONLY_DATABASE in settings.DATABASES:
+            return READ_ONLY_DATABASE
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints) -> Optional[bool]:
+        # Both aliases are the same database.
+        if {obj1._state.db, obj2._state.db} <= {"default", READ_ONLY_DATABASE}:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, **hints) -> Optional[bool]:
+        if db == READ_ONLY_DATABASE:
+            return False
+        return None
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.2 on 2026-10-18 19:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name="BackfillProgress",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                (
+                    "metric",
+                    models.CharField(
+                        choices=[
+                            ("generation", "Generation"),
+                            ("storage", "Storage"),
+                            ("buysell", "Buysell"),
+                            ("consumption", "Consumption"),
+                        ],
+                        max_length=32,
+                    ),
+                ),
+                ("date", models.DateField()),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "unique_together": {("metric", "date")},
+            },
+        ),
+    ]
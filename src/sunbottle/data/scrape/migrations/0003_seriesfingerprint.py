@@ -0,0 +1,28 @@
+# Generated by Django 4.2.2 on 2026-10-18 19:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("scrape", "0002_serieswatermark"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SeriesFingerprint",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("series", models.CharField(max_length=64)),
+                ("date", models.DateField()),
+                ("digest", models.CharField(max_length=64)),
+                ("values", models.JSONField()),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "unique_together": {("series", "date")},
+            },
+        ),
+    ]
@@ -0,0 +1,50 @@
+import hashlib
+
+from django.db import migrations, models
+
+# As fingerprints.SLOT_DIGEST_SIZE and fingerprints.get_slot_digest when this migration was written.
+SLOT_DIGEST_SIZE = 8
+
+
+def values_to_slots(apps, schema_editor):
+    SeriesFingerprint = apps.get_model("scrape", "SeriesFingerprint")
+    for fingerprint in SeriesFingerprint.objects.iterator():
+        fingerprint.slots = b"".join(
+            sorted(
+                hashlib.sha256(f"{occurred_at}={value}".encode()).digest()[:SLOT_DIGEST_SIZE]
+                for occurred_at, value in fingerprint.values.items()
+            )
+        )
+        fingerprint.save(update_fields=["slots"])
+
+
+def slots_to_values(apps, schema_editor):
+    # The values can't be recovered from their digests. With none recorded, every interval of a series that changed
+    # is passed on and the bulk upsert leaves those with the same value unchanged.
+    apps.get_model("scrape", "SeriesFingerprint").objects.update(values={})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("scrape", "0003_seriesfingerprint"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="seriesfingerprint",
+            name="slots",
+            field=models.BinaryField(default=b""),
+            preserve_default=False,
+        ),
+        migrations.AlterField(
+            model_name="seriesfingerprint",
+            name="values",
+            field=models.JSONField(null=True),
+        ),
+        migrations.RunPython(values_to_slots, slots_to_values),
+        migrations.RemoveField(
+            model_name="seriesfingerprint",
+            name="values",
+        ),
+    ]
@@ -0,0 +1,69 @@
+from django.db import models
+
+
+class Metric(models.TextChoices):
+    """
+    The kinds of data that are scraped, one page per metric.
+    """
+
+    GENERATION = "generation"
+    STORAGE = "storage"
+    BUYSELL = "buysell"
+    CONSUMPTION = "consumption"
+
+
+class BackfillProgress(models.Model):
+    """
+    A metric and date that a backfill has finished scraping.
+    """
+
+    metric = models.CharField(max_length=32, choices=Metric.choices)
+    date = models.DateField()
+
+    # Audit fields
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("metric", "date")
+
+
+class SeriesWatermark(models.Model):
+    """
+    The last interval of a series on a date that Sharp has finished publishing and we have recorded.
+
+    Readings at or before it are final and don't need writing again. A date whose watermark has reached its last
+    interval is complete and isn't scraped again.
+    """
+
+    series = models.CharField(max_length=64)
+    date = models.DateField()
+    finalized_through = models.DateTimeField()
+
+    # Audit fields
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("series", "date")
+
+
+class SeriesFingerprint(models.Model):
+    """
+    A hash of the values last recorded for a series on a date, along with a short hash of each interval.
+
+    A scrape whose values hash the same is skipped, and otherwise only the intervals whose values differ are written.
+    """
+
+    series = models.CharField(max_length=64)
+    date = models.DateField()
+    digest = models.CharField(max_length=64)
+    # See fingerprints.Fingerprint.slots.
+    slots = models.BinaryField()
+
+    # Audit fields
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("series", "date")
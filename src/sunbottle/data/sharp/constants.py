@@ -1,7 +1,13 @@
 # URLs for scraping Cocoro Energy
 LOGIN_FORM_NAME = "a050101InputForm"
-GENERATION_URL = "https://hems.cloudlabs.sharp.co.jp/cloudhems/pvt/A121641000.htm"
-STORAGE_URL = "https://hems.cloudlabs.sharp.co.jp/cloudhems/pvt/A121642000.htm"
-CHANGE_URL = "https://hems.cloudlabs.sharp.co.jp/cloudhems/pvt/A121641100.htm"
-BUY_SELL_POWER_URL = "https://hems.cloudlabs.sharp.co.jp/cloudhems/pvt/A121641003.htm"
-CONSUMPTION_URL = "https://hems.cloudlabs.sharp.co.jp/cloudhems/pvt/A121610000.htm"
+BASE_URL = "https://hems.cloudlabs.sharp.co.jp/cloudhems/pvt/"
+GENERATION_PAGE = "A121641000.htm"
+STORAGE_PAGE = "A121642000.htm"
+CHANGE_PAGE = "A121641100.htm"
+BUY_SELL_POWER_PAGE = "A121641003.htm"
+CONSUMPTION_PAGE = "A121610000.htm"
+GENERATION_URL = BASE_URL + GENERATION_PAGE
+STORAGE_URL = BASE_URL + STORAGE_PAGE
+CHANGE_URL = BASE_URL + CHANGE_PAGE
+BUY_SELL_POWER_URL = BASE_URL + BUY_SELL_POWER_PAGE
+CONSUMPTION_URL = BASE_URL + CONSUMPTION_PAGE
@@ -0,0 +1,20 @@
+"""
+The sqlite3 backend with per-connection pragmas.
+
+Django 4.2 has no init_command for SQLite, so pragmas are given as OPTIONS["pragmas"] and run on every new connection.
+They're applied in order, so query_only should come after anything that writes to the file such as journal_mode.
+"""
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        self.pragmas = params.pop("pragmas", {})
+        return params
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        return conn
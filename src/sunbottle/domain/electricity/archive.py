@@ -0,0 +1,115 @@
+"""
+Columnar files that hold raw readings once they've aged out of the database.
+
+Each file holds one compaction's readings of one kind for one month as a gzipped JSON header line followed by three
+little-endian columns: the generator or battery id (0 when the kind has none), occurred_at in seconds since the epoch
+and the value as stored by DailySeries. Files are written to <RETENTION_ARCHIVE_PATH>/<kind>/<year>/<yyyy-mm>-*.col.gz
+and never modified.
+"""
+from __future__ import annotations
+
+import datetime
+import gzip
+import json
+import os
+import struct
+import tempfile
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+
+from django.conf import settings
+
+EPOCH = datetime.datetime(1970, 1, 1)
+COLUMNS = [("scope_id", "i"), ("occurred_at", "q"), ("value", "i")]
+
+
+@dataclass(frozen=True)
+class ArchivedReading:
+    scope_id: int
+    occurred_at: datetime.datetime
+    value: int
+
+
+def write(kind: str, month: datetime.date, readings: list[ArchivedReading]) -> Path:
+    """
+    Write the readings to a new file for the kind and month.
+    """
+    directory = Path(settings.RETENTION_ARCHIVE_PATH, kind, str(month.year))
+    directory.mkdir(parents=True, exist_ok=True)
+    header = {
+        "kind": kind,
+        "month": month.strftime("%Y-%m"),
+        "archived_at": datetime.datetime.now().isoformat(),
+        "rows": len(readings),
+        "columns": COLUMNS,
+    }
+    columns = [
+        [reading.scope_id for reading in readings],
+        [int((reading.occurred_at - EPOCH).total_seconds()) for reading in readings],
+        [reading.value for reading in readings],
+    ]
+    data = json.dumps(header).encode() + b"\n"
+    for (_, code), values in zip(COLUMNS, columns):
+        data += struct.pack(f"<{len(values)}{code}", *values)
+
+    path = directory / f"{header['month']}-{uuid.uuid4().hex}.col.gz"
+    descriptor, temporary = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(descriptor, "wb") as f:
+            f.write(gzip.compress(data))
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+    return path
+
+
+def read_day(kind: str, date: datetime.date) -> list[ArchivedReading]:
+    """
+    Return the archived readings of the kind that occurred on the date, ordered by when they occurred.
+
+    If a day was archived more than once, the most recently archived value of each reading wins.
+    """
+    return [reading for reading in read_month(kind, date) if reading.occurred_at.date() == date]
+
+
+def read_month(kind: str, month: datetime.date) -> list[ArchivedReading]:
+    """
+    Return the archived readings of the kind that occurred in the month of the date, ordered by when they occurred.
+
+    If a reading was archived more than once, its most recently archived value wins.
+    """
+    directory = Path(settings.RETENTION_ARCHIVE_PATH, kind, str(month.year))
+    files = [_read(path) for path in directory.glob(f"{month.strftime('%Y-%m')}-*.col.gz")]
+    readings: dict[tuple[int, datetime.datetime], ArchivedReading] = {}
+    for _, file_readings in sorted(files, key=lambda file: file[0]["archived_at"]):
+        for reading in file_readings:
+            readings[reading.scope_id, reading.occurred_at] = reading
+    return sorted(readings.values(), key=lambda reading: reading.occurred_at)
+
+
+def get_months(kind: str) -> list[datetime.date]:
+    """
+    Return the first day of every month the kind has archived readings for, in order.
+    """
+    names = {path.name[:7] for path in Path(settings.RETENTION_ARCHIVE_PATH, kind).glob("*/*.col.gz")}
+    return sorted(datetime.datetime.strptime(name, "%Y-%m").date() for name in names)
+
+
+def _read(path: Path) -> tuple[dict, list[ArchivedReading]]:
+    data = gzip.decompress(path.read_bytes())
+    header_line, _, body = data.partition(b"\n")
+    header = json.loads(header_line)
+    rows = header["rows"]
+    columns = []
+    offset = 0
+    for _, code in header["columns"]:
+        size = struct.calcsize(f"<{rows}{code}")
+        columns.append(struct.unpack_from(f"<{rows}{code}", body, offset))
+        offset += size
+    scope_ids, timestamps, values = columns
+    return header, [
+        ArchivedReading(scope_id=scope_id, occurred_at=EPOCH + datetime.timedelta(seconds=timestamp), value=value)
+        for scope_id, timestamp, value in zip(scope_ids, timestamps, values)
+    ]
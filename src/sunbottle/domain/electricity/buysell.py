@@ -1,7 +1,6 @@
 from __future__ import annotations
 
 import datetime
-import decimal
 from dataclasses import dataclass
 from typing import Optional, Union
 
@@ -13,16 +12,19 @@ from selenium import webdriver
 @dataclass
 class SellReading:
     occurred_at: datetime.datetime
-    kwh: decimal.Decimal
+    wh: int
 
 
 @dataclass
 class BuyReading:
     occurred_at: datetime.datetime
-    kwh: decimal.Decimal
+    wh: int
 
 
 class BuySellRetriever:
+    # Retrievers that don't need Firefox set this to False so no browser is started for them.
+    requires_browser = True
+
     def retrieve(
         self,
         browser: Optional[webdriver.Firefox] = None,
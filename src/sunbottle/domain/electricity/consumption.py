@@ -1,7 +1,6 @@
 from __future__ import annotations
 
 import datetime
-import decimal
 from dataclasses import dataclass
 from typing import Optional
 
@@ -13,10 +12,13 @@ from selenium import webdriver
 @dataclass
 class ConsumptionReading:
     occurred_at: datetime.datetime
-    kwh: decimal.Decimal
+    wh: int
 
 
 class ConsumptionRetriever:
+    # Retrievers that don't need Firefox set this to False so no browser is started for them.
+    requires_browser = True
+
     def retrieve(
         self,
         browser: Optional[webdriver.Firefox] = None,
@@ -0,0 +1,95 @@
+"""
+Everything the dashboard shows, collected from the rollups, lifetime totals and battery heads in two queries.
+"""
+from __future__ import annotations
+
+import datetime
+import decimal
+from dataclasses import dataclass
+from typing import Optional
+
+from dateutil.relativedelta import relativedelta
+from django.db.models import DateTimeField, F, Value
+
+from sunbottle.data.electricity import models as electricity_models
+from sunbottle.domain.electricity import queries
+
+
+@dataclass
+class DayTotals:
+    """
+    The Wh of each metric on a day.
+    """
+
+    generation: int = 0
+    consumption: int = 0
+    purchase: int = 0
+    sale: int = 0
+
+
+@dataclass
+class BatteryCharge:
+    name: str
+    capacity: decimal.Decimal
+    charge: decimal.Decimal
+
+
+@dataclass
+class DashboardSnapshot:
+    date: datetime.date
+    today: DayTotals
+    yesterday: DayTotals
+    # The day a year before yesterday, to compare yesterday with.
+    last_year: DayTotals
+    total_generation: int
+    batteries: list[BatteryCharge]
+
+
+def get_dashboard_snapshot(today: Optional[datetime.date] = None) -> DashboardSnapshot:
+    """
+    Return the dashboard for today.
+
+    The daily rollups of the three days and the generation lifetime total are fetched in one query, and the batteries
+    with their heads in another.
+    """
+    today = today or datetime.date.today()
+    yesterday = today - datetime.timedelta(days=1)
+    last_year = yesterday - relativedelta(years=1)
+    days = {_start_of_day(date): DayTotals() for date in [today, yesterday, last_year]}
+
+    total_generation = 0
+    # The generation lifetime total comes back with the daily rollups, without a day. Both sides of the union
+    # annotate the day so their columns are in the same order.
+    rollups = (
+        electricity_models.Rollup.objects.filter(
+            resolution=electricity_models.Resolution.DAY, period_start__in=list(days)
+        )
+        .annotate(day=F("period_start"))
+        .values_list("metric", "wh", "day")
+    )
+    lifetime = (
+        electricity_models.LifetimeTotal.objects.filter(metric=electricity_models.RollupMetric.GENERATION)
+        .annotate(day=Value(None, output_field=DateTimeField()))
+        .values_list("metric", "wh", "day")
+    )
+    for metric, wh, day in rollups.union(lifetime, all=True):
+        if day is None:
+            total_generation = wh
+        else:
+            setattr(days[day], metric, wh)
+
+    return DashboardSnapshot(
+        date=today,
+        today=days[_start_of_day(today)],
+        yesterday=days[_start_of_day(yesterday)],
+        last_year=days[_start_of_day(last_year)],
+        total_generation=total_generation,
+        batteries=[
+            BatteryCharge(name=battery.name, capacity=battery.capacity, charge=charge)
+            for battery, charge in queries.get_batteries_with_charge()
+        ],
+    )
+
+
+def _start_of_day(date: datetime.date) -> datetime.datetime:
+    return datetime.datetime(date.year, date.month, date.day)
@@ -0,0 +1,129 @@
+"""
+Stream readings and rollups out as CSV or NDJSON without holding a range in memory.
+
+Rows are read with QuerySet.iterator so only one chunk is loaded at a time, and encoded and compressed as they go.
+Raw readings include the days compact_readings moved to the archive, see queries.get_readings.
+"""
+from __future__ import annotations
+
+import csv
+import datetime
+import io
+import json
+import zlib
+from typing import Any, Iterable, Iterator
+
+from django.db import models as django_models
+
+from sunbottle.data.electricity import models
+from sunbottle.domain.electricity import packing, queries, retention
+
+CSV = "csv"
+NDJSON = "ndjson"
+FORMATS = [CSV, NDJSON]
+
+RAW = "raw"
+RESOLUTIONS = [RAW, *models.Resolution.values]
+
+CONTENT_TYPES = {CSV: "text/csv", NDJSON: "application/x-ndjson"}
+
+CHUNK_SIZE = 2000
+# Encoded rows are compressed in batches of about this many bytes.
+COMPRESS_BATCH_BYTES = 64 * 1024
+
+
+def get_rows(
+    kind: str, start: datetime.date, end: datetime.date, resolution: str = RAW
+) -> tuple[list[str], Iterator[tuple[Any, ...]]]:
+    """
+    Return the column names and rows of a kind of reading between start and the exclusive end.
+
+    Rollups are only kept for energy, so battery levels can only be exported raw.
+    """
+    source = retention.SOURCES[kind]
+    if resolution == RAW:
+        columns = ["occurred_at", source.value_field]
+        if source.scope_field:
+            columns.insert(1, source.scope_field)
+        return columns, _get_raw_rows(kind, start, end)
+    elif source.rollup:
+        columns = ["period_start", "wh"]
+        queryset = (
+            models.Rollup.objects.filter(
+                metric=source.rollup,
+                resolution=resolution,
+                period_start__gte=datetime.datetime(start.year, start.month, start.day),
+                period_start__lt=datetime.datetime(end.year, end.month, end.day),
+            )
+            .order_by("period_start")
+            .values_list(*columns)
+        )
+    else:
+        raise ValueError(f"{kind} has no {resolution} rollups")
+    return columns, _iterate(queryset)
+
+
+def _get_raw_rows(kind: str, start: datetime.date, end: datetime.date) -> Iterator[tuple[Any, ...]]:
+    source = retention.SOURCES[kind]
+    field = source.model._meta.get_field(source.value_field)
+    readings = queries.get_readings(kind, start, end)
+    if source.scope_field:
+        return (
+            (reading.occurred_at, reading.scope_id, packing.from_packed(field, reading.value)) for reading in readings
+        )
+    return ((reading.occurred_at, packing.from_packed(field, reading.value)) for reading in readings)
+
+
+def encode(columns: list[str], rows: Iterable[tuple[Any, ...]], format: str) -> Iterator[str]:
+    """
+    Encode the rows one line at a time, starting with a header line for CSV.
+    """
+    if format == CSV:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in _with_header(columns, rows):
+            writer.writerow(row)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    elif format == NDJSON:
+        for row in rows:
+            yield json.dumps(dict(zip(columns, row)), default=_to_json) + "\n"
+    else:
+        raise ValueError(f"Unknown format {format}")
+
+
+def gzip_stream(lines: Iterable[str]) -> Iterator[bytes]:
+    """
+    Gzip the lines as they're produced, yielding compressed data each time a batch fills up.
+    """
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    batch: list[bytes] = []
+    size = 0
+    for line in lines:
+        data = line.encode()
+        batch.append(data)
+        size += len(data)
+        if size >= COMPRESS_BATCH_BYTES:
+            compressed = compressor.compress(b"".join(batch))
+            batch, size = [], 0
+            if compressed:
+                yield compressed
+    yield compressor.compress(b"".join(batch)) + compressor.flush()
+
+
+def _iterate(queryset: django_models.QuerySet) -> Iterator[tuple[Any, ...]]:
+    # Pin the database now, so a stream consumed after a read_only() view has returned still reads from the
+    # connection that was routed to when the export was requested.
+    return queryset.using(queryset.db).iterator(chunk_size=CHUNK_SIZE)
+
+
+def _with_header(columns: list[str], rows: Iterable[tuple[Any, ...]]) -> Iterator[Iterable[Any]]:
+    yield columns
+    yield from rows
+
+
+def _to_json(value: Any) -> Any:
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    return str(value)
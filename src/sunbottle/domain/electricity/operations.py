@@ -1,58 +1,584 @@
 from __future__ import annotations
 
-from typing import Union
+import datetime
+import itertools
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any, Iterable, Optional, Type, Union
 
+from dateutil.relativedelta import relativedelta
+from django.conf import settings
+from django.db import models as django_models
 from django.db import transaction
 
 from sunbottle.data.electricity import models
-from sunbottle.domain.electricity import buysell, consumption, generation, storage
+from sunbottle.domain.electricity import (
+    buysell,
+    consumption,
+    generation,
+    packing,
+    queries,
+    retention,
+    storage,
+)
+from sunbottle.domain.scrape import operations as scrape_ops
+from sunbottle.domain.scrape import series as scrape_series
+
+# How far back from its newest reading a battery's head reaches. Comfortably more than the delay before a level is
+# trusted, see queries.get_charge_for_battery.
+BATTERY_HEAD_WINDOW = datetime.timedelta(hours=2)
+
+
+@dataclass
+class IngestResult:
+    """
+    How many rows an ingest inserted, updated or left untouched.
+    """
+
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+
+    def __add__(self, other: IngestResult) -> IngestResult:
+        return IngestResult(
+            inserted=self.inserted + other.inserted,
+            updated=self.updated + other.updated,
+            unchanged=self.unchanged + other.unchanged,
+        )
+
+    @property
+    def written(self) -> int:
+        return self.inserted + self.updated
 
 
 @transaction.atomic
-def record_generation_readings(generator: models.Generator, readings: list[generation.GenerationReading]) -> None:
+def record_generation_readings(
+    generator: models.Generator, readings: list[generation.GenerationReading]
+) -> IngestResult:
     """
     Save a series of generation readings
     """
-    for reading in readings:
-        models.GenerationReading.objects.update_or_create(
-            generator=generator,
-            occurred_at=reading.occurred_at,
-            defaults={"kwh": reading.kwh},
-        )
+    return _bulk_upsert(
+        models.GenerationReading,
+        ((reading.occurred_at, reading.wh) for reading in readings),
+        value_field="wh",
+        scope={"generator": generator},
+        rollup=models.RollupMetric.GENERATION,
+        series=scrape_series.generation(generator),
+    )
 
 
 @transaction.atomic
-def record_storage_readings(battery: models.Battery, readings: list[storage.StorageReading]) -> None:
+def record_storage_readings(battery: models.Battery, readings: list[storage.StorageReading]) -> IngestResult:
     """
     Save a series of battery charge readings.
     """
-    for reading in readings:
-        models.BatteryLevelReading.objects.update_or_create(
-            battery=battery,
-            occurred_at=reading.occurred_at,
-            defaults={"charge_percent": reading.charge},
-        )
+    result = _bulk_upsert(
+        models.BatteryLevelReading,
+        ((reading.occurred_at, reading.charge) for reading in readings),
+        value_field="charge_percent",
+        scope={"battery": battery},
+        series=scrape_series.storage(battery),
+    )
+    if result.written:
+        update_battery_head(battery, readings)
+    return result
+
+
+def update_battery_head(battery: models.Battery, readings: list[storage.StorageReading]) -> None:
+    """
+    Merge the readings into the battery's head, keeping those within BATTERY_HEAD_WINDOW of the newest.
+    """
+    head, _ = models.BatteryLevelHead.objects.get_or_create(battery=battery)
+    field = models.BatteryLevelReading._meta.get_field("charge_percent")
+    recent = {datetime.datetime.fromisoformat(occurred_at): charge for occurred_at, charge in head.recent}
+    recent.update((reading.occurred_at, str(_normalize(field, reading.charge))) for reading in readings)
+    newest = max(recent)
+    head.recent = [
+        [occurred_at.isoformat(), charge]
+        for occurred_at, charge in sorted(recent.items())
+        if occurred_at > newest - BATTERY_HEAD_WINDOW
+    ]
+    head.save()
 
 
 @transaction.atomic
-def record_buy_sell_readings(readings: list[Union[buysell.BuyReading, buysell.SellReading]]) -> None:
+def record_buy_sell_readings(readings: list[Union[buysell.BuyReading, buysell.SellReading]]) -> IngestResult:
     """
     Save a series of battery charge readings.
     """
-    for reading in readings:
-        model = models.ElectricityPurchase if isinstance(reading, buysell.BuyReading) else models.ElectricitySale
-        model.objects.update_or_create(
-            occurred_at=reading.occurred_at,
-            defaults={"kwh": reading.kwh},
-        )
+    purchases = [reading for reading in readings if isinstance(reading, buysell.BuyReading)]
+    sales = [reading for reading in readings if not isinstance(reading, buysell.BuyReading)]
+    return _bulk_upsert(
+        models.ElectricityPurchase,
+        ((reading.occurred_at, reading.wh) for reading in purchases),
+        value_field="wh",
+        rollup=models.RollupMetric.PURCHASE,
+        series=scrape_series.PURCHASE,
+    ) + _bulk_upsert(
+        models.ElectricitySale,
+        ((reading.occurred_at, reading.wh) for reading in sales),
+        value_field="wh",
+        rollup=models.RollupMetric.SALE,
+        series=scrape_series.SALE,
+    )
 
 
 @transaction.atomic
-def record_consumption_readings(readings: list[consumption.ConsumptionReading]) -> None:
+def record_consumption_readings(readings: list[consumption.ConsumptionReading]) -> IngestResult:
     """
     Save a series of consumption readings.
     """
-    for reading in readings:
-        models.ConsumptionReading.objects.update_or_create(
-            occurred_at=reading.occurred_at, defaults={"kwh": reading.kwh}
+    return _bulk_upsert(
+        models.ConsumptionReading,
+        ((reading.occurred_at, reading.wh) for reading in readings),
+        value_field="wh",
+        rollup=models.RollupMetric.CONSUMPTION,
+        series=scrape_series.CONSUMPTION,
+    )
+
+
+def _bulk_upsert(
+    model: Type[django_models.Model],
+    values: Iterable[tuple[datetime.datetime, Any]],
+    value_field: str,
+    scope: dict[str, django_models.Model] | None = None,
+    rollup: Optional[models.RollupMetric] = None,
+    series: Optional[str] = None,
+) -> IngestResult:
+    """
+    Upsert a batch of (occurred_at, value) pairs in a handful of statements.
+
+    Existing rows are fetched once so unchanged readings can be skipped entirely, then everything new or
+    different is written with a single INSERT ... ON CONFLICT DO UPDATE on the model's unique key. The packed
+    DailySeries rows of the days that were written to, and then their rollups, are brought up to date.
+    """
+    scope = scope or {}
+    field = model._meta.get_field(value_field)
+    # Later values for the same interval win, just as they did with repeated update_or_create calls.
+    incoming = {occurred_at: _normalize(field, value) for occurred_at, value in values}
+    if not incoming:
+        return IngestResult()
+    if series:
+        _restore_packed_days(model, value_field, series, {occurred_at.date() for occurred_at in incoming}, scope)
+
+    existing = dict(
+        model.objects.filter(occurred_at__in=list(incoming), **scope).values_list("occurred_at", value_field)
+    )
+
+    result = IngestResult()
+    to_write = []
+    for occurred_at, value in incoming.items():
+        if occurred_at not in existing:
+            result.inserted += 1
+        elif _normalize(field, existing[occurred_at]) != value:
+            result.updated += 1
+        else:
+            result.unchanged += 1
+            continue
+        to_write.append(model(occurred_at=occurred_at, occurred_on=occurred_at.date(), **{value_field: value}, **scope))
+
+    if to_write:
+        model.objects.bulk_create(
+            to_write,
+            update_conflicts=True,
+            unique_fields=[*scope, "occurred_at"],
+            update_fields=[value_field, "updated_at"],
         )
+        dates = {reading.occurred_on for reading in to_write}
+        if series:
+            update_daily_series(series, model, value_field, dates, scope=scope)
+        if rollup:
+            update_rollups(rollup, dates)
+    return result
+
+
+def _restore_packed_days(
+    model: Type[django_models.Model],
+    value_field: str,
+    series: str,
+    dates: set[datetime.date],
+    scope: dict[str, django_models.Model],
+) -> None:
+    """
+    Write back the readings of the dates that only have their packed DailySeries row left, see retention, so that
+    writing to those dates starts from their whole day of readings.
+    """
+    field = model._meta.get_field(value_field)
+    packed = (
+        models.DailySeries.objects.filter(series=series, date__in=dates)
+        .exclude(date__in=model.objects.filter(occurred_on__in=dates, **scope).values("occurred_on"))
+        .values_list("date", "interval_minutes", "values", "present")
+    )
+    model.objects.bulk_create(
+        [
+            model(
+                occurred_at=_start_of_day(date) + datetime.timedelta(minutes=interval_minutes * index),
+                occurred_on=date,
+                **{value_field: packing.from_packed(field, value)},
+                **scope,
+            )
+            for date, interval_minutes, values, present in packed
+            for index, value in enumerate(packing.unpack(values, present))
+            if value is not None
+        ]
+    )
+
+
+def update_rollups(metric: models.RollupMetric, dates: Iterable[datetime.date]) -> None:
+    """
+    Recompute the hourly and daily rollups of the dates from their readings and the monthly rollups of their months.
+
+    Days are summed from their packed DailySeries rows, which hold every day still in the database and are all loaded
+    in one indexed query, and months from the daily rollups, so the work is proportional to the dates touched rather
+    than to the size of the table. Hours, days and months left without any readings have their rollups deleted.
+    """
+    dates = sorted(set(dates))
+    if not dates:
+        return
+
+    hourly: dict[datetime.datetime, int] = defaultdict(int)
+    for reading in queries.get_packed_readings(metric, date__in=dates):
+        hourly[reading.occurred_at.replace(minute=0, second=0, microsecond=0)] += reading.value
+
+    daily: dict[datetime.datetime, int] = defaultdict(int)
+    for hour, wh in hourly.items():
+        daily[_start_of_day(hour)] += wh
+
+    days = {_start_of_day(date) for date in dates}
+    months = {_start_of_month(date) for date in dates}
+    monthly: dict[datetime.datetime, int] = defaultdict(int)
+    # What the recomputed days used to total, so the lifetime total can be adjusted by the difference.
+    previous_wh = 0
+    month_days = models.Rollup.objects.filter(
+        metric=metric,
+        resolution=models.Resolution.DAY,
+        period_start__gte=min(months),
+        period_start__lt=max(months) + relativedelta(months=1),
+    ).values_list("period_start", "wh")
+    for day, wh in month_days:
+        if day in days:
+            previous_wh += wh
+        elif _start_of_month(day) in months:
+            monthly[_start_of_month(day)] += wh
+    for day, wh in daily.items():
+        monthly[_start_of_month(day)] += wh
+
+    models.Rollup.objects.filter(
+        django_models.Q(
+            resolution__in=[models.Resolution.HOUR, models.Resolution.DAY],
+            period_start__gte=min(days),
+            period_start__lt=max(days) + datetime.timedelta(days=1),
+            period_start__date__in=dates,
+        )
+        | django_models.Q(resolution=models.Resolution.MONTH, period_start__in=months),
+        metric=metric,
+    ).exclude(period_start__in=[*hourly, *daily, *monthly]).delete()
+    models.Rollup.objects.bulk_create(
+        [
+            models.Rollup(metric=metric, resolution=resolution, period_start=period_start, wh=wh)
+            for resolution, totals in [
+                (models.Resolution.HOUR, hourly),
+                (models.Resolution.DAY, daily),
+                (models.Resolution.MONTH, monthly),
+            ]
+            for period_start, wh in totals.items()
+        ],
+        update_conflicts=True,
+        unique_fields=["metric", "resolution", "period_start"],
+        update_fields=["wh", "updated_at"],
+    )
+    add_to_lifetime_total(metric, sum(daily.values()) - previous_wh)
+    invalidate_billing_period_snapshots(dates)
+
+
+def add_to_lifetime_total(metric: models.RollupMetric, wh: int) -> None:
+    """
+    Add wh, which is negative when readings were corrected down, to the metric's lifetime total.
+    """
+    if not wh:
+        return
+    updated = models.LifetimeTotal.objects.filter(metric=metric).update(
+        wh=django_models.F("wh") + wh, updated_at=datetime.datetime.now()
+    )
+    if not updated:
+        rebuild_lifetime_total(metric)
+
+
+def rebuild_lifetime_total(metric: models.RollupMetric) -> int:
+    """
+    Set the metric's lifetime total to the sum of its daily rollups, returning it.
+    """
+    wh = (
+        models.Rollup.objects.filter(metric=metric, resolution=models.Resolution.DAY).aggregate(
+            total=django_models.Sum("wh")
+        )["total"]
+        or 0
+    )
+    models.LifetimeTotal.objects.update_or_create(metric=metric, defaults={"wh": wh})
+    return wh
+
+
+@dataclass
+class Reconciliation:
+    """
+    A metric's lifetime total compared with the sum of its readings.
+    """
+
+    metric: str
+    recorded: int
+    actual: int
+
+    @property
+    def correct(self) -> bool:
+        return self.recorded == self.actual
+
+
+@transaction.atomic
+def reconcile_lifetime_total(metric: models.RollupMetric, repair: bool = True) -> Reconciliation:
+    """
+    Check the metric's lifetime total against its readings, including those archived by compact_readings, and
+    correct it if repair is set.
+
+    Each day is counted once, from the database if it's there and otherwise from the archive, see
+    queries.get_readings.
+    """
+    actual = sum(reading.value for reading in queries.get_readings(metric))
+    recorded = models.LifetimeTotal.objects.filter(metric=metric).values_list("wh", flat=True).first()
+    reconciliation = Reconciliation(metric=metric, recorded=recorded or 0, actual=actual)
+    if repair and (recorded is None or not reconciliation.correct):
+        models.LifetimeTotal.objects.update_or_create(metric=metric, defaults={"wh": actual})
+    return reconciliation
+
+
+def invalidate_billing_period_snapshots(dates: Iterable[datetime.date]) -> int:
+    """
+    Delete the snapshots of billing periods that include any of the dates, returning how many were deleted.
+    """
+    dates = sorted(set(dates))
+    if not dates:
+        return 0
+    deleted, _ = models.BillingPeriodSnapshot.objects.filter(start_on__lte=dates[-1], end_on__gte=dates[0]).delete()
+    return deleted
+
+
+@transaction.atomic
+def snapshot_billing_periods(today: Optional[datetime.date] = None) -> int:
+    """
+    Snapshot every closed billing period that has settled and has no up-to-date snapshot, returning how many were.
+
+    A period has settled once BILLING_SNAPSHOT_SETTLE_DAYS have passed since it ended, by which time its readings
+    are final. Snapshots priced with rates that have since changed are replaced.
+    """
+    settled_before = (today or datetime.date.today()) - datetime.timedelta(days=settings.BILLING_SNAPSHOT_SETTLE_DAYS)
+    snapshotted = queries.get_billing_period_snapshots()
+    periods = [
+        (period_start, period_end)
+        for period_start, period_end in queries.get_billing_period_ranges()
+        if period_end < settled_before and (period_start, period_end) not in snapshotted
+    ]
+    models.BillingPeriodSnapshot.objects.bulk_create(
+        [
+            models.BillingPeriodSnapshot(
+                start_on=period_start,
+                end_on=period_end,
+                stats=stats.to_json(),
+                rates=queries.get_billing_period_rates(period_start),
+            )
+            for (period_start, period_end), stats in zip(periods, queries.get_stats_for_billing_periods(periods))
+        ],
+        update_conflicts=True,
+        unique_fields=["start_on"],
+        update_fields=["end_on", "stats", "rates", "updated_at"],
+    )
+    return len(periods)
+
+
+@transaction.atomic
+def rebuild_rollups(metric: models.RollupMetric, chunk_days: int = 31) -> int:
+    """
+    Recompute the rollups of a metric from its packed DailySeries rows, returning the number of days rolled up.
+
+    Rollups from before the earliest DailySeries row are kept, as their readings have been archived by
+    compact_readings. The fingerprints and watermarks of dates with no readings left are dropped, so the next scrape of
+    them writes their readings again, e.g. after the series was cleared to be scraped afresh.
+    """
+    packed = models.DailySeries.objects.filter(**scrape_series.get_filter(metric))
+    scrape_ops.forget_series_without_readings(packed.values("date"), **scrape_series.get_filter(metric))
+    dates = list(packed.order_by("date").values_list("date", flat=True).distinct())
+    if not dates:
+        return 0
+    models.Rollup.objects.filter(
+        django_models.Q(resolution__in=[models.Resolution.HOUR, models.Resolution.DAY], period_start__gte=dates[0])
+        | django_models.Q(resolution=models.Resolution.MONTH, period_start__gte=_start_of_month(dates[0])),
+        metric=metric,
+    ).delete()
+    for start in range(0, len(dates), chunk_days):
+        update_rollups(metric, dates[start : start + chunk_days])
+    # The deleted days no longer count towards the total, so update_rollups counted them again.
+    rebuild_lifetime_total(metric)
+    return len(dates)
+
+
+@transaction.atomic
+def delete_readings(readings: django_models.QuerySet) -> int:
+    """
+    Delete readings, returning how many were, and repack the DailySeries rows of the dates they were on and update
+    their rollups, which also updates the lifetime total and drops the billing snapshots of those dates.
+
+    The fingerprints and watermarks of their series on those dates are dropped, so the next scrape of those dates
+    writes them again.
+    """
+    kind, source = next((kind, source) for kind, source in retention.SOURCES.items() if source.model is readings.model)
+    # The (generator or battery, date) pairs whose readings are deleted.
+    if source.scope_field:
+        days = set(readings.values_list(source.scope_field, "occurred_on").distinct())
+    else:
+        days = {(None, date) for date in readings.values_list("occurred_on", flat=True).distinct()}
+    deleted, _ = readings.delete()
+    for scope_id, scope_days in itertools.groupby(sorted(days), key=lambda day: day[0]):
+        update_daily_series(
+            scrape_series.for_kind(kind, scope_id),
+            source.model,
+            source.value_field,
+            [date for _, date in scope_days],
+            scope={source.scope_field: scope_id} if source.scope_field else {},
+        )
+    scrape_ops.forget_series({date for _, date in days}, **source.series_filter)
+    if source.rollup:
+        update_rollups(source.rollup, {date for _, date in days})
+    return deleted
+
+
+@transaction.atomic
+def save_reading(reading: django_models.Model) -> IngestResult:
+    """
+    Save a reading edited by hand the way scraped ones are recorded, so its DailySeries row, rollups, lifetime total
+    and billing snapshots follow the edit.
+
+    If the edit moved the reading to another time, generator or battery, the reading it was is deleted first.
+    """
+    model = type(reading)
+    if reading.pk is not None:
+        delete_readings(
+            model.objects.filter(pk=reading.pk).exclude(
+                occurred_at=reading.occurred_at,
+                **{
+                    field: getattr(reading, field)
+                    for field in ["generator_id", "battery_id"]
+                    if hasattr(reading, field)
+                },
+            )
+        )
+    if model is models.GenerationReading:
+        return record_generation_readings(
+            reading.generator, [generation.GenerationReading(occurred_at=reading.occurred_at, wh=reading.wh)]
+        )
+    if model is models.BatteryLevelReading:
+        return record_storage_readings(
+            reading.battery,
+            [storage.StorageReading(occurred_at=reading.occurred_at, charge=reading.charge_percent)],
+        )
+    if model is models.ElectricityPurchase:
+        return record_buy_sell_readings([buysell.BuyReading(occurred_at=reading.occurred_at, wh=reading.wh)])
+    if model is models.ElectricitySale:
+        return record_buy_sell_readings([buysell.SellReading(occurred_at=reading.occurred_at, wh=reading.wh)])
+    return record_consumption_readings([consumption.ConsumptionReading(occurred_at=reading.occurred_at, wh=reading.wh)])
+
+
+def update_daily_series(
+    series: str,
+    model: Type[django_models.Model],
+    value_field: str,
+    dates: Iterable[datetime.date],
+    scope: dict[str, Any] | None = None,
+) -> None:
+    """
+    Repack the DailySeries rows of a series on the dates from its readings, deleting those of dates with none.
+    """
+    scope = scope or {}
+    field = model._meta.get_field(value_field)
+    interval = scrape_series.get_interval(series)
+    days: dict[datetime.date, list[Optional[int]]] = {
+        date: [None] * (datetime.timedelta(days=1) // interval) for date in dates
+    }
+    if not days:
+        return
+
+    readings = model.objects.filter(occurred_on__in=list(days), **scope).values_list("occurred_at", value_field)
+    for occurred_at, value in readings:
+        days[occurred_at.date()][(occurred_at - _start_of_day(occurred_at)) // interval] = packing.to_packed(
+            field, value
+        )
+
+    empty = [date for date, values in days.items() if all(value is None for value in values)]
+    models.DailySeries.objects.filter(series=series, date__in=empty).delete()
+    packed = []
+    for date, values in days.items():
+        if date in empty:
+            continue
+        packed_values, present = packing.pack(values)
+        packed.append(
+            models.DailySeries(
+                series=series,
+                date=date,
+                interval_minutes=interval // datetime.timedelta(minutes=1),
+                values=packed_values,
+                present=present,
+            )
+        )
+    models.DailySeries.objects.bulk_create(
+        packed,
+        update_conflicts=True,
+        unique_fields=["series", "date"],
+        update_fields=["interval_minutes", "values", "present", "updated_at"],
+    )
+
+
+@transaction.atomic
+def rebuild_daily_series(chunk_days: int = 31) -> int:
+    """
+    Repack the DailySeries rows of every date that has readings, returning the number of rows written.
+
+    Rows of dates whose readings have been dropped by compact_readings are the only copy of those days, so they're
+    kept as they are.
+    """
+    sources = [
+        *[
+            (scrape_series.generation(generator), models.GenerationReading, "wh", {"generator": generator})
+            for generator in models.Generator.objects.all()
+        ],
+        *[
+            (scrape_series.storage(battery), models.BatteryLevelReading, "charge_percent", {"battery": battery})
+            for battery in models.Battery.objects.all()
+        ],
+        (scrape_series.PURCHASE, models.ElectricityPurchase, "wh", {}),
+        (scrape_series.SALE, models.ElectricitySale, "wh", {}),
+        (scrape_series.CONSUMPTION, models.ConsumptionReading, "wh", {}),
+    ]
+    written = 0
+    for series, model, value_field, scope in sources:
+        dates = list(
+            model.objects.filter(**scope).order_by("occurred_on").values_list("occurred_on", flat=True).distinct()
+        )
+        for start in range(0, len(dates), chunk_days):
+            update_daily_series(series, model, value_field, dates[start : start + chunk_days], scope=scope)
+        written += len(dates)
+    return written
+
+
+def _start_of_day(date: datetime.date) -> datetime.datetime:
+    return datetime.datetime(date.year, date.month, date.day)
+
+
+def _start_of_month(date: datetime.date) -> datetime.datetime:
+    return datetime.datetime(date.year, date.month, 1)
+
+
+def _normalize(field: django_models.Field, value: Any) -> Any:
+    """
+    Round a value to the precision the column stores so comparisons against existing rows are exact.
+    """
+    if value is None or not isinstance(field, django_models.DecimalField):
+        return value
+    return round(field.to_python(value), field.decimal_places)
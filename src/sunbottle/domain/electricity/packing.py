@@ -0,0 +1,45 @@
+"""
+Pack a day of interval values into a compact binary array and a presence bitmap, as stored by DailySeries.
+"""
+import decimal
+import struct
+from typing import Any, Optional
+
+from django.db import models
+
+
+def pack(values: list[Optional[int]]) -> tuple[bytes, bytes]:
+    """
+    Return the values as little-endian 32 bit integers and a bitmap of which ones aren't None.
+    """
+    present = bytearray((len(values) + 7) // 8)
+    for index, value in enumerate(values):
+        if value is not None:
+            present[index // 8] |= 1 << (index % 8)
+    return struct.pack(f"<{len(values)}i", *(value or 0 for value in values)), bytes(present)
+
+
+def unpack(values: bytes, present: bytes) -> list[Optional[int]]:
+    """
+    Reverse pack, with None for intervals that have no reading.
+    """
+    unpacked = struct.unpack(f"<{len(values) // 4}i", values)
+    return [value if present[index // 8] & (1 << (index % 8)) else None for index, value in enumerate(unpacked)]
+
+
+def to_packed(field: models.Field, value: Any) -> int:
+    """
+    Scale a value to the integer that's packed, e.g. a charge of 45.5% becomes 45500.
+    """
+    if isinstance(field, models.DecimalField):
+        return int(value.scaleb(field.decimal_places))
+    return value
+
+
+def from_packed(field: models.Field, value: int) -> Any:
+    """
+    Reverse to_packed.
+    """
+    if isinstance(field, models.DecimalField):
+        return decimal.Decimal(value).scaleb(-field.decimal_places)
+    return value
@@ -1,36 +1,137 @@
+import dataclasses
 import datetime
 import decimal
+import heapq
+import itertools
 from dataclasses import dataclass
-from typing import Iterable
+from typing import Any, Iterable, Iterator, Optional
 
-import qsstats
 from dateutil import rrule
 from dateutil.relativedelta import relativedelta
 from django.conf import settings
-from django.db import models
-from django.db.models import Sum
+from django.db.models import OuterRef, Subquery
 
 from sunbottle.data.electricity import models as electricity_models
+from sunbottle.domain.electricity import archive, packing, rates, time_of_use
+from sunbottle.domain.scrape import series as scrape_series
 
+# DailySeries rows are read this many at a time.
+PACKED_CHUNK_SIZE = 500
 
-def get_total_generation() -> decimal.Decimal:
-    return electricity_models.GenerationReading.objects.all().aggregate(total=models.Sum("kwh"))[
-        "total"
-    ] or decimal.Decimal("0.0")
+
+def get_total_generation() -> int:
+    """
+    Return the Wh generated since installation.
+    """
+    return get_lifetime_total(electricity_models.RollupMetric.GENERATION)
+
+
+def get_lifetime_total(metric: electricity_models.RollupMetric) -> int:
+    """
+    Return the Wh of the metric since installation from its lifetime total.
+    """
+    return electricity_models.LifetimeTotal.objects.filter(metric=metric).values_list("wh", flat=True).first() or 0
 
 
-def get_generation_for_date(date: datetime.date) -> decimal.Decimal:
-    return electricity_models.GenerationReading.objects.filter(occurred_at__date=date).aggregate(
-        total=models.Sum("kwh")
-    )["total"] or decimal.Decimal("0.0")
+def get_generation_for_date(date: datetime.date) -> int:
+    return _get_total_for_date(electricity_models.RollupMetric.GENERATION, date)
 
 
-def get_generation_series_for_date(date: datetime.date, exclude_future: bool = False) -> list[decimal.Decimal]:
-    qs = electricity_models.GenerationReading.objects.filter(occurred_at__date=date).order_by("occurred_at")
-    if exclude_future:
-        now = datetime.datetime.now()
-        qs = qs.exclude(occurred_at__gt=now)
-    return qs.values_list("kwh", flat=True)
+def get_generation_series_for_date(
+    date: datetime.date, exclude_future: bool = False, include_archived: bool = False
+) -> list[int]:
+    """
+    Return the Wh generated in each interval of the date that has a reading, summed across generators.
+
+    Each generator's day is a single packed DailySeries row. Days whose readings have been compacted out of the
+    database are read from the archive if include_archived is set.
+    """
+    start = datetime.datetime(date.year, date.month, date.day)
+    now = datetime.datetime.now()
+    days = [
+        (interval_minutes, packing.unpack(values, present))
+        for interval_minutes, values, present in electricity_models.DailySeries.objects.filter(
+            series__startswith=f"{scrape_series.GENERATION}:", date=start.date()
+        ).values_list("interval_minutes", "values", "present")
+    ]
+    if not days and include_archived:
+        days = _get_archived_days(scrape_series.GENERATION, start.date())
+
+    totals: list[Optional[int]] = []
+    for interval_minutes, values in days:
+        if not totals:
+            totals = [None] * len(values)
+        for index, value in enumerate(values):
+            if value is None:
+                continue
+            if exclude_future and start + datetime.timedelta(minutes=interval_minutes * index) > now:
+                continue
+            totals[index] = (totals[index] or 0) + value
+    return [total for total in totals if total is not None]
+
+
+def get_packed_readings(kind: str, **date_filter: Any) -> Iterator[archive.ArchivedReading]:
+    """
+    Return the readings of a kind packed into the DailySeries rows on the dates matching date_filter, e.g.
+    date__in=dates, ordered by when they occurred and then by generator or battery.
+
+    DailySeries is where every day in the database is kept, readings tables only hold the days since
+    RETENTION_ROW_DAYS. Values are as packed, see packing.to_packed, and rows are read a chunk at a time so long
+    ranges don't need to fit in memory.
+    """
+    rows = (
+        electricity_models.DailySeries.objects.filter(**scrape_series.get_filter(kind), **date_filter)
+        .order_by("date", "series")
+        .values_list("series", "date", "interval_minutes", "values", "present")
+    )
+    # Pin the database now, so readings consumed after a read_only() block still come from where it routed to.
+    return _unpack_days(rows.using(rows.db).iterator(chunk_size=PACKED_CHUNK_SIZE))
+
+
+def get_readings(
+    kind: str, start: Optional[datetime.date] = None, end: Optional[datetime.date] = None
+) -> Iterator[archive.ArchivedReading]:
+    """
+    Return the readings of a kind between start and the exclusive end, either of which may be left open, ordered by
+    when they occurred and then by generator or battery.
+
+    Days compact_readings moved out of the database are read from the archive a month at a time. A day written again
+    after it was archived is in the database too, and only that copy is returned, as its rollups are summed from it.
+    Values are as packed and the queries are made straight away, see get_packed_readings.
+    """
+    date_filter = {
+        **({"date__gte": start} if start else {}),
+        **({"date__lt": end} if end else {}),
+    }
+    months = [
+        month
+        for month in archive.get_months(kind)
+        if (end is None or month < end) and (start is None or month + relativedelta(months=1) > start)
+    ]
+    in_database = (
+        set(
+            electricity_models.DailySeries.objects.filter(**scrape_series.get_filter(kind), **date_filter)
+            .values_list("date", flat=True)
+            .distinct()
+        )
+        if months
+        else set()
+    )
+    archived = (
+        reading
+        for month in months
+        for reading in sorted(
+            archive.read_month(kind, month), key=lambda reading: (reading.occurred_at, reading.scope_id)
+        )
+        if (start is None or start <= reading.occurred_at.date())
+        and (end is None or reading.occurred_at.date() < end)
+        and reading.occurred_at.date() not in in_database
+    )
+    return heapq.merge(
+        archived,
+        get_packed_readings(kind, **date_filter),
+        key=lambda reading: (reading.occurred_at, reading.scope_id),
+    )
 
 
 def get_generators() -> list[electricity_models.Generator]:
@@ -42,49 +143,96 @@ def get_batteries() -> list[electricity_models.Battery]:
 
 
 def get_charge_for_battery(battery: electricity_models.Battery) -> decimal.Decimal:
-    # There's a 15+ minute delay sometimes before the reading is live, so look 30 minutes into the
-    # the past to prevent 0 readings from occurring often.
-    half_hour_ago = datetime.datetime.now() - datetime.timedelta(minutes=31)
-    return battery.level_readings.filter(occurred_at__lt=half_hour_ago).values_list(
+    settled_before = _get_settled_before()
+    charge = _get_head_charge(battery, settled_before)
+    if charge is not None:
+        return charge
+    # The head only reaches back a couple of hours, so fall back to the (battery, occurred_at) index.
+    return battery.level_readings.filter(occurred_at__lt=settled_before).values_list(
         "charge_percent", flat=True
     ).order_by("occurred_at").last() or decimal.Decimal("0.0")
 
 
-def get_purchasing_for_date(date: datetime.datetime) -> decimal.Decimal:
-    return electricity_models.ElectricityPurchase.objects.filter(occurred_at__date=date).aggregate(
-        total=models.Sum("kwh")
-    )["total"] or decimal.Decimal("0.0")
+def get_batteries_with_charge() -> list[tuple[electricity_models.Battery, decimal.Decimal]]:
+    """
+    Return every battery and its current charge, fetched along with the battery heads in a single query.
+
+    Batteries whose head has no settled reading, because none were scraped in the last couple of hours, have their
+    latest settled reading fetched together in one more query.
+    """
+    settled_before = _get_settled_before()
+    batteries = list(electricity_models.Battery.objects.select_related("level_head"))
+    charges = {battery.pk: _get_head_charge(battery, settled_before) for battery in batteries}
+    unsettled = [pk for pk, charge in charges.items() if charge is None]
+    if unsettled:
+        latest = (
+            electricity_models.BatteryLevelReading.objects.filter(
+                battery=OuterRef("pk"), occurred_at__lt=settled_before
+            )
+            .order_by("-occurred_at")
+            .values("charge_percent")[:1]
+        )
+        charges.update(
+            electricity_models.Battery.objects.filter(pk__in=unsettled)
+            .annotate(charge=Subquery(latest))
+            .values_list("pk", "charge")
+        )
+    return [(battery, charges[battery.pk] or decimal.Decimal("0.0")) for battery in batteries]
+
+
+def get_purchasing_for_date(date: datetime.datetime) -> int:
+    return _get_total_for_date(electricity_models.RollupMetric.PURCHASE, date)
 
 
-def get_selling_for_date(date: datetime.datetime) -> decimal.Decimal:
-    return electricity_models.ElectricitySale.objects.filter(occurred_at__date=date).aggregate(total=models.Sum("kwh"))[
-        "total"
-    ] or decimal.Decimal("0.0")
+def get_selling_for_date(date: datetime.datetime) -> int:
+    return _get_total_for_date(electricity_models.RollupMetric.SALE, date)
 
 
-def get_coffee_cups_per_kwh(kwh: decimal.Decimal | None) -> decimal.Decimal:
-    kwh = kwh or get_total_generation()
+def get_coffee_cups_for_wh(wh: int | None) -> decimal.Decimal:
+    wh = get_total_generation() if wh is None else wh
     watt_hour_per_cup = decimal.Decimal("20.667")
-    return kwh_to_wh(kwh) / watt_hour_per_cup
+    return wh / watt_hour_per_cup
 
 
-def get_tesla_km_for_kwh(kwh: decimal.Decimal | None) -> decimal.Decimal:
+def get_tesla_km_for_wh(wh: int | None) -> decimal.Decimal:
     """
-    Return the distance in km a Tesla Model 3 can be driven for the given kWh.
+    Return the distance in km a Tesla Model 3 can be driven for the given Wh.
     """
-    kwh = kwh or get_total_generation()
+    wh = get_total_generation() if wh is None else wh
     combined_mild_weather_wh_per_km = decimal.Decimal("129.0")
-    return kwh_to_wh(kwh) / combined_mild_weather_wh_per_km
+    return wh / combined_mild_weather_wh_per_km
+
 
+def wh_to_kwh(wh: int) -> decimal.Decimal:
+    """
+    Convert whole Wh to kWh for display.
+    """
+    return decimal.Decimal(wh).scaleb(-3)
 
-def kwh_to_wh(kwh: decimal.Decimal) -> decimal.Decimal:
-    return kwh * 1000
 
+def get_consumption_for_date(date: datetime.date) -> int:
+    return _get_total_for_date(electricity_models.RollupMetric.CONSUMPTION, date)
+
+
+def get_daily_totals(
+    start_at: datetime.datetime,
+    end_at: datetime.datetime | None = None,
+    metrics: Iterable[electricity_models.RollupMetric] = tuple(electricity_models.RollupMetric),
+) -> dict[str, dict[datetime.datetime, int]]:
+    """
+    Return the Wh of each day from start_at until end_at that has readings, by metric and keyed by the start of the day.
 
-def get_consumption_for_date(date: datetime.date) -> decimal.Decimal:
-    return electricity_models.ConsumptionReading.objects.filter(occurred_at__date=date).aggregate(
-        total=models.Sum("kwh")
-    )["total"] or decimal.Decimal("0.0")
+    Every metric is fetched in the same query.
+    """
+    totals: dict[str, dict[datetime.datetime, int]] = {metric: {} for metric in metrics}
+    rollups = electricity_models.Rollup.objects.filter(
+        metric__in=list(totals), resolution=electricity_models.Resolution.DAY, period_start__gte=start_at
+    )
+    if end_at:
+        rollups = rollups.filter(period_start__lte=end_at)
+    for metric, day, wh in rollups.values_list("metric", "period_start", "wh"):
+        totals[metric][day] = wh
+    return totals
 
 
 @dataclass
@@ -105,42 +253,59 @@ class BillingPeriodStats:
 
     daily_data: dict
 
+    def to_json(self) -> dict:
+        """
+        Return the stats as JSON with every Decimal as a string, so they survive the round trip exactly.
+        """
+        data = {}
+        for field in dataclasses.fields(self):
+            value = getattr(self, field.name)
+            if field.name == "daily_data":
+                data[field.name] = {
+                    day.isoformat(): {name: str(kwh) for name, kwh in row.items()} for day, row in value.items()
+                }
+            elif isinstance(value, datetime.datetime):
+                data[field.name] = value.isoformat()
+            else:
+                data[field.name] = str(value)
+        return data
+
+    @classmethod
+    def from_json(cls, data: dict) -> "BillingPeriodStats":
+        values = {}
+        for field in dataclasses.fields(cls):
+            value = data[field.name]
+            if field.name == "daily_data":
+                values[field.name] = {
+                    datetime.datetime.fromisoformat(day): {name: decimal.Decimal(kwh) for name, kwh in row.items()}
+                    for day, row in value.items()
+                }
+            elif field.name in ("start_at", "end_at"):
+                values[field.name] = datetime.datetime.fromisoformat(value)
+            else:
+                values[field.name] = decimal.Decimal(value)
+        return cls(**values)
+
 
 def get_fuel_adjustment_charge(date: datetime.date) -> decimal.Decimal:
     """
-    Return the fuel adjustment cost for a given period.
-
-    If not found, return the last fuel adjustment charge before the given date.
+    Return the fuel adjustment charge of the billing period starting on date.
     """
-    try:
-        return settings.FUEL_ADJUSTMENT_CHARGES[date]
-    except KeyError:
-        last_adjustment_charge = _get_date_before_date(date, settings.FUEL_ADJUSTMENT_CHARGES.keys())
-        return settings.FUEL_ADJUSTMENT_CHARGES[last_adjustment_charge]
+    return rates.get_rates(date).fuel_adjustment
 
 
 def get_renewable_charge(date: datetime.date) -> decimal.Decimal:
     """
-    Return the renewable charge for a given period.
-
-    If not found, return the last renewable charge before the given date.
+    Return the renewable charge of the billing period starting on date.
     """
-    try:
-        return settings.RENEWABLE_ENERGY_CHARGES[date]
-    except KeyError:
-        last_renewable_charge = _get_date_before_date(date, settings.RENEWABLE_ENERGY_CHARGES.keys())
-        return settings.RENEWABLE_ENERGY_CHARGES[last_renewable_charge]
+    return rates.get_rates(date).renewable
 
 
-def get_tariff_for_date(date: datetime.date) -> dict[tuple[int, int | None]]:
+def get_tariff_for_date(date: datetime.date) -> dict[tuple[int, int | None], decimal.Decimal]:
     """
     Return the tariff that should be used to calculate kWh costs for a given period.
     """
-    try:
-        return settings.AGREEMENTS[date]
-    except KeyError:
-        last_agreement_date = _get_date_before_date(date, settings.AGREEMENTS.keys())
-        return settings.AGREEMENTS[last_agreement_date]
+    return dict(rates.get_rates(date).tariff)
 
 
 def get_billing_period_ranges(start_at: datetime.date | None = None) -> Iterable[tuple[datetime.date, datetime.date]]:
@@ -161,33 +326,21 @@ def get_base_cost(billing_period_start: datetime.date, kwh: decimal.Decimal) ->
     """
     Return the base cost of the electricity for the total amount of kWh according to the agreement for that time.
     """
-    tariff = get_tariff_for_date(billing_period_start)
-    total_cost = decimal.Decimal("0.0")
-    total_kwh = kwh
-    for (tier_min, tier_max), price_per_kwh in reversed(tariff.items()):
-        if tier_min > total_kwh:
-            # Didn't use enough to reach this tier, skip calculations
-            continue
-        tier_max_kwh = tier_max if tier_max else total_kwh
-        # Ensure we use the lesser amount if usage is lower than the max of the first tier
-        if tier_min == 0 and total_kwh < tier_max_kwh:
-            tier_kwh = total_kwh
-        else:
-            tier_kwh = int(tier_max_kwh) - tier_min
-        tier_cost = tier_kwh * price_per_kwh
-        total_cost += tier_cost
-    return total_cost
+    return _get_tariff_cost(rates.get_rates(billing_period_start).tariff, kwh)
 
 
-def get_total_cost(billing_period_start_date: datetime.date, kwh: decimal.Decimal) -> decimal.Decimal:
+def get_total_cost(
+    billing_period_start_date: datetime.date, kwh: decimal.Decimal, base_cost: decimal.Decimal | None = None
+) -> decimal.Decimal:
     """
     Get the fully loaded cost for the given kWh amount.
+
+    base_cost is the cost of the kWh before charges when it's already known, e.g. from a time of use tariff.
     """
-    fuel_adjustment_cost = get_fuel_adjustment_charge(billing_period_start_date)
-    renewable_cost = get_renewable_charge(billing_period_start_date)
-    total_fuel_cost = fuel_adjustment_cost * kwh
-    total_renewable_cost = renewable_cost * kwh
-    return sum([get_base_cost(billing_period_start_date, kwh), (fuel_adjustment_cost * kwh), (renewable_cost * kwh)])
+    period_rates = rates.get_rates(billing_period_start_date)
+    if base_cost is None:
+        base_cost = _get_tariff_cost(period_rates.tariff, kwh)
+    return base_cost + period_rates.fuel_adjustment * kwh + period_rates.renewable * kwh
 
 
 def get_sold_price(kwh: decimal.Decimal) -> decimal.Decimal:
@@ -195,52 +348,120 @@ def get_sold_price(kwh: decimal.Decimal) -> decimal.Decimal:
 
 
 def get_billing_period_stats() -> list[BillingPeriodStats]:
-    generation = electricity_models.GenerationReading.objects.all()
-    consumption = electricity_models.ConsumptionReading.objects.all()
-    buying = electricity_models.ElectricityPurchase.objects.all()
-    selling = electricity_models.ElectricitySale.objects.all()
-
-    generation_stats = qsstats.QuerySetStats(generation, date_field="occurred_at", aggregate=Sum("kwh"))
-    consumption_stats = qsstats.QuerySetStats(consumption, date_field="occurred_at", aggregate=Sum("kwh"))
-    buying_stats = qsstats.QuerySetStats(buying, date_field="occurred_at", aggregate=Sum("kwh"))
-    selling_stats = qsstats.QuerySetStats(selling, date_field="occurred_at", aggregate=Sum("kwh"))
+    """
+    Return the stats of every billing period so far.
+
+    Closed periods with an up-to-date snapshot are read from it and only the rest are computed from the rollups.
+    """
+    periods = list(get_billing_period_ranges())
+    snapshots = get_billing_period_snapshots()
+    computed = iter(get_stats_for_billing_periods([period for period in periods if period not in snapshots]))
+    return [snapshots[period] if period in snapshots else next(computed) for period in periods]
+
+
+def get_billing_period_snapshots() -> dict[tuple[datetime.date, datetime.date], BillingPeriodStats]:
+    """
+    Return the stats of each snapshotted billing period, by (start, end), skipping those priced with outdated rates.
+    """
+    return {
+        (snapshot.start_on, snapshot.end_on): BillingPeriodStats.from_json(snapshot.stats)
+        for snapshot in electricity_models.BillingPeriodSnapshot.objects.all()
+        if snapshot.rates == get_billing_period_rates(snapshot.start_on)
+    }
+
+
+def get_billing_period_rates(period_start: datetime.date) -> dict:
+    """
+    Return the charges and tariff a billing period is priced with, as JSON.
+    """
+    period_rates = rates.get_rates(period_start)
+    data = {
+        "fuel_adjustment": str(period_rates.fuel_adjustment),
+        "renewable": str(period_rates.renewable),
+        "tariff": [[tier_min, tier_max, str(price)] for (tier_min, tier_max), price in period_rates.tariff],
+        "fit": str(settings.FIT),
+    }
+    if period_rates.bands:
+        period_end = period_start + relativedelta(months=1)
+        data["bands"] = [
+            [band.days, band.start_month, band.end_month, band.start_hour, band.end_hour, str(band.yen_per_kwh)]
+            for band in period_rates.bands
+        ]
+        data["holidays"] = [
+            holiday.isoformat() for holiday in rates.get_rate_table().holidays if period_start <= holiday < period_end
+        ]
+    return data
+
+
+def get_stats_for_billing_periods(periods: list[tuple[datetime.date, datetime.date]]) -> list[BillingPeriodStats]:
+    """
+    Compute the stats of the billing periods from the daily rollups.
+
+    The daily totals of all the periods are fetched in one query and divided between them in memory, so the number of
+    queries doesn't grow with the number of periods.
+    """
+    if not periods:
+        return []
+    first, last = periods[0][0], periods[-1][1]
+    daily_totals = get_daily_totals(
+        datetime.datetime(first.year, first.month, first.day), datetime.datetime(last.year, last.month, last.day)
+    )
+    band_costs = time_of_use.get_costs(periods, time_of_use.METRICS)
     billing_periods: list[BillingPeriodStats] = []
-    for period_start, period_end in get_billing_period_ranges():
+    for index, (period_start, period_end) in enumerate(periods):
 
         start_at = datetime.datetime(period_start.year, period_start.month, period_start.day)
         end_at = datetime.datetime(period_end.year, period_end.month, period_end.day, hour=23, minute=59, second=59)
-
-        generation_for_period: dict[datetime.date, decimal.Decimal] = dict(
-            generation_stats.time_series(start_at, end_at)
-        )
-        consumption_for_period: dict[datetime.date, decimal.Decimal] = dict(
-            consumption_stats.time_series(start_at, end_at)
+        days = list(rrule.rrule(rrule.DAILY, start_at, until=end_at))
+
+        generation_for_period, consumption_for_period, bought_for_period, sold_for_period = (
+            {day: daily_totals[metric][day] for day in days if day in daily_totals[metric]}
+            for metric in [
+                electricity_models.RollupMetric.GENERATION,
+                electricity_models.RollupMetric.CONSUMPTION,
+                electricity_models.RollupMetric.PURCHASE,
+                electricity_models.RollupMetric.SALE,
+            ]
         )
-        bought_for_period: dict[datetime.date, decimal.Decimal] = dict(buying_stats.time_series(start_at, end_at))
-        sold_for_period: dict[datetime.date, decimal.Decimal] = dict(selling_stats.time_series(start_at, end_at))
 
-        total_generation = sum(generation_for_period.values()) or decimal.Decimal("0.00")
-        total_sold = sum(sold_for_period.values()) or decimal.Decimal("0.00")
+        # Totals are summed as whole Wh and only converted to kWh for pricing and display.
+        total_generation = wh_to_kwh(sum(generation_for_period.values()))
+        total_sold = wh_to_kwh(sum(sold_for_period.values()))
 
         # Costing
 
-        total_consumption = sum(consumption_for_period.values()) or decimal.Decimal("0.00")
-        total_cost = get_total_cost(period_start, total_consumption)
+        # Periods priced by time of use take the cost before charges from their hours.
+        time_of_use_priced = bool(rates.get_rates(period_start).bands)
 
-        total_bought = sum(bought_for_period.values()) or decimal.Decimal("0.00")
-        actual_cost = get_total_cost(period_start, total_bought)
+        total_consumption = wh_to_kwh(sum(consumption_for_period.values()))
+        total_cost = get_total_cost(
+            period_start,
+            total_consumption,
+            time_of_use.to_yen(band_costs[electricity_models.RollupMetric.CONSUMPTION][index])
+            if time_of_use_priced
+            else None,
+        )
+
+        total_bought = wh_to_kwh(sum(bought_for_period.values()))
+        actual_cost = get_total_cost(
+            period_start,
+            total_bought,
+            time_of_use.to_yen(band_costs[electricity_models.RollupMetric.PURCHASE][index])
+            if time_of_use_priced
+            else None,
+        )
         sold_price = get_sold_price(total_sold)
 
         generation_savings = decimal.getcontext().subtract(total_cost, actual_cost)
         total_savings = generation_savings + sold_price
 
         rows = dict()
-        for date in rrule.rrule(rrule.DAILY, start_at, until=end_at):
+        for date in days:
             rows[date] = dict(
-                generation=decimal.Decimal(generation_for_period.get(date, "0")),
-                consumption=decimal.Decimal(consumption_for_period.get(date, "0")),
-                bought=decimal.Decimal(bought_for_period.get(date, "0")),
-                sold=decimal.Decimal(sold_for_period.get(date, "0")),
+                generation=wh_to_kwh(generation_for_period.get(date, 0)),
+                consumption=wh_to_kwh(consumption_for_period.get(date, 0)),
+                bought=wh_to_kwh(bought_for_period.get(date, 0)),
+                sold=wh_to_kwh(sold_for_period.get(date, 0)),
             )
 
         billing_periods.append(
@@ -261,5 +482,83 @@ def get_billing_period_stats() -> list[BillingPeriodStats]:
     return billing_periods
 
 
-def _get_date_before_date(target_date: datetime.date, dates: Iterable[datetime.date]) -> datetime.date:
-    return sorted(filter(lambda start_date: start_date <= target_date, dates))[-1]
+def _get_total_for_date(metric: electricity_models.RollupMetric, date: datetime.date) -> int:
+    day = datetime.datetime(date.year, date.month, date.day)
+    return (
+        electricity_models.Rollup.objects.filter(
+            metric=metric, resolution=electricity_models.Resolution.DAY, period_start=day
+        )
+        .values_list("wh", flat=True)
+        .first()
+        or 0
+    )
+
+
+def _get_tariff_cost(tariff: tuple[rates.Tier, ...], kwh: decimal.Decimal) -> decimal.Decimal:
+    total_cost = decimal.Decimal("0.0")
+    total_kwh = kwh
+    for (tier_min, tier_max), price_per_kwh in reversed(tariff):
+        if tier_min > total_kwh:
+            # Didn't use enough to reach this tier, skip calculations
+            continue
+        tier_max_kwh = tier_max if tier_max else total_kwh
+        # Ensure we use the lesser amount if usage is lower than the max of the first tier
+        if tier_min == 0 and total_kwh < tier_max_kwh:
+            tier_kwh = total_kwh
+        else:
+            tier_kwh = int(tier_max_kwh) - tier_min
+        tier_cost = tier_kwh * price_per_kwh
+        total_cost += tier_cost
+    return total_cost
+
+
+def _unpack_days(rows: Iterable[tuple[str, datetime.date, int, bytes, bytes]]) -> Iterator[archive.ArchivedReading]:
+    for date, day_rows in itertools.groupby(rows, key=lambda row: row[1]):
+        start = datetime.datetime(date.year, date.month, date.day)
+        readings = [
+            archive.ArchivedReading(
+                scope_id=int(series.partition(":")[2] or 0),
+                occurred_at=start + datetime.timedelta(minutes=interval_minutes * index),
+                value=value,
+            )
+            for series, _, interval_minutes, values, present in day_rows
+            for index, value in enumerate(packing.unpack(values, present))
+            if value is not None
+        ]
+        yield from sorted(readings, key=lambda reading: (reading.occurred_at, reading.scope_id))
+
+
+def _get_archived_days(kind: str, date: datetime.date) -> list[tuple[int, list[Optional[int]]]]:
+    """
+    Return each generator or battery's archived day of the kind, in the same shape as unpacked DailySeries rows.
+    """
+    interval = scrape_series.get_interval(kind)
+    interval_minutes = interval // datetime.timedelta(minutes=1)
+    start = datetime.datetime(date.year, date.month, date.day)
+    days: dict[int, list[Optional[int]]] = {}
+    for reading in archive.read_day(kind, date):
+        values = days.setdefault(reading.scope_id, [None] * (datetime.timedelta(days=1) // interval))
+        values[(reading.occurred_at - start) // interval] = reading.value
+    return [(interval_minutes, values) for values in days.values()]
+
+
+def _get_settled_before() -> datetime.datetime:
+    # There's a 15+ minute delay sometimes before the reading is live, so look 30 minutes into the
+    # the past to prevent 0 readings from occurring often.
+    return datetime.datetime.now() - datetime.timedelta(minutes=31)
+
+
+def _get_head_charge(
+    battery: electricity_models.Battery, settled_before: datetime.datetime
+) -> Optional[decimal.Decimal]:
+    """
+    Return the battery's latest charge in its head from before settled_before, or None if there isn't one.
+    """
+    try:
+        recent = battery.level_head.recent
+    except electricity_models.BatteryLevelHead.DoesNotExist:
+        recent = []
+    settled = [
+        charge for occurred_at, charge in recent if datetime.datetime.fromisoformat(occurred_at) < settled_before
+    ]
+    return decimal.Decimal(settled[-1]) if settled else None
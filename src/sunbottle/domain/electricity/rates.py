@@ -0,0 +1,169 @@
+"""
+Effective-dated tariffs and charges, compiled along with the holidays into a sorted table that is searched with bisect.
+
+The table is cached per process for RATES_CACHE_SECONDS. Saving or deleting a rate drops the cache of the process that
+changed it straight away, along with the snapshots of the billing periods it applies to.
+"""
+from __future__ import annotations
+
+import bisect
+import datetime
+import decimal
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from django.conf import settings
+from django.db.models import Prefetch, signals
+from django.dispatch import receiver
+
+from sunbottle.data.electricity import models
+
+Tier = tuple[tuple[int, Optional[int]], decimal.Decimal]
+
+
+class RateNotFound(Exception):
+    """
+    Raised when no tariff or charge was in effect on a date.
+    """
+
+
+@dataclass(frozen=True)
+class Band:
+    """
+    A time of use band, see models.TariffBand.
+    """
+
+    days: str
+    start_month: int
+    end_month: int
+    start_hour: int
+    end_hour: int
+    yen_per_kwh: decimal.Decimal
+
+
+@dataclass(frozen=True)
+class Rates:
+    """
+    Every rate in effect for a billing period.
+    """
+
+    fuel_adjustment: decimal.Decimal
+    renewable: decimal.Decimal
+    # ((min kWh, max kWh), price per kWh) in ascending order.
+    tariff: tuple[Tier, ...]
+    # In order of precedence. When there are any they price the kWh instead of the tiers.
+    bands: tuple[Band, ...] = ()
+
+
+@dataclass(frozen=True)
+class RateTable:
+    """
+    The rates in effect from each date any of them changed, in date order.
+    """
+
+    starts: tuple[datetime.date, ...]
+    rates: tuple[Rates, ...]
+    holidays: tuple[datetime.date, ...] = ()
+
+    def get(self, date: datetime.date) -> Rates:
+        index = bisect.bisect_right(self.starts, date) - 1
+        if index < 0:
+            raise RateNotFound(f"No tariff and charges in effect on {date}")
+        return self.rates[index]
+
+
+def get_rates(date: datetime.date) -> Rates:
+    """
+    Return the rates of the billing period starting on date.
+    """
+    return get_rate_table().get(date)
+
+
+_table: Optional[RateTable] = None
+_compiled_at = 0.0
+_table_lock = threading.Lock()
+
+
+def get_rate_table() -> RateTable:
+    """
+    Return the process wide rate table, compiling it if it's missing or older than RATES_CACHE_SECONDS.
+    """
+    global _table, _compiled_at
+    with _table_lock:
+        if _table is None or time.monotonic() - _compiled_at > settings.RATES_CACHE_SECONDS:
+            _table = compile_rate_table()
+            _compiled_at = time.monotonic()
+        return _table
+
+
+def clear_cache() -> None:
+    global _table
+    with _table_lock:
+        _table = None
+
+
+def compile_rate_table() -> RateTable:
+    """
+    Build the rate table from the database.
+
+    Each date a tariff or charge took effect gets an entry with the latest of every rate as of that date. Dates before
+    all of them are in effect are left out.
+    """
+    changes: dict[datetime.date, dict[str, object]] = {}
+    for kind, effective_on, yen_per_kwh in models.Charge.objects.values_list("kind", "effective_on", "yen_per_kwh"):
+        changes.setdefault(effective_on, {})[kind] = yen_per_kwh
+    tariffs = models.Tariff.objects.prefetch_related(
+        Prefetch("tiers", queryset=models.TariffTier.objects.order_by("min_kwh")), "bands"
+    )
+    for tariff in tariffs:
+        changes.setdefault(tariff.effective_on, {})["tariff"] = (
+            tuple(((tier.min_kwh, tier.max_kwh), tier.yen_per_kwh) for tier in tariff.tiers.all()),
+            tuple(
+                Band(
+                    days=band.days,
+                    start_month=band.start_month,
+                    end_month=band.end_month,
+                    start_hour=band.start_hour,
+                    end_hour=band.end_hour,
+                    yen_per_kwh=band.yen_per_kwh,
+                )
+                for band in tariff.bands.all()
+            ),
+        )
+
+    starts: list[datetime.date] = []
+    rates: list[Rates] = []
+    current: dict[str, object] = {}
+    for date in sorted(changes):
+        current.update(changes[date])
+        if len(current) < 3:
+            continue
+        starts.append(date)
+        rates.append(
+            Rates(
+                fuel_adjustment=current[models.ChargeKind.FUEL_ADJUSTMENT],
+                renewable=current[models.ChargeKind.RENEWABLE_ENERGY],
+                tariff=current["tariff"][0],
+                bands=current["tariff"][1],
+            )
+        )
+    holidays = models.Holiday.objects.order_by("date").values_list("date", flat=True)
+    return RateTable(starts=tuple(starts), rates=tuple(rates), holidays=tuple(holidays))
+
+
+@receiver([signals.post_save, signals.post_delete], sender=models.Charge)
+@receiver([signals.post_save, signals.post_delete], sender=models.Tariff)
+@receiver([signals.post_save, signals.post_delete], sender=models.TariffTier)
+@receiver([signals.post_save, signals.post_delete], sender=models.TariffBand)
+def _rate_changed(sender, instance, **kwargs) -> None:
+    clear_cache()
+    effective_on = instance.effective_on if hasattr(instance, "effective_on") else instance.tariff.effective_on
+    models.BillingPeriodSnapshot.objects.filter(start_on__gte=effective_on).delete()
+
+
+@receiver([signals.post_save, signals.post_delete], sender=models.Holiday)
+def _holiday_changed(sender, instance, **kwargs) -> None:
+    clear_cache()
+    models.BillingPeriodSnapshot.objects.filter(start_on__lte=instance.date, end_on__gte=instance.date).delete()
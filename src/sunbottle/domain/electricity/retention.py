@@ -0,0 +1,180 @@
+"""
+Tiered retention for readings.
+
+Every day of readings is packed into a DailySeries row as it's recorded, which is where they're read from. Recent
+readings are also kept a row each, where they can be corrected and edited in the admin, until they're older than a
+kind's row_days and only their DailySeries rows are left. Once older than raw_days those are moved to columnar files
+(see archive), leaving the hourly, daily and monthly rollups. Hourly rollups older than hourly_days are then dropped
+too, leaving days and months, except for those time_of_use prices. Policies are set per kind in
+settings.RETENTION_POLICIES.
+"""
+from __future__ import annotations
+
+import datetime
+import itertools
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional, Type
+
+from django.conf import settings
+from django.db import connection
+from django.db import models as django_models
+from django.db import transaction
+
+from sunbottle.data.electricity import models
+from sunbottle.domain.electricity import archive, queries, time_of_use
+from sunbottle.domain.scrape import operations as scrape_ops
+from sunbottle.domain.scrape import series as scrape_series
+
+
+@dataclass(frozen=True)
+class Source:
+    model: Type[django_models.Model]
+    value_field: str
+    # The generator or battery the readings belong to, if the kind has more than one series.
+    scope_field: Optional[str]
+    rollup: Optional[models.RollupMetric]
+    series_filter: dict[str, str]
+
+
+SOURCES: dict[str, Source] = {
+    scrape_series.GENERATION: Source(
+        model=models.GenerationReading,
+        value_field="wh",
+        scope_field="generator_id",
+        rollup=models.RollupMetric.GENERATION,
+        series_filter=scrape_series.get_filter(scrape_series.GENERATION),
+    ),
+    scrape_series.STORAGE: Source(
+        model=models.BatteryLevelReading,
+        value_field="charge_percent",
+        scope_field="battery_id",
+        rollup=None,
+        series_filter=scrape_series.get_filter(scrape_series.STORAGE),
+    ),
+    scrape_series.PURCHASE: Source(
+        model=models.ElectricityPurchase,
+        value_field="wh",
+        scope_field=None,
+        rollup=models.RollupMetric.PURCHASE,
+        series_filter=scrape_series.get_filter(scrape_series.PURCHASE),
+    ),
+    scrape_series.SALE: Source(
+        model=models.ElectricitySale,
+        value_field="wh",
+        scope_field=None,
+        rollup=models.RollupMetric.SALE,
+        series_filter=scrape_series.get_filter(scrape_series.SALE),
+    ),
+    scrape_series.CONSUMPTION: Source(
+        model=models.ConsumptionReading,
+        value_field="wh",
+        scope_field=None,
+        rollup=models.RollupMetric.CONSUMPTION,
+        series_filter=scrape_series.get_filter(scrape_series.CONSUMPTION),
+    ),
+}
+
+
+@dataclass
+class CompactionResult:
+    # Readings whose rows were deleted, leaving them in their DailySeries rows.
+    dropped_readings: int = 0
+    archived_days: int = 0
+    archived_readings: int = 0
+    deleted_hourly_rollups: int = 0
+    files: list[Path] = field(default_factory=list)
+
+    def __add__(self, other: CompactionResult) -> CompactionResult:
+        return CompactionResult(
+            dropped_readings=self.dropped_readings + other.dropped_readings,
+            archived_days=self.archived_days + other.archived_days,
+            archived_readings=self.archived_readings + other.archived_readings,
+            deleted_hourly_rollups=self.deleted_hourly_rollups + other.deleted_hourly_rollups,
+            files=self.files + other.files,
+        )
+
+
+def compact(kind: str, today: Optional[datetime.date] = None) -> CompactionResult:
+    """
+    Apply the kind's retention policy, archiving one month at a time.
+
+    Readings are recorded through electricity operations, which keep every day's DailySeries row up to date, so rows
+    are dropped without repacking them first.
+    """
+    today = today or datetime.date.today()
+    source = SOURCES[kind]
+    policy = settings.RETENTION_POLICIES[kind]
+    result = CompactionResult()
+
+    if policy.get("row_days") is not None:
+        cutoff = today - datetime.timedelta(days=policy["row_days"])
+        result.dropped_readings, _ = source.model.objects.filter(occurred_on__lt=cutoff).delete()
+
+    if policy.get("raw_days") is not None:
+        cutoff = today - datetime.timedelta(days=policy["raw_days"])
+        dates = (
+            models.DailySeries.objects.filter(date__lt=cutoff, **source.series_filter)
+            .order_by("date")
+            .values_list("date", flat=True)
+            .distinct()
+        )
+        for month, month_dates in itertools.groupby(dates, key=lambda date: date.replace(day=1)):
+            result += _archive_month(kind, source, month, list(month_dates))
+
+    if source.rollup and policy.get("hourly_days") is not None:
+        cutoff = today - datetime.timedelta(days=policy["hourly_days"])
+        hourly = models.Rollup.objects.filter(
+            metric=source.rollup,
+            resolution=models.Resolution.HOUR,
+            period_start__lt=datetime.datetime(cutoff.year, cutoff.month, cutoff.day),
+        )
+        if source.rollup in time_of_use.METRICS:
+            # The hours of periods priced by time of use are kept so the periods can still be costed.
+            for start, end in _merge_periods(time_of_use.get_priced_periods(queries.get_billing_period_ranges())):
+                end += datetime.timedelta(days=1)
+                hourly = hourly.exclude(
+                    period_start__gte=datetime.datetime(start.year, start.month, start.day),
+                    period_start__lt=datetime.datetime(end.year, end.month, end.day),
+                )
+        result.deleted_hourly_rollups, _ = hourly.delete()
+    return result
+
+
+def reclaim_space() -> None:
+    """
+    Rebuild the database file so the space freed by compaction is returned to the disk.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute("VACUUM")
+        cursor.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+
+def _merge_periods(periods: list[tuple[datetime.date, datetime.date]]) -> list[tuple[datetime.date, datetime.date]]:
+    """
+    Merge consecutive periods, in date order, into single ranges.
+    """
+    merged: list[tuple[datetime.date, datetime.date]] = []
+    for start, end in periods:
+        if merged and merged[-1][1] + datetime.timedelta(days=1) >= start:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+@transaction.atomic
+def _archive_month(kind: str, source: Source, month: datetime.date, dates: list[datetime.date]) -> CompactionResult:
+    """
+    Write the packed readings of the dates to an archive file, then delete their DailySeries rows, any readings still
+    in their tables and the fingerprints and watermarks of their series.
+
+    The file is written before the delete, so a failure can only leave a day both archived and in the database, in
+    which case it's archived again by the next compaction and the reader keeps the newest copy.
+    """
+    archived = list(queries.get_packed_readings(kind, date__in=dates))
+    path = archive.write(kind, month, archived)
+    source.model.objects.filter(occurred_on__in=dates).delete()
+    models.DailySeries.objects.filter(date__in=dates, **source.series_filter).delete()
+    scrape_ops.forget_series(dates, **source.series_filter)
+    return CompactionResult(archived_days=len(dates), archived_readings=len(archived), files=[path])
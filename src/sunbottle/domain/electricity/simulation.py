@@ -0,0 +1,268 @@
+"""
+What-if pricing of the billing history under candidate tariffs, charges and feed in tariffs.
+
+The daily totals of the history are loaded into NumPy arrays once and every candidate is priced against them in one
+batch of array operations, so ranking many candidates over years of readings takes milliseconds.
+
+Tiers are priced the same way as queries.get_base_cost and recorded time of use tariffs by time_of_use, so a candidate
+with the recorded rates reproduces the costs on the savings page. Candidates themselves have tiered tariffs.
+"""
+from __future__ import annotations
+
+import datetime
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+from django.conf import settings
+
+from sunbottle.data.electricity import models as electricity_models
+from sunbottle.domain.electricity import queries, rates, time_of_use
+
+# A schedule of the date each charge took effect to its yen per kWh.
+Schedule = dict[datetime.date, float]
+
+
+@dataclass(frozen=True)
+class Candidate:
+    """
+    The rates to price the history with. Rates left as None are the ones recorded for each billing period.
+    """
+
+    name: str
+    tariff: Optional[tuple[rates.Tier, ...]] = None
+    fuel_adjustment: Optional[Schedule] = None
+    renewable: Optional[Schedule] = None
+    fit: Optional[float] = None
+
+    @classmethod
+    def from_json(cls, data: dict) -> Candidate:
+        """
+        Build a candidate from e.g. {"name": "...", "tariff": [[0, 120, 19.68], [121, null, 24.05]], "renewable": 1.4}.
+
+        Charges may be a single yen per kWh or a schedule like {"2023-05-15": 1.4}.
+        """
+        return cls(
+            name=data["name"],
+            tariff=(
+                tuple(((tier_min, tier_max), price) for tier_min, tier_max, price in data["tariff"])
+                if data.get("tariff") is not None
+                else None
+            ),
+            fuel_adjustment=_to_schedule(data.get("fuel_adjustment")),
+            renewable=_to_schedule(data.get("renewable")),
+            fit=data.get("fit"),
+        )
+
+
+@dataclass
+class History:
+    """
+    The daily kWh of the billing periods, aligned on one array per metric with a slot for every day.
+    """
+
+    periods: list[tuple[datetime.date, datetime.date]]
+    days: np.ndarray
+    # The index in periods of each day.
+    period_index: np.ndarray
+    consumption: np.ndarray
+    purchase: np.ndarray
+    sale: np.ndarray
+
+    def get_period_totals(self, daily: np.ndarray) -> np.ndarray:
+        return np.bincount(self.period_index, weights=daily, minlength=len(self.periods))
+
+
+@dataclass
+class SimulationResult:
+    """
+    What each billing period would have cost under a candidate.
+    """
+
+    candidate: Candidate
+    # What the consumption would have cost without solar.
+    total_cost: np.ndarray
+    # What the electricity bought would have cost.
+    actual_cost: np.ndarray
+    sold_price: np.ndarray
+
+    @property
+    def total_savings(self) -> np.ndarray:
+        return self.total_cost - self.actual_cost + self.sold_price
+
+    @property
+    def net_cost(self) -> float:
+        """
+        What was paid for electricity over the history less what was earned selling it.
+        """
+        return float(self.actual_cost.sum() - self.sold_price.sum())
+
+
+def load_history(periods: Optional[list[tuple[datetime.date, datetime.date]]] = None) -> History:
+    """
+    Load the daily consumption, purchases and sales of the billing periods, every billing period so far by default.
+
+    The history is empty if there are no periods, e.g. before the first billing period has started.
+    """
+    periods = list(queries.get_billing_period_ranges()) if periods is None else periods
+    if not periods:
+        return History(
+            periods=[],
+            days=np.array([], dtype="datetime64[D]"),
+            period_index=np.array([], dtype=np.int64),
+            consumption=np.zeros(0),
+            purchase=np.zeros(0),
+            sale=np.zeros(0),
+        )
+    first, last = periods[0][0], periods[-1][1]
+    days = np.arange(np.datetime64(first, "D"), np.datetime64(last, "D") + 1)
+    starts = np.array([period_start for period_start, _ in periods], dtype="datetime64[D]")
+
+    metrics = [
+        electricity_models.RollupMetric.CONSUMPTION,
+        electricity_models.RollupMetric.PURCHASE,
+        electricity_models.RollupMetric.SALE,
+    ]
+    daily_totals = queries.get_daily_totals(
+        datetime.datetime(first.year, first.month, first.day),
+        datetime.datetime(last.year, last.month, last.day),
+        metrics=metrics,
+    )
+    arrays = []
+    for metric in metrics:
+        kwh = np.zeros(len(days))
+        if daily_totals[metric]:
+            offsets = np.array(list(daily_totals[metric]), dtype="datetime64[D]") - days[0]
+            kwh[offsets.astype(np.int64)] = np.fromiter(daily_totals[metric].values(), dtype=np.int64) / 1000
+        arrays.append(kwh)
+
+    consumption, purchase, sale = arrays
+    return History(
+        periods=periods,
+        days=days,
+        period_index=np.searchsorted(starts, days, side="right") - 1,
+        consumption=consumption,
+        purchase=purchase,
+        sale=sale,
+    )
+
+
+def simulate(history: History, candidates: list[Candidate]) -> list[SimulationResult]:
+    """
+    Price every billing period of the history under each of the candidates.
+    """
+    recorded = [rates.get_rates(period_start) for period_start, _ in history.periods]
+    tier_mins, tier_maxes, tier_prices = _get_tier_arrays(candidates, recorded)
+    charges = _get_charge_array(candidates, recorded, history.periods, "fuel_adjustment") + _get_charge_array(
+        candidates, recorded, history.periods, "renewable"
+    )
+    fits = np.array([settings.FIT if candidate.fit is None else candidate.fit for candidate in candidates])
+
+    consumption = history.get_period_totals(history.consumption)
+    purchase = history.get_period_totals(history.purchase)
+    sale = history.get_period_totals(history.sale)
+
+    total_cost = _get_tiered_cost(tier_mins, tier_maxes, tier_prices, consumption) + charges * consumption
+    actual_cost = _get_tiered_cost(tier_mins, tier_maxes, tier_prices, purchase) + charges * purchase
+
+    # Periods with a recorded time of use tariff have no tiers, their hours are priced instead.
+    band_costs = time_of_use.get_costs(history.periods, time_of_use.METRICS)
+    recorded_tariff = np.array([candidate.tariff is None for candidate in candidates])[:, np.newaxis]
+    scale = 10**time_of_use.COST_DECIMAL_PLACES
+    total_cost += recorded_tariff * band_costs[electricity_models.RollupMetric.CONSUMPTION] / scale
+    actual_cost += recorded_tariff * band_costs[electricity_models.RollupMetric.PURCHASE] / scale
+    sold_price = fits[:, np.newaxis] * sale
+    return [
+        SimulationResult(
+            candidate=candidate,
+            total_cost=total_cost[index],
+            actual_cost=actual_cost[index],
+            sold_price=sold_price[index],
+        )
+        for index, candidate in enumerate(candidates)
+    ]
+
+
+def rank(results: list[SimulationResult]) -> list[SimulationResult]:
+    """
+    Order the results from the lowest net cost to the highest.
+    """
+    return sorted(results, key=lambda result: result.net_cost)
+
+
+def _get_tier_arrays(
+    candidates: list[Candidate], recorded: list[rates.Rates]
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Return the min kWh, max kWh and price of every tier as (candidate, period, tier) arrays.
+
+    Missing maxes are infinite, and candidates with fewer tiers are padded with tiers that are never reached.
+    """
+    width = max(
+        (
+            len(tariff)
+            for tariff in [*(candidate.tariff or () for candidate in candidates), *(r.tariff for r in recorded)]
+        ),
+        default=0,
+    )
+    shape = (len(candidates), len(recorded), width)
+    mins, maxes, prices = np.full(shape, np.inf), np.full(shape, np.inf), np.zeros(shape)
+    for candidate_index, candidate in enumerate(candidates):
+        # A candidate's own tariff applies to every period, so it's filled in across all of them at once.
+        tariffs = (
+            [(slice(None), candidate.tariff)]
+            if candidate.tariff is not None
+            else enumerate(() if r.bands else r.tariff for r in recorded)
+        )
+        for period_index, tariff in tariffs:
+            for tier_index, ((tier_min, tier_max), price) in enumerate(tariff):
+                mins[candidate_index, period_index, tier_index] = tier_min
+                maxes[candidate_index, period_index, tier_index] = np.inf if tier_max is None else tier_max
+                prices[candidate_index, period_index, tier_index] = price
+    return mins, maxes, prices
+
+
+def _get_tiered_cost(mins: np.ndarray, maxes: np.ndarray, prices: np.ndarray, kwh: np.ndarray) -> np.ndarray:
+    """
+    Return the (candidate, period) cost of each period's kWh, mirroring queries.get_base_cost.
+    """
+    kwh = kwh[np.newaxis, :, np.newaxis]
+    with np.errstate(invalid="ignore"):
+        # The last tier runs to the whole kWh used, the first tier to the kWh used if that's below its max and every
+        # other tier reached is charged in full.
+        upper = np.where(np.isinf(maxes), np.floor(kwh), maxes)
+        quantity = np.where((mins == 0) & (kwh < upper), kwh, upper - mins)
+        return np.where(kwh >= mins, quantity * prices, 0).sum(axis=2)
+
+
+def _get_charge_array(
+    candidates: list[Candidate],
+    recorded: list[rates.Rates],
+    periods: list[tuple[datetime.date, datetime.date]],
+    charge: str,
+) -> np.ndarray:
+    """
+    Return the (candidate, period) yen per kWh of the charge.
+    """
+    starts = np.array([period_start for period_start, _ in periods], dtype="datetime64[D]")
+    recorded_charges = np.array([float(getattr(period_rates, charge)) for period_rates in recorded])
+    rows = []
+    for candidate in candidates:
+        schedule = getattr(candidate, charge)
+        if schedule is None:
+            rows.append(recorded_charges)
+            continue
+        effective = np.array(sorted(schedule), dtype="datetime64[D]")
+        values = np.array([schedule[date] for date in sorted(schedule)])
+        index = np.searchsorted(effective, starts, side="right") - 1
+        # Periods before the schedule starts pay the first charge in it.
+        rows.append(values[np.maximum(index, 0)])
+    return np.array(rows)
+
+
+def _to_schedule(value: float | dict[str, float] | None) -> Optional[Schedule]:
+    if value is None:
+        return None
+    if isinstance(value, dict):
+        return {datetime.date.fromisoformat(date): charge for date, charge in value.items()}
+    return {datetime.date.min: value}
@@ -17,6 +17,9 @@ class StorageReading:
 
 
 class StorageRetriever:
+    # Retrievers that don't need Firefox set this to False so no browser is started for them.
+    requires_browser = True
+
     def retrieve(
         self,
         browser: Optional[webdriver.Firefox] = None,
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import datetime
+import decimal
+
+from django.test import TestCase
+
+from sunbottle.data.electricity import models as electricity_models
+from sunbottle.domain.electricity import operations as electricity_ops
+from sunbottle.domain.electricity import queries, storage
+
+
+def _reading(minutes_ago: int, charge: str) -> storage.StorageReading:
+    occurred_at = datetime.datetime.now().replace(second=0, microsecond=0) - datetime.timedelta(minutes=minutes_ago)
+    return storage.StorageReading(occurred_at=occurred_at, charge=decimal.Decimal(charge))
+
+
+class BatteryChargeTests(TestCase):
+    def setUp(self) -> None:
+        self.batteries = [
+            electricity_models.Battery.objects.create(name=name, capacity=decimal.Decimal("9.8"))
+            for name in ["Main", "Spare"]
+        ]
+
+    def test_the_head_only_keeps_the_window_before_the_newest_reading(self) -> None:
+        readings = [_reading(15 * n, str(n)) for n in range(12, -1, -1)]
+
+        electricity_ops.record_storage_readings(self.batteries[0], readings)
+
+        recent = electricity_models.BatteryLevelHead.objects.get(battery=self.batteries[0]).recent
+        newest = readings[-1].occurred_at
+        self.assertEqual(
+            [
+                reading.occurred_at
+                for reading in readings
+                if reading.occurred_at > newest - electricity_ops.BATTERY_HEAD_WINDOW
+            ],
+            [datetime.datetime.fromisoformat(occurred_at) for occurred_at, _ in recent],
+        )
+        self.assertEqual(8, len(recent))
+
+    def test_readings_from_the_last_31_minutes_are_not_trusted_yet(self) -> None:
+        electricity_ops.record_storage_readings(
+            self.batteries[0], [_reading(45, "50.5"), _reading(32, "55"), _reading(20, "60")]
+        )
+
+        self.assertEqual(decimal.Decimal("55"), queries.get_charge_for_battery(self.batteries[0]))
+
+    def test_batteries_with_settled_heads_take_one_query(self) -> None:
+        for charge, battery in zip(["40", "70"], self.batteries):
+            electricity_ops.record_storage_readings(battery, [_reading(45, charge), _reading(10, "99")])
+
+        with self.assertNumQueries(1):
+            charges = queries.get_batteries_with_charge()
+
+        self.assertEqual([decimal.Decimal("40"), decimal.Decimal("70")], [charge for _, charge in charges])
+
+    def test_batteries_without_a_settled_reading_in_their_head_are_fetched_together(self) -> None:
+        # The older reading is outside the head's window, so only the readings table has it.
+        for charge, battery in zip(["40", "70"], self.batteries):
+            electricity_ops.record_storage_readings(battery, [_reading(180, charge), _reading(10, "99")])
+        electricity_models.Battery.objects.create(name="Unused", capacity=decimal.Decimal("5"))
+
+        with self.assertNumQueries(2):
+            charges = queries.get_batteries_with_charge()
+
+        self.assertEqual(
+            [decimal.Decimal("40"), decimal.Decimal("70"), decimal.Decimal("0.0")], [charge for _, charge in charges]
+        )
+        self.assertEqual(decimal.Decimal("40"), queries.get_charge_for_battery(self.batteries[0]))
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import datetime
+import decimal
+
+from django.test import TestCase, override_settings
+
+from sunbottle.data.electricity import models as electricity_models
+from sunbottle.domain.electricity import consumption
+from sunbottle.domain.electricity import operations as electricity_ops
+from sunbottle.domain.electricity import queries, rates
+
+TODAY = datetime.date(2023, 7, 1)
+# The periods that have settled by TODAY. The one from 2023-06-15 is still open.
+PERIODS = [
+    (datetime.date(2023, 3, 15), datetime.date(2023, 4, 14)),
+    (datetime.date(2023, 4, 15), datetime.date(2023, 5, 14)),
+    (datetime.date(2023, 5, 15), datetime.date(2023, 6, 14)),
+]
+
+
+def _readings(date: datetime.date, wh: int) -> list[consumption.ConsumptionReading]:
+    start = datetime.datetime(date.year, date.month, date.day)
+    return [
+        consumption.ConsumptionReading(occurred_at=start + datetime.timedelta(minutes=15 * n), wh=wh) for n in range(96)
+    ]
+
+
+@override_settings(FIRST_BILLING_PERIOD_START=PERIODS[0][0], BILLING_SNAPSHOT_SETTLE_DAYS=7)
+class BillingPeriodSnapshotTests(TestCase):
+    def setUp(self) -> None:
+        rates.clear_cache()
+        self.addCleanup(rates.clear_cache)
+        for date, wh in [(datetime.date(2023, 5, 1), 100), (datetime.date(2023, 5, 20), 50)]:
+            electricity_ops.record_consumption_readings(_readings(date, wh))
+        electricity_ops.snapshot_billing_periods(today=TODAY)
+
+    def _snapshotted(self) -> list[tuple[datetime.date, datetime.date]]:
+        return list(
+            electricity_models.BillingPeriodSnapshot.objects.order_by("start_on").values_list("start_on", "end_on")
+        )
+
+    def test_settled_periods_are_read_back_unchanged(self) -> None:
+        self.assertEqual(PERIODS, self._snapshotted())
+        self.assertEqual(
+            dict(zip(PERIODS, queries.get_stats_for_billing_periods(PERIODS))), queries.get_billing_period_snapshots()
+        )
+        self.assertEqual(decimal.Decimal("9.6"), queries.get_billing_period_snapshots()[PERIODS[1]].total_consumption)
+
+    def test_the_open_period_is_never_snapshotted(self) -> None:
+        with override_settings(BILLING_SNAPSHOT_SETTLE_DAYS=0):
+            self.assertEqual(0, electricity_ops.snapshot_billing_periods(today=datetime.date(2023, 7, 14)))
+            self.assertEqual(1, electricity_ops.snapshot_billing_periods(today=datetime.date(2023, 7, 15)))
+
+        self.assertEqual(datetime.date(2023, 6, 15), self._snapshotted()[-1][0])
+
+    def test_readings_written_into_a_period_delete_its_snapshot(self) -> None:
+        electricity_ops.record_consumption_readings(_readings(datetime.date(2023, 5, 1), 10))
+
+        self.assertEqual([PERIODS[0], PERIODS[2]], self._snapshotted())
+        electricity_ops.snapshot_billing_periods(today=TODAY)
+        self.assertEqual(decimal.Decimal("0.96"), queries.get_billing_period_snapshots()[PERIODS[1]].total_consumption)
+
+    def test_a_charge_deletes_the_snapshots_it_applies_to(self) -> None:
+        charge = electricity_models.Charge.objects.get(
+            kind=electricity_models.ChargeKind.FUEL_ADJUSTMENT, effective_on=PERIODS[1][0]
+        )
+        charge.yen_per_kwh = decimal.Decimal("1.00")
+        charge.save()
+
+        self.assertEqual(PERIODS[:1], self._snapshotted())
+
+    def test_a_tariff_deletes_the_snapshots_it_applies_to(self) -> None:
+        electricity_models.Tariff.objects.create(name="Cheaper", effective_on=PERIODS[2][0])
+
+        self.assertEqual(PERIODS[:2], self._snapshotted())
+
+    def test_a_holiday_deletes_the_snapshot_of_its_period(self) -> None:
+        electricity_models.Holiday.objects.create(date=datetime.date(2023, 5, 3), name="Constitution Day")
+
+        self.assertEqual([PERIODS[0], PERIODS[2]], self._snapshotted())
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import datetime
+import decimal
+
+from django.test import TestCase
+
+from sunbottle.data.electricity import models as electricity_models
+from sunbottle.domain.electricity import dashboard
+
+TODAY = datetime.date(2023, 6, 1)
+YESTERDAY = datetime.date(2023, 5, 31)
+LAST_YEAR = datetime.date(2022, 5, 31)
+
+
+class DashboardSnapshotTests(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        metrics = [
+            electricity_models.RollupMetric.GENERATION,
+            electricity_models.RollupMetric.CONSUMPTION,
+            electricity_models.RollupMetric.PURCHASE,
+            electricity_models.RollupMetric.SALE,
+        ]
+        # Hours and the day before last year are left out of the snapshot.
+        electricity_models.Rollup.objects.bulk_create(
+            electricity_models.Rollup(
+                metric=metric,
+                resolution=resolution,
+                period_start=datetime.datetime.combine(date, datetime.time()),
+                wh=(day + 1) * 1000 + position * 100 + (5 if resolution == electricity_models.Resolution.HOUR else 0),
+            )
+            for day, date in enumerate([TODAY, YESTERDAY, LAST_YEAR, LAST_YEAR - datetime.timedelta(days=1)])
+            for position, metric in enumerate(metrics)
+            for resolution in [electricity_models.Resolution.DAY, electricity_models.Resolution.HOUR]
+        )
+        electricity_models.LifetimeTotal.objects.update_or_create(
+            metric=electricity_models.RollupMetric.GENERATION, defaults={"wh": 123456}
+        )
+        electricity_models.LifetimeTotal.objects.update_or_create(
+            metric=electricity_models.RollupMetric.CONSUMPTION, defaults={"wh": 654321}
+        )
+
+        settled_at = datetime.datetime.now() - datetime.timedelta(hours=1)
+        for name, charge in [("Main", "64.5"), ("Spare", "12.25")]:
+            battery = electricity_models.Battery.objects.create(name=name, capacity=decimal.Decimal("9.8"))
+            electricity_models.BatteryLevelHead.objects.create(
+                battery=battery, recent=[[settled_at.isoformat(), charge]]
+            )
+
+    def test_snapshot_takes_two_queries(self) -> None:
+        # The daily rollups with the lifetime total, and the batteries with their heads.
+        with self.assertNumQueries(2):
+            dashboard.get_dashboard_snapshot(TODAY)
+
+    def test_snapshot_matches_the_rollups_and_lifetime_total(self) -> None:
+        snapshot = dashboard.get_dashboard_snapshot(TODAY)
+
+        self.assertEqual(TODAY, snapshot.date)
+        self.assertEqual(
+            dashboard.DayTotals(generation=1000, consumption=1100, purchase=1200, sale=1300), snapshot.today
+        )
+        self.assertEqual(
+            dashboard.DayTotals(generation=2000, consumption=2100, purchase=2200, sale=2300), snapshot.yesterday
+        )
+        self.assertEqual(
+            dashboard.DayTotals(generation=3000, consumption=3100, purchase=3200, sale=3300), snapshot.last_year
+        )
+        self.assertEqual(123456, snapshot.total_generation)
+        self.assertEqual(
+            [
+                dashboard.BatteryCharge(name="Main", capacity=decimal.Decimal("9.8"), charge=decimal.Decimal("64.5")),
+                dashboard.BatteryCharge(name="Spare", capacity=decimal.Decimal("9.8"), charge=decimal.Decimal("12.25")),
+            ],
+            sorted(snapshot.batteries, key=lambda battery: battery.name),
+        )
+
+    def test_days_without_rollups_are_zero(self) -> None:
+        snapshot = dashboard.get_dashboard_snapshot(TODAY + datetime.timedelta(days=2))
+
+        self.assertEqual(dashboard.DayTotals(), snapshot.today)
+        self.assertEqual(dashboard.DayTotals(), snapshot.yesterday)
+        self.assertEqual(123456, snapshot.total_generation)
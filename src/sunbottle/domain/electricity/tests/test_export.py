@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import datetime
+import decimal
+import gzip
+import tempfile
+
+from django.test import TestCase, override_settings
+
+from sunbottle.data.electricity import models as electricity_models
+from sunbottle.domain.electricity import export, generation
+from sunbottle.domain.electricity import operations as electricity_ops
+from sunbottle.domain.electricity import retention, storage
+
+# Archived, only packed and still in rows once compacted on TODAY.
+DAYS = [datetime.date(2023, 5, 1), datetime.date(2023, 6, 1), datetime.date(2023, 7, 1)]
+TODAY = datetime.date(2023, 7, 15)
+
+
+def _readings(date: datetime.date, wh: int) -> list[generation.GenerationReading]:
+    start = datetime.datetime(date.year, date.month, date.day, 12)
+    return [
+        generation.GenerationReading(occurred_at=start + datetime.timedelta(minutes=15 * n), wh=wh + n)
+        for n in range(4)
+    ]
+
+
+class RawExportTests(TestCase):
+    def setUp(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.enterContext(override_settings(RETENTION_ARCHIVE_PATH=directory.name))
+
+        self.generators = [electricity_models.Generator.objects.create(name=name) for name in ["East", "West"]]
+        self.expected = []
+        for date in DAYS:
+            for wh, generator in enumerate(self.generators, start=1):
+                readings = _readings(date, 100 * wh)
+                electricity_ops.record_generation_readings(generator, readings)
+                self.expected += [(reading.occurred_at, generator.pk, reading.wh) for reading in readings]
+        self.expected.sort()
+
+        policies = {kind: {"row_days": 30, "raw_days": 60, "hourly_days": None} for kind in retention.SOURCES}
+        with override_settings(RETENTION_POLICIES=policies):
+            result = retention.compact("generation", today=TODAY)
+        self.assertEqual(8, result.archived_readings)
+        self.assertEqual(16, result.dropped_readings)
+
+    def test_archived_and_packed_days_are_exported_in_order(self) -> None:
+        columns, rows = export.get_rows("generation", DAYS[0], DAYS[-1] + datetime.timedelta(days=1))
+
+        self.assertEqual(["occurred_at", "generator_id", "wh"], columns)
+        self.assertEqual(self.expected, list(rows))
+
+    def test_only_days_in_the_range_are_exported(self) -> None:
+        _, rows = export.get_rows("generation", DAYS[0] + datetime.timedelta(days=1), DAYS[-1])
+
+        self.assertEqual([row for row in self.expected if row[0].date() == DAYS[1]], list(rows))
+
+    def test_a_day_written_again_after_archiving_is_exported_once(self) -> None:
+        electricity_ops.record_generation_readings(self.generators[0], _readings(DAYS[0], 500))
+
+        _, rows = export.get_rows("generation", DAYS[0], DAYS[0] + datetime.timedelta(days=1))
+
+        self.assertEqual(
+            [(reading.occurred_at, self.generators[0].pk, reading.wh) for reading in _readings(DAYS[0], 500)],
+            list(rows),
+        )
+
+    def test_csv_has_a_header_and_survives_gzip(self) -> None:
+        columns, rows = export.get_rows("generation", DAYS[1], DAYS[1] + datetime.timedelta(days=1))
+
+        data = gzip.decompress(b"".join(export.gzip_stream(export.encode(columns, rows, export.CSV)))).decode()
+
+        lines = data.splitlines()
+        self.assertEqual("occurred_at,generator_id,wh", lines[0])
+        self.assertEqual(f"2023-06-01 12:00:00,{self.generators[0].pk},100", lines[1])
+        self.assertEqual(9, len(lines))
+
+    def test_charges_are_exported_as_percentages(self) -> None:
+        battery = electricity_models.Battery.objects.create(name="Main", capacity=decimal.Decimal("9.8"))
+        occurred_at = datetime.datetime(2023, 7, 1, 12)
+        electricity_ops.record_storage_readings(
+            battery, [storage.StorageReading(occurred_at=occurred_at, charge=decimal.Decimal("45.5"))]
+        )
+
+        _, rows = export.get_rows("storage", DAYS[-1], TODAY)
+
+        self.assertEqual([(occurred_at, battery.pk, decimal.Decimal("45.5"))], list(rows))
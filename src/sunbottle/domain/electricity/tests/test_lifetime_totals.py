@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import datetime
+import io
+import tempfile
+
+from django.contrib import admin
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+
+from sunbottle.data.electricity import models as electricity_models
+from sunbottle.domain.electricity import consumption
+from sunbottle.domain.electricity import operations as electricity_ops
+from sunbottle.domain.electricity import retention
+
+DAYS = [datetime.date(2023, 6, 1), datetime.date(2023, 6, 2)]
+CONSUMPTION = electricity_models.RollupMetric.CONSUMPTION
+
+
+def _readings(date: datetime.date, wh: int) -> list[consumption.ConsumptionReading]:
+    start = datetime.datetime(date.year, date.month, date.day)
+    return [
+        consumption.ConsumptionReading(occurred_at=start + datetime.timedelta(minutes=15 * n), wh=wh) for n in range(96)
+    ]
+
+
+def _total() -> int:
+    return electricity_models.LifetimeTotal.objects.get(metric=CONSUMPTION).wh
+
+
+class LifetimeTotalTests(TestCase):
+    def setUp(self) -> None:
+        electricity_ops.record_consumption_readings(_readings(DAYS[0], 10))
+
+    def test_an_insert_and_corrections_update_the_total(self) -> None:
+        self.assertEqual(960, _total())
+
+        corrected = _readings(DAYS[0], 10)
+        corrected[0].wh = 25
+        electricity_ops.record_consumption_readings(corrected)
+        self.assertEqual(975, _total())
+
+        corrected[0].wh = 1
+        electricity_ops.record_consumption_readings(corrected)
+        self.assertEqual(951, _total())
+
+    def test_an_unchanged_upsert_leaves_the_total_alone(self) -> None:
+        updated_at = electricity_models.LifetimeTotal.objects.get(metric=CONSUMPTION).updated_at
+
+        result = electricity_ops.record_consumption_readings(_readings(DAYS[0], 10))
+
+        self.assertEqual(96, result.unchanged)
+        self.assertEqual(
+            (960, updated_at),
+            electricity_models.LifetimeTotal.objects.values_list("wh", "updated_at").get(metric=CONSUMPTION),
+        )
+
+    def test_rebuilding_rollups_keeps_the_total(self) -> None:
+        electricity_ops.record_consumption_readings(_readings(DAYS[1], 2))
+
+        electricity_ops.rebuild_rollups(CONSUMPTION)
+
+        self.assertEqual(960 + 192, _total())
+        self.assertTrue(electricity_ops.reconcile_lifetime_total(CONSUMPTION, repair=False).correct)
+
+    def test_archived_days_are_counted_once(self) -> None:
+        electricity_ops.record_consumption_readings(_readings(DAYS[1], 2))
+        policies = {
+            kind: {"row_days": None, "raw_days": 30 if kind == CONSUMPTION else None, "hourly_days": None}
+            for kind in retention.SOURCES
+        }
+
+        with tempfile.TemporaryDirectory() as path, override_settings(
+            RETENTION_ARCHIVE_PATH=path, RETENTION_POLICIES=policies
+        ):
+            # Only the first day is older than raw_days.
+            result = retention.compact(CONSUMPTION, today=DAYS[0] + datetime.timedelta(days=31))
+            reconciliation = electricity_ops.reconcile_lifetime_total(CONSUMPTION, repair=False)
+
+        self.assertEqual(96, result.archived_readings)
+        self.assertEqual(960 + 192, reconciliation.actual)
+        self.assertTrue(reconciliation.correct)
+
+    def test_check_fails_on_a_tampered_total(self) -> None:
+        electricity_models.LifetimeTotal.objects.filter(metric=CONSUMPTION).update(wh=1)
+
+        with self.assertRaisesMessage(CommandError, "Lifetime totals are off for consumption"):
+            call_command("reconcile_lifetime_totals", "--check", stdout=io.StringIO())
+        # --check only reports.
+        self.assertEqual(1, _total())
+
+        call_command("reconcile_lifetime_totals", stdout=io.StringIO())
+        self.assertEqual(960, _total())
+
+
+class ReadingAdminTests(TestCase):
+    def setUp(self) -> None:
+        electricity_ops.record_consumption_readings(_readings(DAYS[0], 10))
+        self.admin = admin.site._registry[electricity_models.ConsumptionReading]
+
+    def _day_rollup(self) -> int:
+        return electricity_models.Rollup.objects.get(
+            metric=CONSUMPTION, resolution=electricity_models.Resolution.DAY, period_start=datetime.datetime(2023, 6, 1)
+        ).wh
+
+    def test_deleting_readings_updates_rollups_and_the_total(self) -> None:
+        self.admin.delete_queryset(None, electricity_models.ConsumptionReading.objects.filter(occurred_at__hour__lt=12))
+
+        self.assertEqual(480, self._day_rollup())
+        self.assertEqual(480, _total())
+        self.assertTrue(electricity_ops.reconcile_lifetime_total(CONSUMPTION, repair=False).correct)
+
+    def test_edits_are_recorded_like_scraped_readings(self) -> None:
+        reading = electricity_models.ConsumptionReading.objects.order_by("occurred_at").first()
+        reading.wh = 40
+        self.admin.save_model(None, reading, None, True)
+        self.assertEqual(990, self._day_rollup())
+
+        # Moving a reading to the next day takes it out of the first.
+        reading.occurred_at = datetime.datetime(2023, 6, 2, 12)
+        self.admin.save_model(None, reading, None, True)
+
+        self.assertEqual(950, self._day_rollup())
+        self.assertEqual(990, _total())
+        self.assertEqual(96, electricity_models.ConsumptionReading.objects.count())
+        self.assertTrue(electricity_ops.reconcile_lifetime_total(CONSUMPTION, repair=False).correct)
@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+import decimal
+
+from django.test import SimpleTestCase
+
+from sunbottle.data.electricity import models as electricity_models
+from sunbottle.domain.electricity import packing
+
+
+class PackingTests(SimpleTestCase):
+    def test_values_round_trip_with_missing_slots(self) -> None:
+        values = [None, 0, 12, None, -3, 2**31 - 1, None, None, 7]
+
+        packed, present = packing.pack(values)
+
+        self.assertEqual(4 * len(values), len(packed))
+        # One bit per slot, rounded up to whole bytes.
+        self.assertEqual(2, len(present))
+        self.assertEqual(values, packing.unpack(packed, present))
+
+    def test_an_empty_day_round_trips(self) -> None:
+        self.assertEqual([None] * 96, packing.unpack(*packing.pack([None] * 96)))
+
+    def test_charges_are_packed_as_thousandths_of_a_percent(self) -> None:
+        field = electricity_models.BatteryLevelReading._meta.get_field("charge_percent")
+
+        self.assertEqual(45500, packing.to_packed(field, decimal.Decimal("45.5")))
+        self.assertEqual(decimal.Decimal("45.500"), packing.from_packed(field, 45500))
+        wh = electricity_models.ConsumptionReading._meta.get_field("wh")
+        self.assertEqual(120, packing.from_packed(wh, packing.to_packed(wh, 120)))
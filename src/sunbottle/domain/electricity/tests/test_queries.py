@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import datetime
+
+from dateutil.relativedelta import relativedelta
+from django.test import TestCase, override_settings
+
+from sunbottle.data.electricity import models as electricity_models
+from sunbottle.domain.electricity import queries, rates
+
+# The first tariff and charges seeded by the rates migration.
+RATES_START = datetime.date(2022, 10, 15)
+
+
+class BillingPeriodStatsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        days = (datetime.date.today() - RATES_START).days + 1
+        electricity_models.Rollup.objects.bulk_create(
+            electricity_models.Rollup(
+                metric=metric,
+                resolution=electricity_models.Resolution.DAY,
+                period_start=datetime.datetime.combine(RATES_START, datetime.time()) + datetime.timedelta(days=n),
+                wh=wh * (n % 7 + 1),
+            )
+            for metric, wh in [
+                (electricity_models.RollupMetric.GENERATION, 12000),
+                (electricity_models.RollupMetric.CONSUMPTION, 9000),
+                (electricity_models.RollupMetric.PURCHASE, 4000),
+                (electricity_models.RollupMetric.SALE, 7000),
+            ]
+            for n in range(days)
+        )
+
+    def test_query_count_does_not_grow_with_the_billing_periods(self) -> None:
+        # Compile the rates up front so neither history is charged for it.
+        rates.get_rate_table()
+        lengths = []
+        for first_period_start in [datetime.date.today() - relativedelta(months=2), RATES_START]:
+            with self.subTest(first_period_start=first_period_start):
+                with override_settings(FIRST_BILLING_PERIOD_START=first_period_start):
+                    # The snapshots and the daily rollups of every period.
+                    with self.assertNumQueries(2):
+                        periods = queries.get_billing_period_stats()
+                lengths.append(len(periods))
+
+        self.assertGreater(lengths[1], lengths[0])
+
+    def test_periods_are_totalled_from_the_daily_rollups(self) -> None:
+        with override_settings(FIRST_BILLING_PERIOD_START=RATES_START):
+            first = queries.get_billing_period_stats()[0]
+
+        days = (RATES_START + relativedelta(months=1) - RATES_START).days
+        self.assertEqual(days, len(first.daily_data))
+        self.assertEqual(
+            queries.wh_to_kwh(sum(9000 * (n % 7 + 1) for n in range(days))),
+            first.total_consumption,
+        )
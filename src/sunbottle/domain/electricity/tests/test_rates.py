@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import datetime
+import decimal
+
+from django.test import TestCase
+
+from sunbottle.data.electricity import models as electricity_models
+from sunbottle.domain.electricity import rates
+
+# The first rates seeded by migration 0010.
+FIRST = datetime.date(2022, 10, 15)
+
+
+class RateTableTests(TestCase):
+    def setUp(self) -> None:
+        rates.clear_cache()
+        self.addCleanup(rates.clear_cache)
+
+    def test_dates_before_all_three_kinds_of_rate_are_left_out(self) -> None:
+        # Only a tariff and one charge are in effect on the earlier dates.
+        tariff = electricity_models.Tariff.objects.create(name="Earlier", effective_on=datetime.date(2022, 8, 15))
+        electricity_models.TariffTier.objects.create(tariff=tariff, min_kwh=0, yen_per_kwh=decimal.Decimal("20.00"))
+        electricity_models.Charge.objects.create(
+            kind=electricity_models.ChargeKind.RENEWABLE_ENERGY,
+            effective_on=datetime.date(2022, 9, 15),
+            yen_per_kwh=decimal.Decimal("3.00"),
+        )
+
+        table = rates.compile_rate_table()
+
+        self.assertEqual(FIRST, table.starts[0])
+        self.assertEqual(decimal.Decimal("3.45"), table.rates[0].renewable)
+
+    def test_dates_are_found_at_and_between_the_starts(self) -> None:
+        table = rates.compile_rate_table()
+
+        self.assertEqual(decimal.Decimal("9.72"), table.get(FIRST).fuel_adjustment)
+        self.assertEqual(decimal.Decimal("9.72"), table.get(datetime.date(2022, 11, 14)).fuel_adjustment)
+        self.assertEqual(decimal.Decimal("11.92"), table.get(datetime.date(2022, 11, 15)).fuel_adjustment)
+        self.assertEqual(decimal.Decimal("3.45"), table.get(datetime.date(2023, 5, 14)).renewable)
+        self.assertEqual(decimal.Decimal("1.40"), table.get(datetime.date(2023, 5, 15)).renewable)
+        self.assertEqual(decimal.Decimal("6.54"), table.get(datetime.date(2030, 1, 1)).fuel_adjustment)
+
+    def test_dates_before_the_first_rates_are_not_found(self) -> None:
+        with self.assertRaises(rates.RateNotFound):
+            rates.compile_rate_table().get(FIRST - datetime.timedelta(days=1))
+
+    def test_saving_a_tier_clears_the_cache_and_later_snapshots(self) -> None:
+        tariff = electricity_models.Tariff.objects.create(name="Cheaper", effective_on=datetime.date(2023, 3, 15))
+        tier = electricity_models.TariffTier.objects.create(
+            tariff=tariff, min_kwh=0, yen_per_kwh=decimal.Decimal("18.00")
+        )
+        self.assertEqual(decimal.Decimal("18.00"), rates.get_rates(datetime.date(2023, 3, 15)).tariff[0][1])
+        electricity_models.BillingPeriodSnapshot.objects.bulk_create(
+            electricity_models.BillingPeriodSnapshot(
+                start_on=start_on, end_on=start_on + datetime.timedelta(days=30), stats={}, rates={}
+            )
+            for start_on in [datetime.date(2023, 2, 15), datetime.date(2023, 3, 15), datetime.date(2023, 4, 15)]
+        )
+
+        tier.yen_per_kwh = decimal.Decimal("17.00")
+        tier.save()
+
+        self.assertEqual(decimal.Decimal("17.00"), rates.get_rates(datetime.date(2023, 3, 15)).tariff[0][1])
+        self.assertEqual(
+            [datetime.date(2023, 2, 15)],
+            list(electricity_models.BillingPeriodSnapshot.objects.values_list("start_on", flat=True)),
+        )
@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+import datetime
+
+from django.test import TestCase
+
+from sunbottle.data.electricity import models as electricity_models
+from sunbottle.domain.electricity import consumption
+from sunbottle.domain.electricity import operations as electricity_ops
+
+# Just before midnight, so a date taken in the wrong place shows up.
+OCCURRED_AT = datetime.datetime(2023, 6, 1, 23, 45)
+
+
+class OccurredOnTests(TestCase):
+    def test_upserted_readings_are_dated(self) -> None:
+        electricity_ops.record_consumption_readings([consumption.ConsumptionReading(occurred_at=OCCURRED_AT, wh=5)])
+
+        self.assertEqual(OCCURRED_AT.date(), electricity_models.ConsumptionReading.objects.get().occurred_on)
+
+    def test_saving_keeps_the_date_in_step(self) -> None:
+        reading = electricity_models.ConsumptionReading.objects.create(occurred_at=OCCURRED_AT, wh=5)
+        reading.occurred_at += datetime.timedelta(minutes=15)
+        reading.save()
+
+        reading.refresh_from_db()
+        self.assertEqual(datetime.date(2023, 6, 2), reading.occurred_on)
+
+    def test_daily_lookups_use_the_index(self) -> None:
+        plan = electricity_models.ConsumptionReading.objects.filter(occurred_on=OCCURRED_AT.date()).explain()
+
+        self.assertIn("USING INDEX", plan)
+        self.assertIn("occurred_on", plan)
@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import datetime
+import decimal
+import tempfile
+
+from django.test import TestCase, override_settings
+
+from sunbottle.data.electricity import models as electricity_models
+from sunbottle.domain.electricity import archive, consumption, generation
+from sunbottle.domain.electricity import operations as electricity_ops
+from sunbottle.domain.electricity import queries, rates, retention, storage
+
+DATE = datetime.date(2023, 6, 1)
+TODAY = datetime.date(2023, 8, 1)
+
+
+def _policies(**policy: int | None) -> dict[str, dict[str, int | None]]:
+    return {kind: {"row_days": None, "raw_days": None, "hourly_days": None, **policy} for kind in retention.SOURCES}
+
+
+def _day(wh: int, date: datetime.date = DATE) -> list[generation.GenerationReading]:
+    start = datetime.datetime(date.year, date.month, date.day)
+    return [
+        generation.GenerationReading(occurred_at=start + datetime.timedelta(minutes=15 * n), wh=wh + n)
+        for n in range(24, 80)
+    ]
+
+
+class DroppingRowsTests(TestCase):
+    def setUp(self) -> None:
+        self.generators = [electricity_models.Generator.objects.create(name=name) for name in ["East", "West"]]
+        for wh, generator in enumerate(self.generators, start=1):
+            electricity_ops.record_generation_readings(generator, _day(wh))
+        self.battery = electricity_models.Battery.objects.create(name="Main", capacity=decimal.Decimal("9.8"))
+        start = datetime.datetime(DATE.year, DATE.month, DATE.day)
+        electricity_ops.record_storage_readings(
+            self.battery,
+            [
+                storage.StorageReading(
+                    occurred_at=start + datetime.timedelta(minutes=15 * n), charge=decimal.Decimal(n)
+                )
+                for n in range(96)
+            ],
+        )
+
+    def _rollups(self) -> list[tuple]:
+        return list(
+            electricity_models.Rollup.objects.order_by("metric", "resolution", "period_start").values_list(
+                "metric", "resolution", "period_start", "wh"
+            )
+        )
+
+    def test_readings_older_than_row_days_are_only_kept_packed(self) -> None:
+        series = queries.get_generation_series_for_date(DATE)
+        rollups = self._rollups()
+
+        with override_settings(RETENTION_POLICIES=_policies(row_days=30)):
+            result = retention.compact("generation", today=TODAY) + retention.compact("storage", today=TODAY)
+
+        self.assertEqual(2 * 56 + 96, result.dropped_readings)
+        self.assertFalse(electricity_models.GenerationReading.objects.exists())
+        self.assertFalse(electricity_models.BatteryLevelReading.objects.exists())
+        self.assertEqual(3, electricity_models.DailySeries.objects.count())
+        self.assertEqual(series, queries.get_generation_series_for_date(DATE))
+        self.assertEqual(
+            [decimal.Decimal(n) for n in range(96)],
+            [
+                decimal.Decimal(reading.value).scaleb(-3)
+                for reading in queries.get_packed_readings("storage", date=DATE)
+            ],
+        )
+
+        electricity_ops.rebuild_rollups(electricity_models.RollupMetric.GENERATION)
+        self.assertEqual(rollups, self._rollups())
+        self.assertTrue(electricity_ops.reconcile_lifetime_total("generation", repair=False).correct)
+
+    def test_recent_readings_keep_their_rows(self) -> None:
+        with override_settings(RETENTION_POLICIES=_policies(row_days=90)):
+            result = retention.compact("generation", today=TODAY)
+
+        self.assertEqual(0, result.dropped_readings)
+        self.assertEqual(2 * 56, electricity_models.GenerationReading.objects.count())
+
+
+class ArchivingTests(TestCase):
+    def setUp(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.enterContext(override_settings(RETENTION_ARCHIVE_PATH=directory.name))
+        rates.clear_cache()
+        self.addCleanup(rates.clear_cache)
+
+        # DATE is in a billing period priced by time of use, FLAT_DATE isn't.
+        tariff = electricity_models.Tariff.objects.create(name="Night and day", effective_on=datetime.date(2023, 5, 15))
+        electricity_models.TariffBand.objects.create(tariff=tariff, yen_per_kwh=decimal.Decimal("25"))
+        self.flat_date = datetime.date(2023, 4, 1)
+        self.generators = [electricity_models.Generator.objects.create(name=name) for name in ["East", "West"]]
+        for wh, generator in enumerate(self.generators, start=1):
+            for date in [self.flat_date, DATE]:
+                electricity_ops.record_generation_readings(generator, _day(wh, date))
+
+    def _hours(self, metric: electricity_models.RollupMetric, date: datetime.date) -> int:
+        return electricity_models.Rollup.objects.filter(
+            metric=metric, resolution=electricity_models.Resolution.HOUR, period_start__date=date
+        ).count()
+
+    def test_archived_days_read_back_the_same(self) -> None:
+        readings = list(queries.get_packed_readings("generation", date=DATE))
+        series = queries.get_generation_series_for_date(DATE)
+
+        with override_settings(RETENTION_POLICIES=_policies(raw_days=30, hourly_days=0)):
+            result = retention.compact("generation", today=TODAY)
+
+        self.assertEqual(2, result.archived_days)
+        self.assertEqual(4 * 56, result.archived_readings)
+        self.assertFalse(electricity_models.DailySeries.objects.exists())
+        self.assertFalse(electricity_models.GenerationReading.objects.exists())
+        self.assertEqual(readings, archive.read_day("generation", DATE))
+        self.assertEqual(
+            readings, [reading for reading in queries.get_readings("generation") if reading.occurred_at.date() == DATE]
+        )
+        self.assertEqual([], queries.get_generation_series_for_date(DATE))
+        self.assertEqual(series, queries.get_generation_series_for_date(DATE, include_archived=True))
+        self.assertTrue(electricity_ops.reconcile_lifetime_total("generation", repair=False).correct)
+
+    def test_hourly_rollups_are_kept_for_time_of_use_periods(self) -> None:
+        for date in [self.flat_date, DATE]:
+            electricity_ops.record_consumption_readings(
+                [
+                    consumption.ConsumptionReading(occurred_at=reading.occurred_at, wh=reading.wh)
+                    for reading in _day(1, date)
+                ]
+            )
+
+        with override_settings(RETENTION_POLICIES=_policies(raw_days=30, hourly_days=0)):
+            result = retention.compact("consumption", today=TODAY) + retention.compact("generation", today=TODAY)
+
+        self.assertEqual(3 * 14, result.deleted_hourly_rollups)
+        self.assertEqual(0, self._hours(electricity_models.RollupMetric.CONSUMPTION, self.flat_date))
+        self.assertEqual(14, self._hours(electricity_models.RollupMetric.CONSUMPTION, DATE))
+        # Only consumption and purchases are priced by the hour.
+        self.assertEqual(0, self._hours(electricity_models.RollupMetric.GENERATION, DATE))
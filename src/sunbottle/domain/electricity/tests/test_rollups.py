@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import datetime
+
+from django.test import TestCase
+
+from sunbottle.data.electricity import models as electricity_models
+from sunbottle.domain.electricity import consumption
+from sunbottle.domain.electricity import operations as electricity_ops
+
+# The last two days of one month and the first of the next.
+DAYS = [datetime.date(2023, 5, 30), datetime.date(2023, 5, 31), datetime.date(2023, 6, 1)]
+
+
+def _readings(date: datetime.date, wh: int) -> list[consumption.ConsumptionReading]:
+    """
+    Return a reading of wh every quarter of an hour from 6am until 10am.
+    """
+    start = datetime.datetime(date.year, date.month, date.day, 6)
+    return [
+        consumption.ConsumptionReading(occurred_at=start + datetime.timedelta(minutes=15 * n), wh=wh) for n in range(16)
+    ]
+
+
+class UpdateRollupsTests(TestCase):
+    def setUp(self) -> None:
+        for date in DAYS:
+            electricity_ops.record_consumption_readings(_readings(date, 10))
+
+    def _rollups(self, resolution: electricity_models.Resolution) -> dict[datetime.datetime, int]:
+        return dict(
+            electricity_models.Rollup.objects.filter(
+                metric=electricity_models.RollupMetric.CONSUMPTION, resolution=resolution
+            ).values_list("period_start", "wh")
+        )
+
+    def test_hours_days_and_months_are_summed(self) -> None:
+        hours = self._rollups(electricity_models.Resolution.HOUR)
+        self.assertEqual(12, len(hours))
+        self.assertEqual({40}, set(hours.values()))
+        self.assertEqual(
+            {datetime.datetime(2023, 5, 30, hour) for hour in range(6, 10)},
+            {hour for hour in hours if hour.date() == DAYS[0]},
+        )
+        self.assertEqual(
+            {datetime.datetime.combine(date, datetime.time()): 160 for date in DAYS},
+            self._rollups(electricity_models.Resolution.DAY),
+        )
+        self.assertEqual(
+            {datetime.datetime(2023, 5, 1): 320, datetime.datetime(2023, 6, 1): 160},
+            self._rollups(electricity_models.Resolution.MONTH),
+        )
+
+    def test_a_correction_lowers_the_hour_day_and_month(self) -> None:
+        corrected = _readings(DAYS[1], 10)
+        corrected[0].wh = 4
+
+        electricity_ops.record_consumption_readings(corrected)
+
+        self.assertEqual(34, self._rollups(electricity_models.Resolution.HOUR)[datetime.datetime(2023, 5, 31, 6)])
+        self.assertEqual(154, self._rollups(electricity_models.Resolution.DAY)[datetime.datetime(2023, 5, 31)])
+        self.assertEqual(314, self._rollups(electricity_models.Resolution.MONTH)[datetime.datetime(2023, 5, 1)])
+
+    def test_dates_without_readings_lose_their_rollups(self) -> None:
+        electricity_ops.delete_readings(
+            electricity_models.ConsumptionReading.objects.filter(
+                occurred_on__in=[DAYS[1], DAYS[2]], occurred_at__hour__gte=8
+            )
+        )
+        electricity_ops.delete_readings(electricity_models.ConsumptionReading.objects.filter(occurred_on=DAYS[2]))
+
+        electricity_ops.update_rollups(electricity_models.RollupMetric.CONSUMPTION, [DAYS[1], DAYS[2]])
+
+        self.assertEqual(
+            {
+                *(datetime.datetime(2023, 5, 30, hour) for hour in range(6, 10)),
+                *(datetime.datetime(2023, 5, 31, hour) for hour in range(6, 8)),
+            },
+            set(self._rollups(electricity_models.Resolution.HOUR)),
+        )
+        self.assertEqual(
+            {datetime.datetime(2023, 5, 30): 160, datetime.datetime(2023, 5, 31): 80},
+            self._rollups(electricity_models.Resolution.DAY),
+        )
+        self.assertEqual({datetime.datetime(2023, 5, 1): 240}, self._rollups(electricity_models.Resolution.MONTH))
@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+import datetime
+import json
+import tempfile
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+
+from sunbottle.domain.electricity import simulation
+
+
+@override_settings(FIRST_BILLING_PERIOD_START=datetime.date.today() + datetime.timedelta(days=1))
+class NoBillingHistoryTests(TestCase):
+    def test_history_is_empty_before_the_first_billing_period(self) -> None:
+        history = simulation.load_history()
+
+        self.assertEqual([], history.periods)
+        results = simulation.simulate(history, [simulation.Candidate(name="Flat", tariff=(((0, None), 25.0),))])
+        self.assertEqual(0, results[0].net_cost)
+
+    def test_simulate_tariffs_explains_there_is_no_history(self) -> None:
+        with tempfile.NamedTemporaryFile("w", suffix=".json") as f:
+            json.dump([{"name": "Flat", "tariff": [[0, None, 25.0]]}], f)
+            f.flush()
+            with self.assertRaisesMessage(CommandError, "no billing history"):
+                call_command("simulate_tariffs", f.name)
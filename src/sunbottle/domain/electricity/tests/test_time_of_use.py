@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import datetime
+import decimal
+
+from django.test import TestCase, override_settings
+
+from sunbottle.data.electricity import models as electricity_models
+from sunbottle.domain.electricity import rates, retention, time_of_use
+
+# A flat period, then the first period priced by time of use.
+FLAT_PERIOD = (datetime.date(2022, 12, 15), datetime.date(2023, 1, 14))
+PRICED_PERIOD = (datetime.date(2023, 1, 15), datetime.date(2023, 2, 14))
+DAYS = [FLAT_PERIOD[0], PRICED_PERIOD[0], PRICED_PERIOD[0] + datetime.timedelta(days=1)]
+WH_PER_HOUR = 100
+
+
+@override_settings(FIRST_BILLING_PERIOD_START=FLAT_PERIOD[0])
+class TimeOfUseTests(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        tariff = electricity_models.Tariff.objects.create(name="Night and day", effective_on=PRICED_PERIOD[0])
+        electricity_models.TariffBand.objects.create(
+            tariff=tariff, start_hour=8, end_hour=22, yen_per_kwh=decimal.Decimal("30")
+        )
+        electricity_models.TariffBand.objects.create(
+            tariff=tariff, order=1, start_hour=22, end_hour=8, yen_per_kwh=decimal.Decimal("20")
+        )
+        rollups = []
+        for metric in [electricity_models.RollupMetric.CONSUMPTION, electricity_models.RollupMetric.GENERATION]:
+            for date in DAYS:
+                day = datetime.datetime.combine(date, datetime.time())
+                rollups.append(
+                    electricity_models.Rollup(
+                        metric=metric, resolution=electricity_models.Resolution.DAY, period_start=day, wh=2400
+                    )
+                )
+                rollups.extend(
+                    electricity_models.Rollup(
+                        metric=metric,
+                        resolution=electricity_models.Resolution.HOUR,
+                        period_start=day + datetime.timedelta(hours=hour),
+                        wh=WH_PER_HOUR,
+                    )
+                    for hour in range(24)
+                )
+        electricity_models.Rollup.objects.bulk_create(rollups)
+
+    def setUp(self) -> None:
+        # The rate table is cached for the whole process, so don't leave it with this tariff for other tests.
+        rates.clear_cache()
+        self.addCleanup(rates.clear_cache)
+
+    def test_hours_are_priced_by_their_band(self) -> None:
+        costs = time_of_use.get_costs([FLAT_PERIOD, PRICED_PERIOD], [electricity_models.RollupMetric.CONSUMPTION])
+
+        # Two days of 14 hours at 30 yen and 10 hours at 20 yen.
+        expected = 2 * (14 * 3000 + 10 * 2000) * WH_PER_HOUR
+        self.assertEqual([0, expected], costs[electricity_models.RollupMetric.CONSUMPTION].tolist())
+
+    def test_days_without_their_hours_are_not_priced(self) -> None:
+        electricity_models.Rollup.objects.filter(
+            metric=electricity_models.RollupMetric.CONSUMPTION,
+            resolution=electricity_models.Resolution.HOUR,
+            period_start__date=DAYS[2],
+        ).delete()
+
+        with self.assertRaisesMessage(rates.RateNotFound, str(DAYS[2])):
+            time_of_use.get_costs([PRICED_PERIOD], [electricity_models.RollupMetric.CONSUMPTION])
+
+    def test_compaction_keeps_the_hours_priced_by_time_of_use(self) -> None:
+        policies = {kind: {"raw_days": None, "hourly_days": 0} for kind in retention.SOURCES}
+        with override_settings(RETENTION_POLICIES=policies):
+            consumption = retention.compact("consumption", today=datetime.date(2023, 6, 1))
+            generation = retention.compact("generation", today=datetime.date(2023, 6, 1))
+
+        self.assertEqual(24, consumption.deleted_hourly_rollups)
+        self.assertEqual(72, generation.deleted_hourly_rollups)
+        kept = electricity_models.Rollup.objects.filter(
+            metric=electricity_models.RollupMetric.CONSUMPTION, resolution=electricity_models.Resolution.HOUR
+        )
+        self.assertEqual({DAYS[1], DAYS[2]}, {hour.date() for hour in kept.values_list("period_start", flat=True)})
+        costs = time_of_use.get_costs([PRICED_PERIOD], [electricity_models.RollupMetric.CONSUMPTION])
+        self.assertTrue(costs[electricity_models.RollupMetric.CONSUMPTION].all())
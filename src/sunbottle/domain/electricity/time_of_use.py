@@ -0,0 +1,166 @@
+"""
+Costing of billing periods priced by time of use tariffs, on their hourly rollups.
+
+Each hour is priced by the first band of its period's tariff that covers it, with each band matched against every hour
+of the periods sharing its tariff at once using NumPy. Costs are added up in hundred-thousandths of a yen, hundredths
+of a yen per kWh times Wh, so the totals are exact.
+
+Hourly rollups rather than the raw readings are priced as purchases are only published hourly and raw readings are
+archived by compact_readings, so bands start and end on the hour. compact_readings keeps the hourly rollups of METRICS
+in periods priced by time of use for the same reason.
+"""
+from __future__ import annotations
+
+import datetime
+import decimal
+from collections import defaultdict
+from typing import Iterable
+
+import numpy as np
+
+from sunbottle.data.electricity import models as electricity_models
+from sunbottle.domain.electricity import rates
+
+# Decimal places of a cost in hundredths of a yen per kWh times Wh.
+COST_DECIMAL_PLACES = 5
+# The metrics priced by time of use tariffs.
+METRICS = (electricity_models.RollupMetric.CONSUMPTION, electricity_models.RollupMetric.PURCHASE)
+
+
+def get_costs(
+    periods: list[tuple[datetime.date, datetime.date]], metrics: Iterable[electricity_models.RollupMetric]
+) -> dict[str, np.ndarray]:
+    """
+    Return the cost of each metric's kWh in each period before charges, in hundred-thousandths of a yen.
+
+    Periods that aren't priced by time of use cost nothing. The hours of every metric are fetched in one query, along
+    with the days so that a day whose hours have been deleted by compact_readings raises RateNotFound rather than
+    costing nothing.
+    """
+    metrics = list(metrics)
+    costs = {metric: np.zeros(len(periods), dtype=np.int64) for metric in metrics}
+    table = rates.get_rate_table()
+    priced = [index for index, (period_start, _) in enumerate(periods) if table.get(period_start).bands]
+    if not priced:
+        return costs
+
+    first, last = periods[priced[0]][0], periods[priced[-1]][1] + datetime.timedelta(days=1)
+    hourly: dict[str, tuple[list[datetime.datetime], list[int]]] = {metric: ([], []) for metric in metrics}
+    used_days: dict[str, list[datetime.datetime]] = {metric: [] for metric in metrics}
+    rollups = electricity_models.Rollup.objects.filter(
+        metric__in=metrics,
+        resolution__in=[electricity_models.Resolution.HOUR, electricity_models.Resolution.DAY],
+        period_start__gte=datetime.datetime(first.year, first.month, first.day),
+        period_start__lt=datetime.datetime(last.year, last.month, last.day),
+    )
+    for metric, resolution, period_start, wh in rollups.values_list("metric", "resolution", "period_start", "wh"):
+        if resolution == electricity_models.Resolution.HOUR:
+            hourly[metric][0].append(period_start)
+            hourly[metric][1].append(wh)
+        elif wh:
+            used_days[metric].append(period_start)
+
+    starts = np.array([periods[index][0] for index in priced], dtype="datetime64[D]")
+    ends = np.array([periods[index][1] for index in priced], dtype="datetime64[D]")
+    for metric, (hours, wh) in hourly.items():
+        hours = np.array(hours, dtype="datetime64[h]")
+        days = hours.astype("datetime64[D]")
+        index = _period_index(days, starts, ends)
+        inside = index >= 0
+        hours, index, wh = hours[inside], index[inside], np.array(wh, dtype=np.int64)[inside]
+
+        used = np.array(used_days[metric], dtype="datetime64[D]")
+        missing = np.setdiff1d(used[_period_index(used, starts, ends) >= 0], days)
+        if missing.size:
+            raise rates.RateNotFound(
+                f"The hourly {metric} of {missing[0]} has been compacted, so it can't be priced by time of use"
+            )
+        if not hours.size:
+            continue
+
+        prices = get_hourly_prices(hours, [table.get(periods[i][0]).bands for i in priced], index, table.holidays)
+        np.add.at(costs[metric], np.array(priced)[index], prices * wh)
+    return costs
+
+
+def get_priced_periods(
+    periods: Iterable[tuple[datetime.date, datetime.date]]
+) -> list[tuple[datetime.date, datetime.date]]:
+    """
+    Return the periods priced by a time of use tariff, skipping those before the first recorded rates.
+    """
+    table = rates.get_rate_table()
+    if not table.starts:
+        return []
+    return [
+        (period_start, period_end)
+        for period_start, period_end in periods
+        if period_start >= table.starts[0] and table.get(period_start).bands
+    ]
+
+
+def get_hourly_prices(
+    hours: np.ndarray, bands: list[tuple[rates.Band, ...]], index: np.ndarray, holidays: Iterable[datetime.date]
+) -> np.ndarray:
+    """
+    Return the price of each hour in hundredths of a yen per kWh, where bands[index[n]] are the bands of hours[n].
+    """
+    days = hours.astype("datetime64[D]")
+    hour = (hours - days).astype(np.int64)
+    month = days.astype("datetime64[M]").astype(np.int64) % 12 + 1
+    # 1970-01-01, day 0, was a Thursday, so this makes Monday 0.
+    weekday = (days.astype(np.int64) + 3) % 7
+    holiday = (weekday >= 5) | np.isin(days, np.array(list(holidays), dtype="datetime64[D]"))
+
+    # Periods with the same tariff are priced together.
+    by_tariff: dict[tuple[rates.Band, ...], list[int]] = defaultdict(list)
+    for period_index, period_bands in enumerate(bands):
+        by_tariff[period_bands].append(period_index)
+
+    prices = np.full(len(hours), -1, dtype=np.int64)
+    for tariff_bands, period_indexes in by_tariff.items():
+        in_tariff = np.isin(index, period_indexes)
+        # Later bands are applied first so the earlier ones overwrite them.
+        for band in reversed(tariff_bands):
+            covered = (
+                in_tariff
+                & _wraps(hour, band.start_hour, band.end_hour)
+                & _wraps_inclusive(month, band.start_month, band.end_month)
+            )
+            if band.days == electricity_models.BandDays.WEEKDAYS:
+                covered &= ~holiday
+            elif band.days == electricity_models.BandDays.HOLIDAYS:
+                covered &= holiday
+            prices[covered] = int(band.yen_per_kwh * 100)
+
+    if (prices < 0).any():
+        raise rates.RateNotFound(f"No time of use band covers {hours[prices < 0][0]}")
+    return prices
+
+
+def to_yen(cost: int) -> decimal.Decimal:
+    return decimal.Decimal(int(cost)).scaleb(-COST_DECIMAL_PLACES)
+
+
+def _period_index(days: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """
+    Return which of the periods from starts to ends, inclusive, each day belongs to, or -1 for none.
+    """
+    index = np.searchsorted(starts, days, side="right") - 1
+    inside = (index >= 0) & (days <= ends[np.maximum(index, 0)])
+    return np.where(inside, index, -1)
+
+
+def _wraps(values: np.ndarray, start: int, end: int) -> np.ndarray:
+    """
+    Return which values are from start until end, wrapping around when end isn't after start.
+    """
+    if start < end:
+        return (values >= start) & (values < end)
+    return (values >= start) | (values < end)
+
+
+def _wraps_inclusive(values: np.ndarray, start: int, end: int) -> np.ndarray:
+    if start <= end:
+        return (values >= start) & (values <= end)
+    return (values >= start) | (values <= end)
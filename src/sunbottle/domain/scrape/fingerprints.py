@@ -0,0 +1,68 @@
+"""
+Fingerprint the readings of a series so unchanged scrapes can be skipped without touching the reading tables.
+"""
+from __future__ import annotations
+
+import decimal
+import hashlib
+import json
+from dataclasses import dataclass
+from typing import Any, Optional, Union
+
+from sunbottle.domain.electricity import storage
+
+# Bytes of each interval's digest. At 96 intervals a day, the odds of a changed interval matching a recorded one are
+# about one in 10^17.
+SLOT_DIGEST_SIZE = 8
+
+
+@dataclass
+class Fingerprint:
+    digest: str
+    # The sorted digests of each interval's start and value, SLOT_DIGEST_SIZE bytes each, so the intervals that changed
+    # can be found without keeping the values themselves.
+    slots: bytes
+
+
+def fingerprint(readings: list[Any]) -> Fingerprint:
+    values = {reading.occurred_at.isoformat(): _normalize(_get_value(reading)) for reading in readings}
+    digest = hashlib.sha256(json.dumps(values, sort_keys=True).encode()).hexdigest()
+    return Fingerprint(digest=digest, slots=b"".join(sorted(get_slot_digest(*interval) for interval in values.items())))
+
+
+def get_slot_digest(occurred_at: str, value: str) -> bytes:
+    """
+    Return the digest of an interval from its ISO formatted start and normalized value.
+    """
+    return hashlib.sha256(f"{occurred_at}={value}".encode()).digest()[:SLOT_DIGEST_SIZE]
+
+
+def get_changed(readings: list[Any], current: Fingerprint, previous: Optional[Fingerprint]) -> list[Any]:
+    """
+    Return the readings whose values differ from the previously recorded fingerprint.
+    """
+    if previous is None:
+        return readings
+    if previous.digest == current.digest:
+        return []
+    recorded = {
+        previous.slots[start : start + SLOT_DIGEST_SIZE] for start in range(0, len(previous.slots), SLOT_DIGEST_SIZE)
+    }
+    return [
+        reading
+        for reading in readings
+        if get_slot_digest(reading.occurred_at.isoformat(), _normalize(_get_value(reading))) not in recorded
+    ]
+
+
+def _get_value(reading: Any) -> Union[int, decimal.Decimal]:
+    if isinstance(reading, storage.StorageReading):
+        return reading.charge
+    return reading.wh
+
+
+def _normalize(value: Union[int, decimal.Decimal]) -> str:
+    if isinstance(value, int):
+        return str(value)
+    # 0.5 and 0.500 are the same reading.
+    return str(decimal.Decimal(value).normalize())
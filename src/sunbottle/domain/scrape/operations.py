@@ -0,0 +1,67 @@
+import datetime
+from typing import Iterable
+
+from django.db.models import QuerySet
+
+from sunbottle.data.scrape import models
+
+from . import fingerprints
+
+
+def mark_backfilled(metric: str, date: datetime.date) -> None:
+    models.BackfillProgress.objects.update_or_create(metric=metric, date=date)
+
+
+def reset_backfill(metrics: list[str], start_date: datetime.date, end_date: datetime.date) -> None:
+    """
+    Forget progress for the range so it's scraped again.
+    """
+    models.BackfillProgress.objects.filter(metric__in=metrics, date__gte=start_date, date__lt=end_date).delete()
+
+
+def set_watermarks(date: datetime.date, watermarks: dict[str, datetime.datetime]) -> None:
+    """
+    Record the last finalized interval of each series on the date.
+    """
+    models.SeriesWatermark.objects.bulk_create(
+        [
+            models.SeriesWatermark(series=series, date=date, finalized_through=finalized_through)
+            for series, finalized_through in watermarks.items()
+        ],
+        update_conflicts=True,
+        unique_fields=["series", "date"],
+        update_fields=["finalized_through", "updated_at"],
+    )
+
+
+def set_fingerprints(date: datetime.date, series_fingerprints: dict[str, fingerprints.Fingerprint]) -> None:
+    models.SeriesFingerprint.objects.bulk_create(
+        [
+            models.SeriesFingerprint(series=series, date=date, digest=fingerprint.digest, slots=fingerprint.slots)
+            for series, fingerprint in series_fingerprints.items()
+        ],
+        update_conflicts=True,
+        unique_fields=["series", "date"],
+        update_fields=["digest", "slots", "updated_at"],
+    )
+
+
+def forget_series(dates: Iterable[datetime.date], **series_filter: str) -> None:
+    """
+    Drop the fingerprints and watermarks of the matching series on the dates.
+
+    Both stand for readings that are in the database, so they're dropped whenever readings are deleted. Otherwise a
+    scrape of the dates would find nothing changed and nothing left to finalize, and never write the readings back.
+    """
+    dates = list(dates)
+    for model in [models.SeriesFingerprint, models.SeriesWatermark]:
+        model.objects.filter(date__in=dates, **series_filter).delete()
+
+
+def forget_series_without_readings(occurred_on: QuerySet, **series_filter: str) -> None:
+    """
+    Drop the fingerprints and watermarks of the matching series on every date missing from occurred_on, a queryset of
+    the dates of the series' readings.
+    """
+    for model in [models.SeriesFingerprint, models.SeriesWatermark]:
+        model.objects.filter(**series_filter).exclude(date__in=occurred_on).delete()
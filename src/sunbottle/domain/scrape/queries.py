@@ -0,0 +1,46 @@
+import datetime
+from typing import Optional
+
+from sunbottle.data.scrape import models
+
+from . import fingerprints, series
+
+
+def get_backfilled(
+    metrics: list[str], start_date: datetime.date, end_date: datetime.date
+) -> set[tuple[str, datetime.date]]:
+    """
+    Return the (metric, date) pairs in the range that a backfill has already finished.
+    """
+    return set(
+        models.BackfillProgress.objects.filter(metric__in=metrics, date__gte=start_date, date__lt=end_date).values_list(
+            "metric", "date"
+        )
+    )
+
+
+def get_watermarks(series_keys: list[str], date: datetime.date) -> dict[str, datetime.datetime]:
+    """
+    Return the last finalized interval of each series on the date, for those that have one.
+    """
+    return dict(
+        models.SeriesWatermark.objects.filter(series__in=series_keys, date=date).values_list(
+            "series", "finalized_through"
+        )
+    )
+
+
+def is_complete(series_key: str, date: datetime.date, watermark: Optional[datetime.datetime]) -> bool:
+    return watermark is not None and watermark >= series.get_last_interval(series_key, date)
+
+
+def get_fingerprints(series_keys: list[str], date: datetime.date) -> dict[str, fingerprints.Fingerprint]:
+    """
+    Return the fingerprint of what was last recorded for each series on the date.
+    """
+    return {
+        series_key: fingerprints.Fingerprint(digest=digest, slots=bytes(slots))
+        for series_key, digest, slots in models.SeriesFingerprint.objects.filter(
+            series__in=series_keys, date=date
+        ).values_list("series", "digest", "slots")
+    }
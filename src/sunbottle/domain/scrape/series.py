@@ -0,0 +1,58 @@
+"""
+Names for the individual series of readings that a scrape records.
+
+Generation and storage pages are recorded once per generator and battery, and the buy/sell page holds two series.
+"""
+import datetime
+from typing import Optional
+
+from sunbottle.data.electricity import models as electricity_models
+
+GENERATION = "generation"
+STORAGE = "storage"
+PURCHASE = "purchase"
+SALE = "sale"
+CONSUMPTION = "consumption"
+
+FIFTEEN_MINUTES = datetime.timedelta(minutes=15)
+HOUR = datetime.timedelta(hours=1)
+
+
+def generation(generator: electricity_models.Generator) -> str:
+    return for_kind(GENERATION, generator.pk)
+
+
+def storage(battery: electricity_models.Battery) -> str:
+    return for_kind(STORAGE, battery.pk)
+
+
+def for_kind(kind: str, scope_id: Optional[int] = None) -> str:
+    """
+    Return the series of a kind, or of one of its generators or batteries.
+    """
+    return kind if scope_id is None else f"{kind}:{scope_id}"
+
+
+def get_filter(kind: str) -> dict[str, str]:
+    """
+    Return the lookups that match every series of a kind, e.g. the series of each generator.
+    """
+    if kind in (GENERATION, STORAGE):
+        return {"series__startswith": f"{kind}:"}
+    return {"series": kind}
+
+
+def get_interval(series: str) -> datetime.timedelta:
+    """
+    Return how much time each reading in the series covers.
+    """
+    if series in (PURCHASE, SALE):
+        return HOUR
+    return FIFTEEN_MINUTES
+
+
+def get_last_interval(series: str, date: datetime.date) -> datetime.datetime:
+    """
+    Return when the last reading of the series on the date starts.
+    """
+    return datetime.datetime(date.year, date.month, date.day) + datetime.timedelta(days=1) - get_interval(series)
@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+import datetime
+import decimal
+
+from django.test import SimpleTestCase
+
+from sunbottle.domain.electricity import consumption, storage
+from sunbottle.domain.scrape import fingerprints
+
+START = datetime.datetime(2023, 6, 1)
+
+
+def _readings(wh: list[int]) -> list[consumption.ConsumptionReading]:
+    return [
+        consumption.ConsumptionReading(occurred_at=START + datetime.timedelta(minutes=15 * n), wh=value)
+        for n, value in enumerate(wh)
+    ]
+
+
+class FingerprintTests(SimpleTestCase):
+    def test_only_changed_and_new_intervals_are_returned(self) -> None:
+        previous = fingerprints.fingerprint(_readings([1, 2, 3]))
+        readings = _readings([1, 20, 3, 4])
+
+        changed = fingerprints.get_changed(readings, fingerprints.fingerprint(readings), previous)
+
+        self.assertEqual([readings[1], readings[3]], changed)
+
+    def test_values_are_kept_only_as_digests(self) -> None:
+        fingerprint = fingerprints.fingerprint(_readings(list(range(96))))
+
+        self.assertEqual(96 * fingerprints.SLOT_DIGEST_SIZE, len(fingerprint.slots))
+
+    def test_charges_with_the_same_value_are_unchanged(self) -> None:
+        previous = fingerprints.fingerprint([storage.StorageReading(occurred_at=START, charge=decimal.Decimal("0.5"))])
+        readings = [storage.StorageReading(occurred_at=START, charge=decimal.Decimal("0.500"))]
+
+        self.assertEqual([], fingerprints.get_changed(readings, fingerprints.fingerprint(readings), previous))
@@ -0,0 +1,114 @@
+"""
+An append-only, on-disk archive of the raw payloads scraped from Sharp.
+
+Each payload is stored gzipped at <SHARP_ARCHIVE_PATH>/<metric>/<year>/<date>/<fetched at>-<n>.json.gz and files are never
+overwritten, so readings can be re-derived from what Sharp returned without scraping again.
+"""
+from __future__ import annotations
+
+import datetime
+import gzip
+import json
+import logging
+import os
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Optional
+
+from django.conf import settings
+
+from sunbottle.data.scrape import models as scrape_models
+
+from . import queries
+
+logger = logging.getLogger(__name__)
+
+FETCHED_AT_FORMAT = "%Y%m%dT%H%M%S.%f"
+
+
+@dataclass
+class ArchivedPayload:
+    metric: str
+    date: datetime.date
+    fetched_at: datetime.datetime
+    payload: Any
+
+
+def store(metric: str, date: Optional[datetime.date], payload: Any) -> Optional[Path]:
+    """
+    Archive a payload as it was returned by Sharp.
+
+    Archiving is best effort: a full or read-only disk is logged rather than failing the scrape.
+    """
+    if not settings.SHARP_ARCHIVE_ENABLED:
+        return None
+    fetched_at = datetime.datetime.now()
+    directory = _get_directory(metric, date or fetched_at.date())
+    try:
+        directory.mkdir(parents=True, exist_ok=True)
+        return _write_new(directory, fetched_at, gzip.compress(json.dumps(payload).encode()))
+    except OSError:
+        logger.exception("Failed to archive %s payload for %s", metric, date)
+        return None
+
+
+def get_latest(metric: str, date: datetime.date) -> Optional[ArchivedPayload]:
+    """
+    Return the most recently fetched payload for the metric and date.
+    """
+    paths = sorted(_get_directory(metric, date).glob("*.json.gz"))
+    if not paths:
+        return None
+    return _read(metric, date, paths[-1])
+
+
+def to_readings(archived: ArchivedPayload) -> list:
+    """
+    Turn an archived payload back into readings as they were when it was fetched.
+    """
+    if archived.metric == scrape_models.Metric.GENERATION:
+        return queries.sharp_generation_to_reading(archived.payload, archived.date)
+    elif archived.metric == scrape_models.Metric.STORAGE:
+        return queries.sharp_storage_to_reading(archived.payload, archived.date, now=archived.fetched_at)
+    elif archived.metric == scrape_models.Metric.BUYSELL:
+        return queries.sharp_buysell_to_reading(archived.payload, archived.date)
+    elif archived.metric == scrape_models.Metric.CONSUMPTION:
+        return queries.sharp_consumption_to_reading(archived.payload, archived.date, now=archived.fetched_at)
+    raise ValueError(f"Unknown metric {archived.metric}")
+
+
+def _get_directory(metric: str, date: datetime.date) -> Path:
+    return Path(settings.SHARP_ARCHIVE_PATH, metric, str(date.year), date.isoformat())
+
+
+def _write_new(directory: Path, fetched_at: datetime.datetime, data: bytes) -> Path:
+    """
+    Write data to a new file named after fetched_at without ever replacing an existing one.
+    """
+    descriptor, temporary = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(descriptor, "wb") as f:
+            f.write(data)
+        name = fetched_at.strftime(FETCHED_AT_FORMAT)
+        for attempt in range(100):
+            path = directory / f"{name}-{attempt:02d}.json.gz"
+            try:
+                # Linking fails if the name is taken, unlike renaming which would silently replace it.
+                os.link(temporary, path)
+            except FileExistsError:
+                continue
+            return path
+        raise FileExistsError(f"No free name for {name} in {directory}")
+    finally:
+        os.unlink(temporary)
+
+
+def _read(metric: str, date: datetime.date, path: Path) -> ArchivedPayload:
+    fetched_at = datetime.datetime.strptime(path.name.split("-")[0], FETCHED_AT_FORMAT)
+    return ArchivedPayload(
+        metric=metric,
+        date=date,
+        fetched_at=fetched_at,
+        payload=json.loads(gzip.decompress(path.read_bytes())),
+    )
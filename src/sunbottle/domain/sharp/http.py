@@ -0,0 +1,190 @@
+"""
+Retrievers that talk to the Sharp HEMS JSON endpoints directly instead of driving Firefox.
+
+The pages load their graph data by posting {pageAction, displayDate, displaySpan} to themselves through
+onReadyJson.sendJsonNoDialog and rendering the returned JSON's "object". We make the same requests over a pooled,
+logged-in requests.Session. Point SHARP_BASE_URL at a stand-in server to run them without the real service.
+"""
+from __future__ import annotations
+
+import datetime
+import logging
+import threading
+from typing import Any, Optional, Union
+from urllib.parse import urljoin
+
+import requests
+from bs4 import BeautifulSoup
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from selenium import webdriver
+
+from sunbottle.data.scrape import models as scrape_models
+from sunbottle.data.sharp import constants as sharp_constants
+from sunbottle.domain.electricity import buysell, consumption, generation, storage
+
+from . import archive, queries, throttle
+
+logger = logging.getLogger(__name__)
+
+
+class SharpHttpError(Exception):
+    """
+    Raised when Sharp doesn't return the data we asked for.
+    """
+
+
+class NotLoggedIn(Exception):
+    """
+    Raised when a response is the login form rather than data.
+    """
+
+
+class SharpHttpClient:
+    def __init__(self, base_url: Optional[str] = None, session: Optional[requests.Session] = None) -> None:
+        self.base_url = base_url or settings.SHARP_BASE_URL
+        self.session = session or _get_session()
+        self._login_lock = threading.Lock()
+
+    def fetch(self, page: str, date: Optional[datetime.date] = None) -> Any:
+        """
+        Return what the page would have put in onRenderResult.object for the given date.
+        """
+        try:
+            return self._fetch(page, date)
+        except NotLoggedIn:
+            self.login(page)
+            return self._fetch(page, date)
+
+    def login(self, page: str = sharp_constants.GENERATION_PAGE) -> None:
+        with self._login_lock:
+            response = self._get(page)
+            form = BeautifulSoup(response.text, "html.parser").find(
+                "form", attrs={"name": sharp_constants.LOGIN_FORM_NAME}
+            )
+            if form is None:
+                # Someone else logged in while we were waiting for the lock.
+                return
+            data = {field["name"]: field.get("value", "") for field in form.find_all("input") if field.get("name")}
+            data.update(memberId=settings.SHARP_LOGIN_MEMBERID, password=settings.SHARP_LOGIN_PASSWORD)
+            # The login is posted and redirects to the page.
+            throttle.wait(requests=2)
+            response = self.session.post(
+                urljoin(response.url, form.get("action") or response.url),
+                data=data,
+                timeout=settings.SHARP_HTTP_TIMEOUT,
+            )
+            response.raise_for_status()
+            if _is_login_form(response):
+                raise SharpHttpError("Sharp rejected the login credentials")
+
+    def _fetch(self, page: str, date: Optional[datetime.date]) -> Any:
+        if date:
+            self._send_json(
+                page,
+                {"pageAction": "changePage", "displayDate": date.strftime("%Y/%m/%d"), "displaySpan": "daily"},
+            )
+        result = self._send_json(page, {"pageAction": "init"})
+        try:
+            return result["object"]
+        except (KeyError, TypeError):
+            raise SharpHttpError(f"{page} returned no render result")
+
+    def _send_json(self, page: str, param: dict[str, str]) -> Any:
+        throttle.wait()
+        response = self.session.post(urljoin(self.base_url, page), json=param, timeout=settings.SHARP_HTTP_TIMEOUT)
+        response.raise_for_status()
+        if _is_login_form(response):
+            raise NotLoggedIn()
+        try:
+            result = response.json()
+        except ValueError:
+            raise SharpHttpError(f"{page} did not return JSON")
+        if isinstance(result, dict) and result.get("errMsg"):
+            raise SharpHttpError(result["errMsg"])
+        return result
+
+    def _get(self, page: str) -> requests.Response:
+        throttle.wait()
+        response = self.session.get(urljoin(self.base_url, page), timeout=settings.SHARP_HTTP_TIMEOUT)
+        response.raise_for_status()
+        return response
+
+
+class SharpHttpGenerationRetriever(generation.GenerationRetriever):
+    requires_browser = False
+
+    def retrieve(
+        self,
+        browser: Optional[webdriver.Firefox] = None,
+        date: Optional[datetime.date] = None,
+    ) -> list[generation.GenerationReading]:
+        generation_data = get_client().fetch(sharp_constants.GENERATION_PAGE, date)
+        archive.store(scrape_models.Metric.GENERATION, date, generation_data)
+        return queries.sharp_generation_to_reading(generation_data, date)
+
+
+class SharpHttpStorageRetriever(storage.StorageRetriever):
+    requires_browser = False
+
+    def retrieve(
+        self,
+        browser: Optional[webdriver.Firefox] = None,
+        date: Optional[datetime.date] = None,
+    ) -> list[storage.StorageReading]:
+        storage_data = get_client().fetch(sharp_constants.STORAGE_PAGE, date)
+        archive.store(scrape_models.Metric.STORAGE, date, storage_data)
+        return queries.sharp_storage_to_reading(storage_data, date)
+
+
+class SharpHttpBuySellRetriever(buysell.BuySellRetriever):
+    requires_browser = False
+
+    def retrieve(
+        self,
+        browser: Optional[webdriver.Firefox] = None,
+        date: Optional[datetime.date] = None,
+    ) -> list[Union[buysell.BuyReading, buysell.SellReading]]:
+        buysell_data = get_client().fetch(sharp_constants.BUY_SELL_POWER_PAGE, date)
+        archive.store(scrape_models.Metric.BUYSELL, date, buysell_data)
+        return queries.sharp_buysell_to_reading(buysell_data, date)
+
+
+class SharpHttpConsumptionRetriever(consumption.ConsumptionRetriever):
+    requires_browser = False
+
+    def retrieve(
+        self,
+        browser: Optional[webdriver.Firefox] = None,
+        date: Optional[datetime.date] = None,
+    ) -> list[consumption.ConsumptionReading]:
+        # Only the first "device", the entire house, is displayed. See SharpConsumptionRetriever.
+        consumption_data = get_client().fetch(sharp_constants.CONSUMPTION_PAGE, date)[0]
+        archive.store(scrape_models.Metric.CONSUMPTION, date, consumption_data)
+        return queries.sharp_consumption_to_reading(consumption_data, date)
+
+
+_clients = threading.local()
+
+
+def get_client() -> SharpHttpClient:
+    """
+    Return the current thread's client so the login and its connections are reused between scrapes.
+
+    Each thread, e.g. each backfill worker, has a client and session of its own.
+    """
+    if not hasattr(_clients, "client"):
+        _clients.client = SharpHttpClient()
+    return _clients.client
+
+
+def _get_session() -> requests.Session:
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=settings.SHARP_HTTP_POOL_SIZE)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def _is_login_form(response: requests.Response) -> bool:
+    return sharp_constants.LOGIN_FORM_NAME in response.text and "memberId" in response.text
@@ -1,5 +1,5 @@
-import time
-from typing import Optional
+import datetime
+from typing import Any, Optional
 
 from django.conf import settings
 from selenium import webdriver
@@ -7,6 +7,7 @@ from selenium.common import exceptions
 from selenium.webdriver.common.by import By
 
 from sunbottle.data.sharp import constants as sharp_constants
+from sunbottle.domain.sharp import throttle, waits
 
 
 class AlreadyLoggedIn(Exception):
@@ -18,9 +19,10 @@ class AlreadyLoggedIn(Exception):
 def login_browser(browser: webdriver.Firefox, url: Optional[str] = None):
     # Open the login page
     url = url or sharp_constants.GENERATION_URL
+    throttle.wait()
     browser.get(url)
     # Wait for the redirects to finish and the page to finish loading.
-    time.sleep(_get_sleep_time())
+    waits.wait_until(browser, waits.page_settled, step=f"load {_page_name(url)}")
 
     # Fill out the password form if we're not already logged in.
     try:
@@ -30,9 +32,67 @@ def login_browser(browser: webdriver.Firefox, url: Optional[str] = None):
         # We already have an active session...probably.
         raise AlreadyLoggedIn()
     else:
-        # Submit the form using their JS function, as submitting the form doesn't work.
+        # Submit the form using their JS function, as submitting the form doesn't work. The form is posted and
+        # redirects to the page we asked for.
+        throttle.wait(requests=2)
         browser.execute_script("doSubmit()")
+        waits.wait_until(browser, waits.logged_in, step="login")
 
 
-def _get_sleep_time() -> int:
-    return 5
+def load_page(browser: webdriver.Firefox, url: str, date: Optional[datetime.date] = None) -> None:
+    """
+    Log in if needed, open the page at url and switch it to the given date.
+    """
+    try:
+        login_browser(browser, url=url)
+    except AlreadyLoggedIn:
+        pass
+
+    if date:
+        select_date(browser, url, date)
+
+
+def select_date(browser: webdriver.Firefox, url: str, date: datetime.date) -> None:
+    """
+    Ask the page to display the given date and wait for it to reload showing that date.
+    """
+    page = _page_name(url)
+    select_script = """
+    window.%(marker)s = true;
+    var param = {
+        "pageAction": "changePage",
+        "displayDate": "%(date)s",
+        "displaySpan": "daily"
+    }
+    onReadyJson.sendJsonNoDialog("%(page)s", param, function(response, resultJson) {
+        if(response) {
+        // 処理OK時の処理
+            checkCalValBtn = 0;
+        location.href = "%(page)s";
+        } else {
+        // 処理NG時の処理
+            openAlert(escapeCharacter(resultJson.errMsg), "OK", function(){
+                setTimeout(function () {location.replace("A121000000.htm");}, 1);
+            });
+        }
+    });""" % {
+        "marker": waits.STALE_PAGE_MARKER,
+        "date": date.strftime("%Y/%m/%d"),
+        "page": page,
+    }
+    # The date is posted and the page reloaded with it.
+    throttle.wait(requests=2)
+    browser.execute_script(select_script)
+    waits.wait_until(browser, lambda browser: waits.data_ready(browser, date), step=f"select date {page}")
+
+
+def get_render_result(browser: webdriver.Firefox, expression: str = "onRenderResult.object") -> Any:
+    """
+    Return the data the page rendered its graph from, waiting for it to be available.
+    """
+    waits.wait_until(browser, waits.data_ready, step="render result")
+    return browser.execute_script(f"return {expression}")
+
+
+def _page_name(url: str) -> str:
+    return url.rsplit("/", 1)[-1]
@@ -1,131 +1,114 @@
 from __future__ import annotations
 
+import bisect
 import datetime
 import decimal
-from collections import deque
+import functools
 from typing import Optional, Union
 
 from sunbottle.domain.electricity import buysell, consumption, generation, storage
 
+# Sharp reports kWh and percentages with at most three decimal places, so kWh are exactly representable as whole Wh.
+DECIMAL_PLACES = 3
+
 
 def sharp_generation_to_reading(
     generation_data: list[float], date: Optional[datetime.date] = None
 ) -> list[generation.GenerationReading]:
     date = date or datetime.date.today()
-    data = deque(generation_data)
-    readings = []
-    for hour in range(0, 24):
-        for interval in [0, 15, 30, 45]:
-            generated_at = datetime.datetime(
-                year=date.year,
-                month=date.month,
-                day=date.day,
-                hour=hour,
-                minute=interval,
-            )
-
-            kwh = data.popleft()
-            readings.append(generation.GenerationReading(occurred_at=generated_at, kwh=decimal.Decimal(str(kwh))))
-    return readings
+    grid = get_interval_grid(date, minutes=15)
+    return [
+        generation.GenerationReading(occurred_at=generated_at, wh=wh)
+        for generated_at, wh in zip(grid, to_watt_hours(generation_data))
+    ]
 
 
 def sharp_storage_to_reading(
-    storage_data: list[float], date: Optional[datetime.date] = None
+    storage_data: list[float], date: Optional[datetime.date] = None, now: Optional[datetime.datetime] = None
 ) -> list[storage.StorageReading]:
-    now = datetime.datetime.now()
+    now = now or datetime.datetime.now()
     date = date or datetime.date.today()
 
-    data = deque(storage_data)
-    readings = []
-    for hour in range(0, 24):
-        for interval in [0, 15, 30, 45]:
-            level_at = datetime.datetime(
-                year=date.year,
-                month=date.month,
-                day=date.day,
-                hour=hour,
-                minute=interval,
-            )
-            # Skip if the data is speculative i.e. in the future.
-            if level_at > now:
-                continue
-            charge_percent = data.popleft()
-            readings.append(
-                storage.StorageReading(
-                    occurred_at=level_at,
-                    charge=decimal.Decimal(str(charge_percent)),
-                )
-            )
-    return readings
+    # Skip the data that is speculative i.e. in the future.
+    grid = _until(get_interval_grid(date, minutes=15), now)
+    return [
+        storage.StorageReading(occurred_at=level_at, charge=charge_percent)
+        for level_at, charge_percent in zip(grid, to_fixed_point(storage_data[: len(grid)]))
+    ]
 
 
 def sharp_buysell_to_reading(
     buysell_data: dict[str, list[float]], date: Optional[datetime.date] = None
 ) -> list[Union[buysell.BuyReading, buysell.SellReading]]:
     date = date or datetime.date.today()
-
-    buy_data = deque(buysell_data["graphDataPurchase"])
-    sell_data = deque(buysell_data["graphDataSelling"])
-    readings = []
-
-    for hour in range(0, 24):
-        generated_at = datetime.datetime(
-            year=date.year,
-            month=date.month,
-            day=date.day,
-            hour=hour,
-        )
-
-        kwh = buy_data.popleft()
-        readings.append(
-            buysell.BuyReading(
-                occurred_at=generated_at,
-                kwh=decimal.Decimal(str(kwh)),
-            )
-        )
-
-    for hour in range(0, 24):
-        generated_at = datetime.datetime(
-            year=date.year,
-            month=date.month,
-            day=date.day,
-            hour=hour,
-        )
-        kwh = sell_data.popleft()
-        readings.append(
-            buysell.SellReading(
-                occurred_at=generated_at,
-                kwh=decimal.Decimal(str(kwh)),
-            )
-        )
+    grid = get_interval_grid(date, minutes=60)
+
+    readings: list[Union[buysell.BuyReading, buysell.SellReading]] = [
+        buysell.BuyReading(occurred_at=generated_at, wh=wh)
+        for generated_at, wh in zip(grid, to_watt_hours(buysell_data["graphDataPurchase"]))
+    ]
+    readings.extend(
+        buysell.SellReading(occurred_at=generated_at, wh=wh)
+        for generated_at, wh in zip(grid, to_watt_hours(buysell_data["graphDataSelling"]))
+    )
     return readings
 
 
 def sharp_consumption_to_reading(
-    storage_data: list[float], date: Optional[datetime.date] = None
+    storage_data: list[float], date: Optional[datetime.date] = None, now: Optional[datetime.datetime] = None
 ) -> list[consumption.ConsumptionReading]:
-    now = datetime.datetime.now()
+    now = now or datetime.datetime.now()
     date = date or datetime.date.today()
 
-    data = deque(storage_data)
-    readings = []
-    for hour in range(0, 24):
-        for interval in [0, 15, 30, 45]:
-            consumed_at = datetime.datetime(
-                year=date.year,
-                month=date.month,
-                day=date.day,
-                hour=hour,
-                minute=interval,
-            )
-            # Skip if the data is speculative i.e. in the future.
-            if consumed_at > now:
-                continue
-            kwh = data.popleft()
-            readings.append(
-                consumption.ConsumptionReading(
-                    occurred_at=consumed_at,
-                    kwh=decimal.Decimal(str(kwh)),
-                )
-            )
-    return readings
+    # Skip the data that is speculative i.e. in the future.
+    grid = _until(get_interval_grid(date, minutes=15), now)
+    return [
+        consumption.ConsumptionReading(occurred_at=consumed_at, wh=wh)
+        for consumed_at, wh in zip(grid, to_watt_hours(storage_data[: len(grid)]))
+    ]
+
+
+@functools.lru_cache(maxsize=2048)
+def get_interval_grid(date: datetime.date, minutes: int) -> tuple[datetime.datetime, ...]:
+    """
+    Return the start of every interval on the date, built once per date and interval length.
+    """
+    start = datetime.datetime(date.year, date.month, date.day)
+    return tuple(start + offset for offset in _get_offsets(minutes))
+
+
+@functools.lru_cache(maxsize=None)
+def _get_offsets(minutes: int) -> tuple[datetime.timedelta, ...]:
+    return tuple(datetime.timedelta(minutes=minutes * n) for n in range(24 * 60 // minutes))
+
+
+def to_watt_hours(values: list[float]) -> list[int]:
+    """
+    Convert Sharp's kWh floats to whole Wh.
+    """
+    scale = 10**DECIMAL_PLACES
+    return [round(value * scale) for value in values]
+
+
+def to_fixed_point(values: list[float]) -> list[decimal.Decimal]:
+    """
+    Convert Sharp's floats to Decimals with three decimal places.
+
+    Each float is scaled and rounded to an integer, and the Decimal for each integer is cached, so a value that repeats
+    (e.g. a full battery all afternoon) is only converted once. This is cheaper than Decimal(str(x)) for every value.
+    Scaling a day's values as a numpy array and deduplicating them with np.unique was measured slower at 96 values.
+    """
+    scale = 10**DECIMAL_PLACES
+    return [_from_fixed_point(round(value * scale)) for value in values]
+
+
+@functools.lru_cache(maxsize=65536)
+def _from_fixed_point(value: int) -> decimal.Decimal:
+    return decimal.Decimal(value).scaleb(-DECIMAL_PLACES)
+
+
+def _until(grid: tuple[datetime.datetime, ...], now: datetime.datetime) -> tuple[datetime.datetime, ...]:
+    """
+    Slice the grid down to the intervals that have started by now.
+    """
+    return grid[: bisect.bisect_right(grid, now)]
@@ -0,0 +1,251 @@
+from __future__ import annotations
+
+import datetime
+import json
+import threading
+from http import server
+from typing import Any, Optional
+from unittest import mock
+from urllib.parse import parse_qs, urlsplit
+
+from django.test import SimpleTestCase, override_settings
+
+from sunbottle.data.sharp import constants as sharp_constants
+from sunbottle.domain.sharp import (
+    buysell,
+    consumption,
+    generation,
+    http,
+    storage,
+    throttle,
+)
+
+DATE = datetime.date(2023, 6, 1)
+LOGIN_PAGE = "A050101Login.htm"
+SESSION_COOKIE = "JSESSIONID"
+
+PAYLOADS: dict[str, Any] = {
+    sharp_constants.GENERATION_PAGE: [round(n * 0.013, 3) for n in range(96)],
+    sharp_constants.STORAGE_PAGE: [round(50 + n * 0.25, 3) for n in range(96)],
+    sharp_constants.BUY_SELL_POWER_PAGE: {
+        "graphDataPurchase": [round(n * 0.1, 3) for n in range(24)],
+        "graphDataSelling": [round(n * 0.2, 3) for n in range(24)],
+    },
+    # The first "device" is the entire house.
+    sharp_constants.CONSUMPTION_PAGE: [[round(n * 0.021, 3) for n in range(96)], [0.0] * 96],
+}
+
+LOGIN_FORM = """
+<html><body>
+<form name="%s" action="%s" method="post">
+  <input type="hidden" name="token" value="t0k3n">
+  <input type="text" name="memberId">
+  <input type="password" id="password" name="password">
+</form>
+</body></html>
+""" % (
+    sharp_constants.LOGIN_FORM_NAME,
+    LOGIN_PAGE,
+)
+
+
+class SharpHandler(server.BaseHTTPRequestHandler):
+    """
+    Stands in for Sharp: pages are the login form until the session cookie is set by logging in, after which the pages
+    answer posted JSON with their render result.
+    """
+
+    server: StandInServer
+
+    def do_GET(self) -> None:
+        self.server.record(self, None)
+        if self._logged_in():
+            self._respond(200, "text/html", "<html><body>Data page</body></html>")
+        else:
+            self._respond(200, "text/html", LOGIN_FORM)
+
+    def do_POST(self) -> None:
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0))).decode()
+        page = urlsplit(self.path).path.rsplit("/", 1)[-1]
+        if page == LOGIN_PAGE:
+            form = {name: values[0] for name, values in parse_qs(body).items()}
+            self.server.record(self, form)
+            if form.get("memberId") != "member" or form.get("password") != "secret" or form.get("token") != "t0k3n":
+                self._respond(200, "text/html", LOGIN_FORM)
+                return
+            self.send_response(302)
+            self.send_header("Set-Cookie", f"{SESSION_COOKIE}=session-1; Path=/")
+            self.send_header("Location", f"/{sharp_constants.GENERATION_PAGE}")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        param = json.loads(body)
+        self.server.record(self, param)
+        if not self._logged_in():
+            self._respond(200, "text/html", LOGIN_FORM)
+        elif param.get("pageAction") == "init":
+            self._respond(200, "application/json", json.dumps({"object": PAYLOADS[page]}))
+        else:
+            self._respond(200, "application/json", json.dumps({}))
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def _logged_in(self) -> bool:
+        return f"{SESSION_COOKIE}=session-1" in self.headers.get("Cookie", "")
+
+    def _respond(self, status: int, content_type: str, body: str) -> None:
+        data = body.encode()
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class CountingRateLimiter(throttle.RateLimiter):
+    def __init__(self) -> None:
+        super().__init__(requests_per_minute=0)
+        self.requests = 0
+
+    def wait(self, requests: int = 1) -> None:
+        self.requests += requests
+        super().wait(requests)
+
+
+class StandInServer(server.ThreadingHTTPServer):
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), SharpHandler)
+        self.requests: list[tuple[str, str, bool, Optional[dict]]] = []
+        self._lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/"
+
+    def record(self, handler: SharpHandler, body: Optional[dict]) -> None:
+        with self._lock:
+            self.requests.append((handler.command, urlsplit(handler.path).path.lstrip("/"), handler._logged_in(), body))
+
+    def get_json_posts(self) -> list[tuple[str, dict]]:
+        return [
+            (page, body)
+            for method, page, _, body in self.requests
+            if method == "POST" and page != LOGIN_PAGE and body is not None
+        ]
+
+
+@override_settings(SHARP_LOGIN_MEMBERID="member", SHARP_LOGIN_PASSWORD="secret", SHARP_ARCHIVE_ENABLED=False)
+class SharpHttpClientTests(SimpleTestCase):
+    def setUp(self) -> None:
+        self.server = StandInServer()
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(thread.join)
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.client = http.SharpHttpClient(base_url=self.server.url)
+
+    def test_logs_in_and_reuses_the_session_cookie(self) -> None:
+        self.client.fetch(sharp_constants.GENERATION_PAGE)
+
+        logins = [body for method, page, _, body in self.server.requests if page == LOGIN_PAGE]
+        self.assertEqual([{"token": "t0k3n", "memberId": "member", "password": "secret"}], logins)
+        # The first post is answered with the login form, so the client logs in and posts again with the cookie.
+        self.assertEqual(
+            [
+                ("POST", sharp_constants.GENERATION_PAGE, False),
+                ("GET", sharp_constants.GENERATION_PAGE, False),
+                ("POST", LOGIN_PAGE, False),
+                ("GET", sharp_constants.GENERATION_PAGE, True),
+                ("POST", sharp_constants.GENERATION_PAGE, True),
+            ],
+            [(method, page, logged_in) for method, page, logged_in, _ in self.server.requests],
+        )
+
+        self.server.requests.clear()
+        self.client.fetch(sharp_constants.STORAGE_PAGE)
+        self.assertEqual([("POST", sharp_constants.STORAGE_PAGE, True, {"pageAction": "init"})], self.server.requests)
+
+    def test_rejected_login_raises(self) -> None:
+        with override_settings(SHARP_LOGIN_PASSWORD="wrong"):
+            with self.assertRaisesMessage(http.SharpHttpError, "rejected the login"):
+                self.client.fetch(sharp_constants.GENERATION_PAGE)
+
+    def test_changes_the_page_date_then_initializes_it(self) -> None:
+        self.client.login()
+        self.server.requests.clear()
+
+        result = self.client.fetch(sharp_constants.GENERATION_PAGE, DATE)
+
+        self.assertEqual(PAYLOADS[sharp_constants.GENERATION_PAGE], result)
+        self.assertEqual(
+            [
+                (
+                    sharp_constants.GENERATION_PAGE,
+                    {"pageAction": "changePage", "displayDate": "2023/06/01", "displaySpan": "daily"},
+                ),
+                (sharp_constants.GENERATION_PAGE, {"pageAction": "init"}),
+            ],
+            self.server.get_json_posts(),
+        )
+
+    def test_undated_pages_are_only_initialized(self) -> None:
+        self.client.login()
+        self.server.requests.clear()
+
+        self.client.fetch(sharp_constants.BUY_SELL_POWER_PAGE)
+
+        self.assertEqual([(sharp_constants.BUY_SELL_POWER_PAGE, {"pageAction": "init"})], self.server.get_json_posts())
+
+    def test_retrievers_match_the_browser_retrievers(self) -> None:
+        pairs = [
+            (sharp_constants.GENERATION_PAGE, http.SharpHttpGenerationRetriever, generation.SharpGenerationRetriever),
+            (sharp_constants.STORAGE_PAGE, http.SharpHttpStorageRetriever, storage.SharpStorageRetriever),
+            (sharp_constants.BUY_SELL_POWER_PAGE, http.SharpHttpBuySellRetriever, buysell.SharpBuySellRetriever),
+            (
+                sharp_constants.CONSUMPTION_PAGE,
+                http.SharpHttpConsumptionRetriever,
+                consumption.SharpConsumptionRetriever,
+            ),
+        ]
+        for page, http_retriever, browser_retriever in pairs:
+            with self.subTest(page=page):
+                with mock.patch.object(http, "get_client", return_value=self.client):
+                    readings = http_retriever().retrieve(date=DATE)
+                with self._render(PAYLOADS[page]):
+                    expected = browser_retriever().retrieve(browser=mock.Mock(), date=DATE)
+
+                self.assertTrue(readings)
+                self.assertEqual(expected, readings)
+
+    def test_every_request_is_rate_limited(self) -> None:
+        limiter = CountingRateLimiter()
+        with throttle.rate_limited(limiter):
+            self.client.fetch(sharp_constants.GENERATION_PAGE, DATE)
+
+        # The login post is followed by a redirect, which the limiter counts along with it.
+        self.assertEqual(len(self.server.requests), limiter.requests)
+
+    def test_each_thread_has_its_own_client(self) -> None:
+        clients = []
+        thread = threading.Thread(target=lambda: clients.append(http.get_client()))
+        thread.start()
+        thread.join()
+
+        self.assertIs(http.get_client(), http.get_client())
+        self.assertIsNot(http.get_client(), clients[0])
+        self.assertIsNot(http.get_client().session, clients[0].session)
+
+    def _render(self, payload: Any) -> mock._patch:
+        """
+        Stand in for the browser having loaded a page that rendered payload.
+        """
+
+        def get_render_result(browser: Any, expression: str = "onRenderResult.object") -> Any:
+            return payload[0] if expression == "onRenderResult.object[0]" else payload
+
+        return mock.patch.multiple(
+            "sunbottle.domain.sharp.operations", load_page=mock.DEFAULT, get_render_result=get_render_result
+        )
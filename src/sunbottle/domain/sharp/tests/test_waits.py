@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import datetime
+from typing import Any
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from sunbottle.domain.sharp import waits
+
+DATE = datetime.date(2023, 6, 1)
+
+
+def _browser(ready: bool, rendered_date: Any) -> mock.Mock:
+    browser = mock.Mock()
+    browser.execute_script.side_effect = (
+        lambda script: rendered_date if "onRenderResult.displayDate" in script else ready
+    )
+    return browser
+
+
+@override_settings(SHARP_RENDERED_DATE_EXPRESSION="onRenderResult.displayDate")
+class DataReadyTests(SimpleTestCase):
+    def test_the_rendered_date_must_be_the_one_asked_for(self) -> None:
+        self.assertTrue(waits.data_ready(_browser(True, "2023/06/01"), DATE))
+        self.assertTrue(waits.data_ready(_browser(True, "2023/6/1"), DATE))
+        self.assertFalse(waits.data_ready(_browser(True, "2023/05/31"), DATE))
+
+    def test_a_page_without_a_date_is_not_ready_for_one(self) -> None:
+        self.assertFalse(waits.data_ready(_browser(True, None), DATE))
+        self.assertFalse(waits.data_ready(_browser(True, "2023/13/45"), DATE))
+
+    def test_a_page_without_data_is_not_ready(self) -> None:
+        self.assertFalse(waits.data_ready(_browser(False, "2023/06/01"), DATE))
+
+    def test_without_a_date_only_the_data_is_checked(self) -> None:
+        browser = _browser(True, None)
+
+        self.assertTrue(waits.data_ready(browser))
+        browser.execute_script.assert_called_once()
@@ -0,0 +1,58 @@
+"""
+Rate limiting of the requests made to Sharp.
+
+Both the browser and HTTP retrievers call wait() before each request they make. It only waits inside a rate_limited()
+block, so a backfill can cap requests across all of its workers without the regular scrapes being slowed down.
+"""
+from __future__ import annotations
+
+import contextlib
+import contextvars
+import threading
+import time
+from typing import Iterator, Optional
+
+
+class RateLimiter:
+    """
+    Spaces requests out evenly so all workers together stay under a requests-per-minute budget.
+    """
+
+    def __init__(self, requests_per_minute: int) -> None:
+        self.interval = 60.0 / requests_per_minute if requests_per_minute > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next_at = time.monotonic()
+
+    def wait(self, requests: int = 1) -> None:
+        """
+        Wait until the next of the given number of requests may be made.
+        """
+        with self._lock:
+            now = time.monotonic()
+            start_at = max(now, self._next_at)
+            self._next_at = start_at + self.interval * requests
+        time.sleep(start_at - now)
+
+
+_limiter: contextvars.ContextVar[Optional[RateLimiter]] = contextvars.ContextVar("rate_limiter", default=None)
+
+
+@contextlib.contextmanager
+def rate_limited(limiter: RateLimiter) -> Iterator[None]:
+    """
+    Limit the requests made to Sharp in the block with limiter.
+    """
+    token = _limiter.set(limiter)
+    try:
+        yield
+    finally:
+        _limiter.reset(token)
+
+
+def wait(requests: int = 1) -> None:
+    """
+    Wait for the current rate limiter, if any, before making the given number of requests.
+    """
+    limiter = _limiter.get()
+    if limiter is not None:
+        limiter.wait(requests)
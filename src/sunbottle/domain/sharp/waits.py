@@ -0,0 +1,136 @@
+"""
+Poll the Sharp pages for the condition we actually need instead of sleeping for a fixed time.
+
+Every wait is timed and the totals are kept per step, so slow steps show up in the logs.
+"""
+from __future__ import annotations
+
+import collections
+import datetime
+import logging
+import re
+import threading
+import time
+from typing import Any, Callable, Optional
+
+from django.conf import settings
+from selenium import webdriver
+from selenium.common import exceptions
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.wait import WebDriverWait
+
+logger = logging.getLogger(__name__)
+
+# Set on the window before changing the date; it disappears once the page has reloaded with the new date.
+STALE_PAGE_MARKER = "sunbottleStalePage"
+
+_totals: dict[str, float] = collections.defaultdict(float)
+_totals_lock = threading.Lock()
+
+
+class WaitTimeout(Exception):
+    """
+    Raised when a page doesn't reach the expected state in time.
+    """
+
+
+def wait_until(
+    browser: webdriver.Firefox,
+    condition: Callable[[webdriver.Firefox], Any],
+    step: str,
+    timeout: Optional[float] = None,
+) -> Any:
+    """
+    Poll condition until it returns something truthy and return that value.
+    """
+    timeout = timeout or settings.SHARP_WAIT_TIMEOUT
+    started = time.monotonic()
+    try:
+        return WebDriverWait(
+            browser,
+            timeout,
+            poll_frequency=settings.SHARP_WAIT_POLL_INTERVAL,
+            ignored_exceptions=[exceptions.JavascriptException, exceptions.NoSuchElementException],
+        ).until(condition)
+    except exceptions.TimeoutException:
+        raise WaitTimeout(f"Timed out after {timeout}s waiting for {step}")
+    finally:
+        _record(step, time.monotonic() - started)
+
+
+def get_wait_totals() -> dict[str, float]:
+    """
+    Return the seconds spent waiting on each step since the last reset.
+    """
+    with _totals_lock:
+        return dict(_totals)
+
+
+def reset_wait_totals() -> None:
+    with _totals_lock:
+        _totals.clear()
+
+
+def page_settled(browser: webdriver.Firefox) -> bool:
+    """
+    The page finished loading and landed on either the login form or a page with data.
+    """
+    if browser.execute_script("return document.readyState") != "complete":
+        return False
+    return login_form_present(browser) or data_ready(browser)
+
+
+def login_form_present(browser: webdriver.Firefox) -> bool:
+    return bool(browser.find_elements(By.NAME, "memberId"))
+
+
+def logged_in(browser: webdriver.Firefox) -> bool:
+    """
+    The login form has gone and the page we were redirected to has its data.
+    """
+    return not login_form_present(browser) and data_ready(browser)
+
+
+def data_ready(browser: webdriver.Firefox, date: Optional[datetime.date] = None) -> bool:
+    """
+    onRenderResult.object holds data and the page isn't the one we were on before changing the date.
+
+    If a date is given the page must also have rendered that date, see SHARP_RENDERED_DATE_EXPRESSION, so the data of
+    whatever date the session was on before isn't taken for it.
+    """
+    ready = browser.execute_script(
+        """
+        return typeof window.%s === "undefined"
+            && typeof onRenderResult !== "undefined"
+            && onRenderResult.object !== undefined
+            && onRenderResult.object !== null;
+        """
+        % STALE_PAGE_MARKER
+    )
+    if not ready or date is None:
+        return bool(ready)
+    return get_rendered_date(browser) == date
+
+
+def get_rendered_date(browser: webdriver.Firefox) -> Optional[datetime.date]:
+    """
+    Return the date the page rendered, or None if it doesn't show one.
+    """
+    rendered = browser.execute_script(f"return {settings.SHARP_RENDERED_DATE_EXPRESSION}")
+    # Sharp writes dates as 2023/06/01, but don't depend on the separator or zero padding.
+    parts = re.findall(r"\d+", str(rendered or ""))
+    if len(parts) != 3:
+        return None
+    try:
+        return datetime.date(*map(int, parts))
+    except ValueError:
+        return None
+
+
+def _record(step: str, elapsed: float) -> None:
+    with _totals_lock:
+        _totals[step] += elapsed
+    if elapsed >= settings.SHARP_SLOW_WAIT_SECONDS:
+        logger.warning("Waited %.1fs for %s", elapsed, step)
+    else:
+        logger.debug("Waited %.1fs for %s", elapsed, step)
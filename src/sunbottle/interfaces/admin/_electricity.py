@@ -1,10 +1,45 @@
 from django.contrib import admin
 
 from sunbottle.data.electricity import models
+from sunbottle.domain.electricity import operations as electricity_ops
 
 admin.site.register(models.Generator)
 admin.site.register(models.Battery)
-admin.site.register(models.GenerationReading)
-admin.site.register(models.ElectricitySale)
-admin.site.register(models.ElectricityPurchase)
-admin.site.register(models.BatteryLevelReading)
+
+
+@admin.register(
+    models.GenerationReading,
+    models.ElectricitySale,
+    models.ElectricityPurchase,
+    models.BatteryLevelReading,
+    models.ConsumptionReading,
+)
+class ReadingAdmin(admin.ModelAdmin):
+    def save_model(self, request, obj, form, change):
+        electricity_ops.save_reading(obj)
+
+    def delete_model(self, request, obj):
+        electricity_ops.delete_readings(type(obj).objects.filter(pk=obj.pk))
+
+    def delete_queryset(self, request, queryset):
+        electricity_ops.delete_readings(queryset)
+
+
+admin.site.register(models.Rollup)
+admin.site.register(models.LifetimeTotal)
+admin.site.register(models.BillingPeriodSnapshot)
+admin.site.register(models.Charge)
+admin.site.register(models.Holiday)
+
+
+class TariffTierInline(admin.TabularInline):
+    model = models.TariffTier
+
+
+class TariffBandInline(admin.TabularInline):
+    model = models.TariffBand
+
+
+@admin.register(models.Tariff)
+class TariffAdmin(admin.ModelAdmin):
+    inlines = [TariffTierInline, TariffBandInline]
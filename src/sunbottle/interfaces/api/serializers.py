@@ -1,5 +1,7 @@
 from rest_framework import serializers
 
+from sunbottle.domain.electricity import export, retention
+
 
 class NormalizedDecimalField(serializers.DecimalField):
     def validate_precision(self, value):
@@ -29,3 +31,41 @@ class LineGraph(serializers.Serializer):
 class GenerationSummary(serializers.Serializer):
     total_generation = NormalizedDecimalField(max_digits=10, decimal_places=3, required=True)
     today_generation = NormalizedDecimalField(max_digits=10, decimal_places=3, required=True)
+
+
+class DayTotals(serializers.Serializer):
+    generation = NormalizedDecimalField(max_digits=10, decimal_places=3, required=True)
+    consumption = NormalizedDecimalField(max_digits=10, decimal_places=3, required=True)
+    bought = NormalizedDecimalField(max_digits=10, decimal_places=3, required=True)
+    sold = NormalizedDecimalField(max_digits=10, decimal_places=3, required=True)
+
+
+class BatteryCharge(serializers.Serializer):
+    name = serializers.CharField()
+    capacity = NormalizedDecimalField(max_digits=6, decimal_places=2, required=True)
+    charge = NormalizedDecimalField(max_digits=6, decimal_places=3, required=True)
+
+
+class Dashboard(serializers.Serializer):
+    date = serializers.DateField()
+    today = DayTotals()
+    yesterday = DayTotals()
+    last_year = DayTotals()
+    total_generation = NormalizedDecimalField(max_digits=12, decimal_places=3, required=True)
+    batteries = BatteryCharge(many=True)
+    fit = serializers.IntegerField()
+
+
+class ExportParameters(serializers.Serializer):
+    kind = serializers.ChoiceField(choices=list(retention.SOURCES))
+    start = serializers.DateField()
+    end = serializers.DateField(help_text="Exclusive.")
+    format = serializers.ChoiceField(choices=export.FORMATS, default=export.CSV)
+    resolution = serializers.ChoiceField(choices=export.RESOLUTIONS, default=export.RAW)
+
+    def validate(self, attrs):
+        if attrs["start"] >= attrs["end"]:
+            raise serializers.ValidationError("start must be before end.")
+        if attrs["resolution"] != export.RAW and not retention.SOURCES[attrs["kind"]].rollup:
+            raise serializers.ValidationError(f"{attrs['kind']} can only be exported raw.")
+        return attrs
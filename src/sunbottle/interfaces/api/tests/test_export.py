@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import datetime
+import gzip
+
+from django.contrib.auth import get_user_model
+from django.test import TransactionTestCase
+
+from sunbottle.domain.electricity import consumption
+from sunbottle.domain.electricity import operations as electricity_ops
+
+URL = "/api/v1/export/consumption/"
+PARAMETERS = {"start": "2023-06-01", "end": "2023-06-02", "format": "csv", "resolution": "raw"}
+
+
+class ExportReadingsViewTests(TransactionTestCase):
+    # The view reads through the read-only connection, which only sees committed rows.
+    databases = {"default", "readonly"}
+    serialized_rollback = True
+
+    def setUp(self) -> None:
+        start = datetime.datetime(2023, 6, 1)
+        electricity_ops.record_consumption_readings(
+            [
+                consumption.ConsumptionReading(occurred_at=start + datetime.timedelta(minutes=15 * n), wh=n)
+                for n in range(96)
+            ]
+        )
+        self.staff = get_user_model().objects.create_user("staff", is_staff=True)
+
+    def test_staff_get_a_csv_stream(self) -> None:
+        self.client.force_login(self.staff)
+
+        response = self.client.get(URL, PARAMETERS)
+
+        self.assertEqual(200, response.status_code)
+        self.assertTrue(response.streaming)
+        self.assertEqual("text/csv", response["Content-Type"])
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(["occurred_at,wh", "2023-06-01 00:00:00,0"], lines[:2])
+        self.assertEqual(97, len(lines))
+
+    def test_the_stream_is_gzipped_when_accepted(self) -> None:
+        self.client.force_login(self.staff)
+
+        response = self.client.get(URL, PARAMETERS, HTTP_ACCEPT_ENCODING="gzip, deflate")
+
+        self.assertEqual("gzip", response["Content-Encoding"])
+        lines = gzip.decompress(b"".join(response.streaming_content)).decode().splitlines()
+        self.assertEqual("2023-06-01 23:45:00,95", lines[-1])
+
+    def test_only_staff_can_export(self) -> None:
+        self.assertEqual(302, self.client.get(URL, PARAMETERS).status_code)
+
+        self.client.force_login(get_user_model().objects.create_user("visitor"))
+        self.assertEqual(302, self.client.get(URL, PARAMETERS).status_code)
+
+    def test_invalid_parameters_are_rejected(self) -> None:
+        self.client.force_login(self.staff)
+
+        response = self.client.get(URL, {**PARAMETERS, "resolution": "fortnight"})
+
+        self.assertEqual(400, response.status_code)
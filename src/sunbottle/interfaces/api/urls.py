@@ -1,8 +1,12 @@
 from django.urls import path
 
+from sunbottle.interfaces.decorators import read_only_view
+
 from . import views
 
 urlpatterns = [
-    path("generation_line_chart/", views.get_generation_line_graph, name="generation_line_chart"),
-    path("generation_summary/", views.get_generation_summary, name="generation_summary"),
+    path("generation_line_chart/", read_only_view(views.get_generation_line_graph), name="generation_line_chart"),
+    path("generation_summary/", read_only_view(views.get_generation_summary), name="generation_summary"),
+    path("dashboard/", read_only_view(views.get_dashboard), name="dashboard"),
+    path("export/<str:kind>/", read_only_view(views.export_readings), name="export_readings"),
 ]
@@ -2,8 +2,12 @@ from typing import Iterable
 
 import arrow
 from django import http
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.utils import cache
 
-from sunbottle.domain.electricity import queries
+from sunbottle.domain.electricity import dashboard as electricity_dashboard
+from sunbottle.domain.electricity import export, queries
 
 from . import serializers
 
@@ -15,16 +19,19 @@ def get_generation_line_graph(request: http.HttpRequest) -> http.JsonResponse:
 
     generation = queries.get_generation_series_for_date(yesterday.datetime)
     generation_today = queries.get_generation_series_for_date(today.datetime, exclude_future=True)
-    generation_today_last_year = queries.get_generation_series_for_date(today_last_year.datetime)
+    generation_today_last_year = queries.get_generation_series_for_date(today_last_year.datetime, include_archived=True)
     data = serializers.LineGraphData(
         data={
             "labels": list(_get_15_minute_interval_labels()),
             "yesterday": {
                 "label": "Yesterday",
-                "data": list(generation),
+                "data": [queries.wh_to_kwh(wh) for wh in generation],
+            },
+            "today": {"label": "Today", "data": [queries.wh_to_kwh(wh) for wh in generation_today]},
+            "last_year_today": {
+                "label": "One Year Ago Today",
+                "data": [queries.wh_to_kwh(wh) for wh in generation_today_last_year],
             },
-            "today": {"label": "Today", "data": list(generation_today)},
-            "last_year_today": {"label": "One Year Ago Today", "data": list(generation_today_last_year)},
         }
     )
     if data.is_valid():
@@ -36,8 +43,42 @@ def get_generation_summary(request: http.HttpRequest) -> http.JsonResponse:
     today = arrow.now().floor("day").datetime
     data = serializers.GenerationSummary(
         data={
-            "total_generation": queries.get_total_generation(),
-            "today_generation": queries.get_generation_for_date(today),
+            "total_generation": queries.wh_to_kwh(queries.get_total_generation()),
+            "today_generation": queries.wh_to_kwh(queries.get_generation_for_date(today)),
+        }
+    )
+    if data.is_valid():
+        return http.JsonResponse(data=data.validated_data)
+    return http.JsonResponse(data={"error": data.errors})
+
+
+def get_dashboard(request: http.HttpRequest) -> http.JsonResponse:
+    """
+    Return what the dashboard shows, in kWh.
+    """
+    dashboard = electricity_dashboard.get_dashboard_snapshot()
+    data = serializers.Dashboard(
+        data={
+            "date": dashboard.date,
+            **{
+                name: {
+                    "generation": queries.wh_to_kwh(totals.generation),
+                    "consumption": queries.wh_to_kwh(totals.consumption),
+                    "bought": queries.wh_to_kwh(totals.purchase),
+                    "sold": queries.wh_to_kwh(totals.sale),
+                }
+                for name, totals in [
+                    ("today", dashboard.today),
+                    ("yesterday", dashboard.yesterday),
+                    ("last_year", dashboard.last_year),
+                ]
+            },
+            "total_generation": queries.wh_to_kwh(dashboard.total_generation),
+            "batteries": [
+                {"name": battery.name, "capacity": battery.capacity, "charge": battery.charge}
+                for battery in dashboard.batteries
+            ],
+            "fit": settings.FIT,
         }
     )
     if data.is_valid():
@@ -45,6 +86,32 @@ def get_generation_summary(request: http.HttpRequest) -> http.JsonResponse:
     return http.JsonResponse(data={"error": data.errors})
 
 
+@staff_member_required
+def export_readings(request: http.HttpRequest, kind: str) -> http.HttpResponse:
+    """
+    Stream a kind of reading between two dates as CSV or NDJSON, gzipped if the client accepts it.
+
+    Staff only, as a long range is a lot of work for the server.
+    """
+    parameters = serializers.ExportParameters(data={"kind": kind, **request.GET.dict()})
+    if not parameters.is_valid():
+        return http.JsonResponse(data={"error": parameters.errors}, status=400)
+    options = parameters.validated_data
+
+    columns, rows = export.get_rows(options["kind"], options["start"], options["end"], options["resolution"])
+    lines = export.encode(columns, rows, options["format"])
+    filename = f"{kind}-{options['resolution']}-{options['start']}-{options['end']}.{options['format']}"
+    if "gzip" in request.headers.get("Accept-Encoding", ""):
+        response = http.StreamingHttpResponse(export.gzip_stream(lines))
+        response["Content-Encoding"] = "gzip"
+    else:
+        response = http.StreamingHttpResponse(lines)
+    response["Content-Type"] = export.CONTENT_TYPES[options["format"]]
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    cache.patch_vary_headers(response, ["Accept-Encoding"])
+    return response
+
+
 def _get_15_minute_interval_labels() -> Iterable[str]:
     for hour in range(0, 24):
         for interval in [0, 15, 30, 45]:
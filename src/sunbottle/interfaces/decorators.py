@@ -0,0 +1,20 @@
+import functools
+
+from sunbottle.data import routers
+
+
+def read_only_view(view):
+    """
+    Serve the view, including rendering its template, from the read-only database connection.
+    """
+
+    @functools.wraps(view)
+    def wrapped(request, *args, **kwargs):
+        with routers.read_only():
+            response = view(request, *args, **kwargs)
+            # Template responses are rendered after the view returns, so render here while reads are still routed.
+            if hasattr(response, "render") and not response.is_rendered:
+                response.render()
+        return response
+
+    return wrapped
@@ -0,0 +1,51 @@
+"""
+Helpers shared by the benchmark_* management commands.
+
+Benchmarks run against the configured database inside a transaction that is always rolled back, so they can be
+pointed at a copy of production data without leaving anything behind.
+"""
+import contextlib
+import time
+from dataclasses import dataclass, field
+from typing import Iterator
+
+from django.db import connection, transaction
+
+
+@dataclass
+class Timing:
+    label: str
+    seconds: float = 0.0
+    queries: int = 0
+    extra: dict = field(default_factory=dict)
+
+    def __str__(self) -> str:
+        details = "".join(f", {key}={value}" for key, value in self.extra.items())
+        return f"{self.label}: {self.seconds * 1000:.1f} ms, {self.queries} queries{details}"
+
+
+@contextlib.contextmanager
+def rolled_back() -> Iterator[None]:
+    """
+    Run the block in a transaction that is always rolled back.
+    """
+    with transaction.atomic():
+        yield
+        transaction.set_rollback(True)
+
+
+@contextlib.contextmanager
+def timed(label: str) -> Iterator[Timing]:
+    """
+    Time the block and count the queries it issues.
+    """
+    timing = Timing(label=label)
+
+    def count(execute, sql, params, many, context):
+        timing.queries += 1
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(count):
+        started = time.perf_counter()
+        yield timing
+        timing.seconds = time.perf_counter() - started
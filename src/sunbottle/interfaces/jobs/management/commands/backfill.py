@@ -0,0 +1,41 @@
+import datetime
+
+from django.core.management.base import BaseCommand
+
+from sunbottle.application.scrape import backfill
+from sunbottle.data.scrape import models as scrape_models
+
+
+class Command(BaseCommand):
+    help = "Scrape a range of dates in parallel. Interrupted backfills continue where they stopped."
+
+    def add_arguments(self, parser):
+        parser.add_argument("start", metavar="start", type=datetime.date.fromisoformat)
+        parser.add_argument("end", metavar="end", type=datetime.date.fromisoformat, help="Exclusive.")
+        parser.add_argument(
+            "--metrics",
+            nargs="+",
+            choices=scrape_models.Metric.values,
+            default=scrape_models.Metric.values,
+        )
+        parser.add_argument("--workers", type=int, default=1)
+        parser.add_argument("--restart", action="store_true", help="Scrape dates that were already backfilled.")
+
+    def handle(self, *args, **options):
+        """ """
+        result = backfill(
+            options["start"],
+            options["end"],
+            options["metrics"],
+            workers=options["workers"],
+            restart=options["restart"],
+        )
+        self.stdout.write(
+            f"Scraped {result.scraped}, skipped {result.skipped} already backfilled, {len(result.failed)} failed. "
+            f"{result.scrape.ingest.inserted} readings inserted, {result.scrape.ingest.updated} updated, "
+            f"{result.scrape.readings_skipped} unchanged readings skipped."
+        )
+        for step, seconds in sorted(result.waits.items()):
+            self.stdout.write(f"Waited {seconds:.1f}s for {step}")
+        for metric, date in result.failed:
+            self.stderr.write(f"Failed: {metric} {date}")
@@ -0,0 +1,37 @@
+import datetime
+
+from dateutil.relativedelta import relativedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from sunbottle.domain.electricity import queries, rates
+from sunbottle.interfaces.jobs import benchmarks
+
+
+class Command(BaseCommand):
+    help = "Check that computing billing period stats takes the same number of queries however old the account is."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--years",
+            type=int,
+            nargs="+",
+            default=[1, 2, 4],
+            help="Account ages to compare, within the configured rate history.",
+        )
+
+    def handle(self, *args, **options):
+        """ """
+        # Compile the rates up front so the first run isn't charged for it.
+        rates.get_rate_table()
+        counts = set()
+        for years in options["years"]:
+            first_period_start = datetime.date.today() - relativedelta(years=years)
+            with override_settings(FIRST_BILLING_PERIOD_START=first_period_start):
+                with benchmarks.timed(f"{years} years") as timing:
+                    periods = queries.get_billing_period_stats()
+            timing.extra.update(periods=len(periods))
+            self.stdout.write(str(timing))
+            counts.add(timing.queries)
+        if len(counts) > 1:
+            raise CommandError(f"Query count grew with the number of billing periods: {sorted(counts)}")
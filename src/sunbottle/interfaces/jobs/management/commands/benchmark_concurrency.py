@@ -0,0 +1,101 @@
+import datetime
+import random
+import statistics
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test import RequestFactory
+from django.urls import resolve
+
+from sunbottle.data.electricity import models
+from sunbottle.domain.electricity import generation
+from sunbottle.domain.electricity import operations as electricity_ops
+from sunbottle.interfaces.jobs import benchmarks
+
+
+class Command(BaseCommand):
+    help = "Measure dashboard latency while idle and while a backfill-sized write transaction is open."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--readers", type=int, default=4, help="Concurrent dashboard requests.")
+        parser.add_argument("--requests", type=int, default=100, help="Requests per reader.")
+        parser.add_argument("--days", type=int, default=7, help="Days of readings written per transaction.")
+        parser.add_argument("--path", default="/", help="Page to request.")
+
+    def handle(self, *args, **options):
+        """ """
+        view = resolve(options["path"]).func
+
+        latencies = self.read(view, options)
+        self.stdout.write(_summarize("idle", latencies))
+
+        stop = threading.Event()
+        transactions = []
+        writer = threading.Thread(target=_write, args=(stop, options["days"], transactions))
+        writer.start()
+        try:
+            latencies = self.read(view, options)
+        finally:
+            stop.set()
+            writer.join()
+        self.stdout.write(_summarize(f"writing ({len(transactions)} transactions, all rolled back)", latencies))
+        if transactions:
+            self.stdout.write(f"write transactions held for {statistics.mean(transactions) * 1000:.1f} ms on average")
+
+    def read(self, view, options) -> list[float]:
+        with ThreadPoolExecutor(max_workers=options["readers"]) as executor:
+            results = executor.map(lambda _: _request(view, options), range(options["readers"]))
+        return [latency for latencies in results for latency in latencies]
+
+
+def _request(view, options) -> list[float]:
+    factory = RequestFactory()
+    latencies = []
+    try:
+        for _ in range(options["requests"]):
+            started = time.perf_counter()
+            view(factory.get(options["path"]))
+            latencies.append(time.perf_counter() - started)
+    finally:
+        connections.close_all()
+    return latencies
+
+
+def _write(stop: threading.Event, days: int, transactions: list[float]) -> None:
+    """
+    Repeatedly ingest days of readings in one transaction, as a backfill does, and roll them back.
+    """
+    try:
+        while not stop.is_set():
+            started = time.perf_counter()
+            with benchmarks.rolled_back():
+                generator = models.Generator.objects.create(name=f"benchmark-{uuid.uuid4()}")
+                for n in range(days):
+                    electricity_ops.record_generation_readings(
+                        generator, _synthetic_day(datetime.date(2022, 1, 1) + datetime.timedelta(days=n))
+                    )
+            transactions.append(time.perf_counter() - started)
+    finally:
+        connections.close_all()
+
+
+def _summarize(label: str, latencies: list[float]) -> str:
+    latencies = sorted(latencies)
+    p50 = latencies[len(latencies) // 2]
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    return f"{label}: p50={p50 * 1000:.1f} ms, p99={p99 * 1000:.1f} ms, max={latencies[-1] * 1000:.1f} ms"
+
+
+def _synthetic_day(date: datetime.date) -> list[generation.GenerationReading]:
+    start = datetime.datetime(date.year, date.month, date.day)
+    return [
+        generation.GenerationReading(
+            occurred_at=start + datetime.timedelta(minutes=15 * n),
+            wh=random.randint(0, 1500),
+        )
+        for n in range(96)
+    ]
@@ -0,0 +1,32 @@
+import datetime
+
+from dateutil.relativedelta import relativedelta
+from django.core.management.base import BaseCommand
+
+from sunbottle.domain.electricity import dashboard, queries
+from sunbottle.interfaces.jobs import benchmarks
+
+
+class Command(BaseCommand):
+    help = "Compare collecting the dashboard with a lookup per figure against the dashboard snapshot."
+
+    def handle(self, *args, **options):
+        """ """
+        today = datetime.date.today()
+        yesterday = today - datetime.timedelta(days=1)
+        last_year = yesterday - relativedelta(years=1)
+
+        with benchmarks.timed("per figure") as timing:
+            queries.get_total_generation()
+            for date in [today, yesterday, last_year]:
+                queries.get_generation_for_date(date)
+                queries.get_consumption_for_date(date)
+            queries.get_purchasing_for_date(today)
+            queries.get_selling_for_date(today)
+            for battery in queries.get_batteries():
+                queries.get_charge_for_battery(battery)
+        self.stdout.write(str(timing))
+
+        with benchmarks.timed("snapshot") as timing:
+            dashboard.get_dashboard_snapshot(today)
+        self.stdout.write(str(timing))
@@ -0,0 +1,52 @@
+import datetime
+import random
+
+from django.core.management.base import BaseCommand
+from django.db.models import Sum
+
+from sunbottle.data.electricity import models
+from sunbottle.interfaces.jobs import benchmarks
+
+
+class Command(BaseCommand):
+    help = "Compare daily lookups filtering on occurred_at__date with the indexed occurred_on column."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--years", type=int, default=5, help="Years of 15 minute readings to generate.")
+        parser.add_argument("--lookups", type=int, default=100, help="Number of random days to look up.")
+
+    def handle(self, *args, **options):
+        """ """
+        start = datetime.date(2018, 1, 1)
+        days = [start + datetime.timedelta(days=n) for n in range(365 * options["years"])]
+        lookups = random.sample(days, min(options["lookups"], len(days)))
+
+        with benchmarks.rolled_back():
+            with benchmarks.timed("generate") as timing:
+                for day in days:
+                    models.ConsumptionReading.objects.bulk_create(_synthetic_day(day))
+            timing.extra.update(rows=len(days) * 96)
+            self.stdout.write(str(timing))
+
+            for label, lookup in [("occurred_at__date", "occurred_at__date"), ("occurred_on", "occurred_on")]:
+                qs = models.ConsumptionReading.objects.filter(**{lookup: lookups[0]})
+                self.stdout.write(f"{label} plan: {qs.explain()}")
+                with benchmarks.timed(label) as timing:
+                    for day in lookups:
+                        models.ConsumptionReading.objects.filter(**{lookup: day}).aggregate(total=Sum("wh"))
+                self.stdout.write(str(timing))
+
+
+def _synthetic_day(date: datetime.date) -> list[models.ConsumptionReading]:
+    start = datetime.datetime(date.year, date.month, date.day)
+    readings = []
+    for n in range(96):
+        occurred_at = start + datetime.timedelta(minutes=15 * n)
+        readings.append(
+            models.ConsumptionReading(
+                occurred_at=occurred_at,
+                occurred_on=date,
+                wh=random.randint(0, 1500),
+            )
+        )
+    return readings
@@ -0,0 +1,58 @@
+import datetime
+import decimal
+import random
+from collections import deque
+
+from django.core.management.base import BaseCommand
+
+from sunbottle.domain.electricity import consumption
+from sunbottle.domain.sharp import queries
+from sunbottle.interfaces.jobs import benchmarks
+
+
+class Command(BaseCommand):
+    help = "Compare decoding Sharp payloads for a multi-year backfill with the old per-slot loop."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--years", type=int, default=3)
+
+    def handle(self, *args, **options):
+        """ """
+        start = datetime.date(2020, 1, 1)
+        dates = [start + datetime.timedelta(days=n) for n in range(365 * options["years"])]
+        payloads = [_synthetic_payload() for _ in dates]
+        now = datetime.datetime(start.year + options["years"] + 1, 1, 1)
+        queries.get_interval_grid.cache_clear()
+
+        with benchmarks.timed("per-slot loop") as timing:
+            for date, payload in zip(dates, payloads):
+                _legacy_consumption_to_reading(payload, date, now)
+        self.stdout.write(str(timing))
+
+        with benchmarks.timed("interval grid") as timing:
+            for date, payload in zip(dates, payloads):
+                queries.sharp_consumption_to_reading(payload, date, now=now)
+        self.stdout.write(str(timing))
+
+
+def _legacy_consumption_to_reading(data: list[float], date: datetime.date, now: datetime.datetime) -> list:
+    """
+    The decoding loop used before the interval grid, kept here as the baseline.
+    """
+    data = deque(data)
+    readings = []
+    for hour in range(0, 24):
+        for interval in [0, 15, 30, 45]:
+            consumed_at = datetime.datetime(year=date.year, month=date.month, day=date.day, hour=hour, minute=interval)
+            if consumed_at > now:
+                continue
+            readings.append(
+                consumption.ConsumptionReading(
+                    occurred_at=consumed_at, wh=round(decimal.Decimal(str(data.popleft())) * 1000)
+                )
+            )
+    return readings
+
+
+def _synthetic_payload() -> list[float]:
+    return [round(random.choice([0, 0, random.random() * 1.5]), 3) for _ in range(96)]
@@ -0,0 +1,64 @@
+import datetime
+import random
+import uuid
+
+from django.core.management.base import BaseCommand
+
+from sunbottle.data.electricity import models
+from sunbottle.domain.electricity import generation
+from sunbottle.domain.electricity import operations as electricity_ops
+from sunbottle.interfaces.jobs import benchmarks
+
+
+class Command(BaseCommand):
+    help = "Compare the bulk ingest path with the old per-row update_or_create loop."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=30, help="Days of 15 minute readings to ingest.")
+
+    def handle(self, *args, **options):
+        """ """
+        days = [datetime.date(2022, 1, 1) + datetime.timedelta(days=n) for n in range(options["days"])]
+        batches = [_synthetic_day(date) for date in days]
+        changed = [_synthetic_day(date) for date in days]
+
+        with benchmarks.rolled_back():
+            generator = models.Generator.objects.create(name=f"benchmark-{uuid.uuid4()}")
+            for label, readings in [("insert", batches), ("unchanged", batches), ("update", changed)]:
+                with benchmarks.timed(f"update_or_create {label}") as timing:
+                    for batch in readings:
+                        _record_per_row(generator, batch)
+                self.stdout.write(str(timing))
+
+        with benchmarks.rolled_back():
+            generator = models.Generator.objects.create(name=f"benchmark-{uuid.uuid4()}")
+            for label, readings in [("insert", batches), ("unchanged", batches), ("update", changed)]:
+                with benchmarks.timed(f"bulk upsert {label}") as timing:
+                    result = electricity_ops.IngestResult()
+                    for batch in readings:
+                        result += electricity_ops.record_generation_readings(generator, batch)
+                timing.extra.update(inserted=result.inserted, updated=result.updated, unchanged=result.unchanged)
+                self.stdout.write(str(timing))
+
+
+def _record_per_row(generator: models.Generator, readings: list[generation.GenerationReading]) -> None:
+    """
+    The ingest loop used before the bulk path, kept here as the baseline.
+    """
+    for reading in readings:
+        models.GenerationReading.objects.update_or_create(
+            generator=generator,
+            occurred_at=reading.occurred_at,
+            defaults={"wh": reading.wh},
+        )
+
+
+def _synthetic_day(date: datetime.date) -> list[generation.GenerationReading]:
+    start = datetime.datetime(date.year, date.month, date.day)
+    return [
+        generation.GenerationReading(
+            occurred_at=start + datetime.timedelta(minutes=15 * interval),
+            wh=random.randint(0, 1500),
+        )
+        for interval in range(96)
+    ]
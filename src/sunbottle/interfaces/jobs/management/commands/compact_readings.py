@@ -0,0 +1,35 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from sunbottle.domain.electricity import retention
+
+
+class Command(BaseCommand):
+    help = (
+        "Drop, pack and archive readings past their retention periods, drop old hourly rollups and reclaim the space."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--kinds",
+            nargs="+",
+            choices=list(retention.SOURCES),
+            default=[kind for kind in retention.SOURCES if kind in settings.RETENTION_POLICIES],
+        )
+        parser.add_argument("--no-vacuum", action="store_true", help="Don't rebuild the database file afterwards.")
+
+    def handle(self, *args, **options):
+        """ """
+        total = retention.CompactionResult()
+        for kind in options["kinds"]:
+            result = retention.compact(kind)
+            self.stdout.write(
+                f"{kind}: dropped the rows of {result.dropped_readings} packed readings, archived "
+                f"{result.archived_readings} readings from {result.archived_days} days to {len(result.files)} files, "
+                f"deleted {result.deleted_hourly_rollups} hourly rollups."
+            )
+            total += result
+        if not options["no_vacuum"] and (
+            total.dropped_readings or total.archived_readings or total.deleted_hourly_rollups
+        ):
+            retention.reclaim_space()
@@ -0,0 +1,36 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from sunbottle.domain.electricity import export, retention
+
+
+class Command(BaseCommand):
+    help = "Stream a kind of reading between two dates to a CSV or NDJSON file, gzipped if it ends in .gz."
+
+    def add_arguments(self, parser):
+        parser.add_argument("kind", choices=list(retention.SOURCES))
+        parser.add_argument("start", metavar="start", type=datetime.date.fromisoformat)
+        parser.add_argument("end", metavar="end", type=datetime.date.fromisoformat, help="Exclusive.")
+        parser.add_argument("--format", choices=export.FORMATS, default=export.CSV)
+        parser.add_argument("--resolution", choices=export.RESOLUTIONS, default=export.RAW)
+        parser.add_argument("--output", default="-", help="File to write to, - for stdout.")
+
+    def handle(self, *args, **options):
+        """ """
+        try:
+            columns, rows = export.get_rows(options["kind"], options["start"], options["end"], options["resolution"])
+        except ValueError as e:
+            raise CommandError(e)
+        lines = export.encode(columns, rows, options["format"])
+
+        if options["output"] == "-":
+            for line in lines:
+                self.stdout.write(line, ending="")
+        elif options["output"].endswith(".gz"):
+            with open(options["output"], "wb") as f:
+                for data in export.gzip_stream(lines):
+                    f.write(data)
+        else:
+            with open(options["output"], "w", newline="") as f:
+                f.writelines(lines)
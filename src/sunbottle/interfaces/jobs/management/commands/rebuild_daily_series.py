@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from sunbottle.domain.electricity import operations as electricity_ops
+
+
+class Command(BaseCommand):
+    help = "Repack every series' DailySeries rows from the readings still in their tables."
+
+    def handle(self, *args, **options):
+        """ """
+        written = electricity_ops.rebuild_daily_series()
+        self.stdout.write(f"Packed {written} series days.")
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from sunbottle.data.electricity import models
+from sunbottle.domain.electricity import operations as electricity_ops
+
+
+class Command(BaseCommand):
+    help = "Recompute the hourly, daily and monthly rollups from the raw readings."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--metrics",
+            nargs="+",
+            choices=models.RollupMetric.values,
+            default=models.RollupMetric.values,
+        )
+
+    def handle(self, *args, **options):
+        """ """
+        for metric in options["metrics"]:
+            days = electricity_ops.rebuild_rollups(metric)
+            self.stdout.write(f"Rebuilt {metric} rollups for {days} days.")
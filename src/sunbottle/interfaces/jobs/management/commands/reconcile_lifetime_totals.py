@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from sunbottle.data.electricity import models
+from sunbottle.domain.electricity import operations as electricity_ops
+
+
+class Command(BaseCommand):
+    help = "Check the lifetime totals against the readings, including archived ones, and correct any that are off."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--metrics",
+            nargs="+",
+            choices=models.RollupMetric.values,
+            default=models.RollupMetric.values,
+        )
+        parser.add_argument("--check", action="store_true", help="Only report, exiting with an error if any are off.")
+
+    def handle(self, *args, **options):
+        """ """
+        incorrect = []
+        for metric in options["metrics"]:
+            reconciliation = electricity_ops.reconcile_lifetime_total(metric, repair=not options["check"])
+            if reconciliation.correct:
+                self.stdout.write(f"{metric}: {reconciliation.actual} Wh")
+                continue
+            incorrect.append(metric)
+            action = "is" if options["check"] else "was"
+            self.stdout.write(
+                f"{metric}: {action} {reconciliation.recorded} Wh, should be {reconciliation.actual} Wh "
+                f"({reconciliation.actual - reconciliation.recorded:+} Wh)"
+            )
+        if incorrect and options["check"]:
+            raise CommandError(f"Lifetime totals are off for {', '.join(incorrect)}")
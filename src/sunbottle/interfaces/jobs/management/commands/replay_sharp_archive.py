@@ -0,0 +1,30 @@
+import datetime
+
+from django.core.management.base import BaseCommand
+
+from sunbottle.application.scrape import replay
+from sunbottle.data.scrape import models as scrape_models
+
+
+class Command(BaseCommand):
+    help = "Rebuild readings for a range of dates from the archived Sharp payloads."
+
+    def add_arguments(self, parser):
+        parser.add_argument("start", metavar="start", type=datetime.date.fromisoformat)
+        parser.add_argument("end", metavar="end", type=datetime.date.fromisoformat, help="Exclusive.")
+        parser.add_argument(
+            "--metrics",
+            nargs="+",
+            choices=scrape_models.Metric.values,
+            default=scrape_models.Metric.values,
+        )
+
+    def handle(self, *args, **options):
+        """ """
+        result = replay(options["start"], options["end"], options["metrics"])
+        self.stdout.write(
+            f"Replayed {result.replayed} payloads, {len(result.missing)} missing from the archive. "
+            f"{result.ingest.inserted} readings inserted, {result.ingest.updated} updated."
+        )
+        for metric, date in result.missing:
+            self.stderr.write(f"Missing: {metric} {date}")
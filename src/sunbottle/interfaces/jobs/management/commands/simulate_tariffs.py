@@ -0,0 +1,52 @@
+import json
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from sunbottle.domain.electricity import rates, simulation
+
+
+class Command(BaseCommand):
+    help = "Rank candidate tariffs, charges and feed in tariffs by what the billing history would have cost under them."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "candidates",
+            help=(
+                'JSON file with a list of candidates like {"name": "Flat", "tariff": [[0, null, 25.0]], "fit": 10}. '
+                "Rates that are left out are the recorded ones."
+            ),
+        )
+
+    def handle(self, *args, **options):
+        """ """
+        try:
+            with open(options["candidates"]) as f:
+                candidates = [simulation.Candidate.from_json(data) for data in json.load(f)]
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            raise CommandError(f"Couldn't read candidates: {e}")
+        recorded = simulation.Candidate(name="Recorded rates")
+
+        started = time.perf_counter()
+        try:
+            history = simulation.load_history()
+            if not history.periods:
+                raise CommandError(
+                    f"There is no billing history to simulate yet, the first billing period starts on "
+                    f"{settings.FIRST_BILLING_PERIOD_START}."
+                )
+            results = simulation.simulate(history, [recorded, *candidates])
+        except rates.RateNotFound as e:
+            raise CommandError(e)
+        elapsed = time.perf_counter() - started
+
+        baseline = results[0].net_cost
+        self.stdout.write(f"{'':>4} {'Candidate':<32} {'Net cost':>12} {'Difference':>12}")
+        for position, result in enumerate(simulation.rank(results), start=1):
+            self.stdout.write(
+                f"{position:>4} {result.candidate.name:<32} {result.net_cost:>12,.0f} {result.net_cost - baseline:>+12,.0f}"
+            )
+        self.stdout.write(
+            f"Priced {len(results)} candidates over {len(history.periods)} billing periods in {elapsed * 1000:.1f} ms."
+        )
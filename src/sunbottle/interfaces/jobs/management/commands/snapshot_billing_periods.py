@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from sunbottle.domain.electricity import operations as electricity_ops
+
+
+class Command(BaseCommand):
+    help = "Snapshot the stats of closed billing periods that have settled."
+
+    def handle(self, *args, **options):
+        """ """
+        periods = electricity_ops.snapshot_billing_periods()
+        self.stdout.write(f"Snapshotted {periods} billing periods.")
@@ -1,8 +1,10 @@
 from django.urls import path
 
+from sunbottle.interfaces.decorators import read_only_view
+
 from . import views
 
 urlpatterns = [
-    path("", views.Index.as_view(), name="home"),
-    path("savings/", views.Savings.as_view(), name="savings"),
+    path("", read_only_view(views.Index.as_view()), name="home"),
+    path("savings/", read_only_view(views.Savings.as_view()), name="savings"),
 ]
@@ -1,7 +1,7 @@
-import arrow
 from django.conf import settings
 from django.views import generic
 
+from sunbottle.domain.electricity import dashboard as electricity_dashboard
 from sunbottle.domain.electricity import queries
 
 
@@ -13,59 +13,42 @@ class Index(generic.TemplateView):
 
     def get_context_data(self, **kwargs):
         context_data = super().get_context_data(**kwargs)
-        today = arrow.now().floor("day")
-        yesterday = today.shift(days=-1)
-        last_year = yesterday.shift(years=-1)
-
-        sold_kwh = queries.get_selling_for_date(today.datetime).normalize()
-        total_kwh = queries.get_total_generation()
-
-        yesterday_consumption = queries.get_consumption_for_date(yesterday.datetime)
-        yesterday_generation = queries.get_generation_for_date(yesterday.datetime)
-
-        last_year_consumption = queries.get_consumption_for_date(last_year.datetime)
-        last_year_generation = queries.get_generation_for_date(last_year.datetime)
+        dashboard = electricity_dashboard.get_dashboard_snapshot()
+        sold_kwh = queries.wh_to_kwh(dashboard.today.sale).normalize()
+        total_wh = dashboard.total_generation
 
         context_data.update(
             {
-                "date": today,
-                "buying": queries.get_purchasing_for_date(today.datetime).normalize(),
+                "date": dashboard.date,
+                "buying": queries.wh_to_kwh(dashboard.today.purchase).normalize(),
                 "selling": {
                     "kwh": sold_kwh,
                     "fit": settings.FIT,
                     "price": sold_kwh * settings.FIT,
                 },
                 "generation": {
-                    "yesterday": yesterday_generation.normalize(),
-                    "today": queries.get_generation_for_date(today.datetime).normalize(),
-                    "last_year": last_year_generation.normalize(),
+                    "yesterday": queries.wh_to_kwh(dashboard.yesterday.generation).normalize(),
+                    "today": queries.wh_to_kwh(dashboard.today.generation).normalize(),
+                    "last_year": queries.wh_to_kwh(dashboard.last_year.generation).normalize(),
                 },
                 "consumption": {
-                    "yesterday": yesterday_consumption.normalize(),
-                    "today": queries.get_consumption_for_date(today.datetime).normalize(),
-                    "last_year": last_year_consumption.normalize(),
+                    "yesterday": queries.wh_to_kwh(dashboard.yesterday.consumption).normalize(),
+                    "today": queries.wh_to_kwh(dashboard.today.consumption).normalize(),
+                    "last_year": queries.wh_to_kwh(dashboard.last_year.consumption).normalize(),
                 },
-                "batteries": self.serialize_battery_summaries(),
-                "all_time_kwh": total_kwh.normalize().quantize(10),
+                "batteries": [
+                    {"capacity": battery.capacity, "current_charge": battery.charge.normalize()}
+                    for battery in dashboard.batteries
+                ],
+                "all_time_kwh": queries.wh_to_kwh(total_wh).normalize().quantize(10),
                 "factoids": {
-                    "coffee_total": queries.get_coffee_cups_per_kwh(total_kwh).quantize(10),
-                    "tesla_km": queries.get_tesla_km_for_kwh(total_kwh).quantize(10),
+                    "coffee_total": queries.get_coffee_cups_for_wh(total_wh).quantize(10),
+                    "tesla_km": queries.get_tesla_km_for_wh(total_wh).quantize(10),
                 },
             }
         )
         return context_data
 
-    def serialize_battery_summaries(self):
-        summaries = []
-        for battery in queries.get_batteries():
-            summaries.append(
-                {
-                    "capacity": battery.capacity,
-                    "current_charge": queries.get_charge_for_battery(battery).normalize(),
-                }
-            )
-        return summaries
-
 
 class Savings(generic.TemplateView):
     template_name = "site/savings.html"
@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+from django import http
+from django.db import router
+from django.test import RequestFactory, TestCase
+
+from sunbottle.data import routers
+from sunbottle.data.electricity import models as electricity_models
+from sunbottle.interfaces.decorators import read_only_view
+
+
+class ReadOnlyViewTests(TestCase):
+    def test_reads_are_routed_to_the_read_only_connection_and_writes_to_default(self) -> None:
+        routed = {}
+
+        @read_only_view
+        def view(request: http.HttpRequest) -> http.HttpResponse:
+            routed["read"] = electricity_models.Generator.objects.all().db
+            routed["write"] = router.db_for_write(electricity_models.Generator)
+            routed["saved"] = electricity_models.Generator.objects.create(name="East")._state.db
+            return http.HttpResponse()
+
+        view(RequestFactory().get("/"))
+
+        self.assertEqual(
+            {"read": routers.READ_ONLY_DATABASE, "write": "default", "saved": "default"},
+            routed,
+        )
+
+    def test_reads_outside_the_view_use_default(self) -> None:
+        read_only_view(lambda request: http.HttpResponse())(RequestFactory().get("/"))
+
+        self.assertEqual("default", electricity_models.Generator.objects.all().db)
+
+    def test_nothing_is_migrated_on_the_read_only_connection(self) -> None:
+        self.assertFalse(router.allow_migrate(routers.READ_ONLY_DATABASE, "electricity"))
+        self.assertTrue(router.allow_migrate("default", "electricity"))
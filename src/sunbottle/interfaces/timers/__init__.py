@@ -1,4 +1,4 @@
 try:
-    from . import scrape
+    from . import billing, scrape
 except ModuleNotFoundError:
     pass
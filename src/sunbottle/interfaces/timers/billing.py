@@ -0,0 +1,17 @@
+import logging
+
+from django.core import management
+from uwsgidecorators import rbtimer
+
+logger = logging.getLogger(__name__)
+
+DAY = 60 * 60 * 24
+
+
+@rbtimer(DAY)
+def snapshot_billing_periods(signum) -> None:
+    """
+    Snapshot billing periods once a day, as they settle.
+    """
+    logger.info("Snapshotting billing periods")
+    management.call_command("snapshot_billing_periods")
@@ -1,5 +1,6 @@
 import logging
 
+from django.conf import settings
 from django.core import management
 from uwsgidecorators import rbtimer
 
@@ -8,10 +9,10 @@ logger = logging.getLogger(__name__)
 MINUTE = 60
 
 
-@rbtimer(MINUTE * 30)
+@rbtimer(MINUTE * settings.SCRAPE_INTERVAL_MINUTES)
 def scrape_everything(hoge) -> None:
     """
-    Scrape new data every 30 minutes.
+    Scrape new data every SCRAPE_INTERVAL_MINUTES (30 by default).
     """
     logger.info("Performing hourly scrape")
     logger.info("This gets passed %s", hoge)
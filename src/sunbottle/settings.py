@@ -10,7 +10,6 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.1/ref/settings/
 """
 import datetime
-import decimal
 from pathlib import Path
 
 from envparse import env
@@ -44,6 +43,7 @@ INSTALLED_APPS = [
     "django.contrib.staticfiles",
     "django.contrib.humanize",
     "sunbottle.data.electricity",
+    "sunbottle.data.scrape",
     "sunbottle.interfaces",
     "sunbottle.interfaces.jobs",
     "sunbottle.interfaces.timers",
@@ -85,13 +85,46 @@ WSGI_APPLICATION = "sunbottle.interfaces.public.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/4.1/ref/settings/#databases
 
+# WAL lets the web workers keep reading while a scrape or backfill is writing. The pragmas are applied to every
+# connection by the sunbottle.data.sqlite backend. WAL is a property of the database file, so turning the profile off
+# leaves an existing database in WAL mode.
+SQLITE_PERFORMANCE_PROFILE = env.bool("SQLITE_PERFORMANCE_PROFILE", default=True)
+SQLITE_PRAGMAS: dict[str, str] = (
+    {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "mmap_size": str(env.int("SQLITE_MMAP_SIZE_MB", default=256) * 1024 * 1024),
+        "cache_size": str(-env.int("SQLITE_CACHE_SIZE_MB", default=32) * 1024),
+        "temp_store": "MEMORY",
+    }
+    if SQLITE_PERFORMANCE_PROFILE
+    else {}
+)
+DB_NAME = env.str("DB_NAME", default="/opt/sunbottle/data/db.sqlite3")
+DB_CONN_MAX_AGE = env.int("DB_CONN_MAX_AGE", default=600)
+DB_TIMEOUT = env.float("DB_TIMEOUT", default=20.0)
+
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": env.str("DB_NAME", default="/opt/sunbottle/data/db.sqlite3"),
-    }
+        "ENGINE": "sunbottle.data.sqlite",
+        "NAME": DB_NAME,
+        "CONN_MAX_AGE": DB_CONN_MAX_AGE,
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": {"timeout": DB_TIMEOUT, "pragmas": SQLITE_PRAGMAS},
+    },
+    # Public views read through this, see sunbottle.data.routers.
+    "readonly": {
+        "ENGINE": "sunbottle.data.sqlite",
+        "NAME": DB_NAME,
+        "CONN_MAX_AGE": DB_CONN_MAX_AGE,
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": {"timeout": DB_TIMEOUT, "pragmas": {**SQLITE_PRAGMAS, "query_only": "ON"}},
+        "TEST": {"MIRROR": "default"},
+    },
 }
 
+DATABASE_ROUTERS = ["sunbottle.data.routers.ReadOnlyRouter"]
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.1/ref/settings/#auth-password-validators
@@ -141,15 +174,92 @@ STATICFILES_DIRS = [
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 
-GENERATION_RETRIEVER_CLASS = "sunbottle.domain.sharp.generation.SharpGenerationRetriever"
-STORAGE_RETRIEVER_CLASS = "sunbottle.domain.sharp.storage.SharpStorageRetriever"
-BUYSELL_RETRIEVER_CLASS = "sunbottle.domain.sharp.buysell.SharpBuySellRetriever"
-CONSUMPTION_RETRIEVER_CLASS = "sunbottle.domain.sharp.consumption.SharpConsumptionRetriever"
+# Set these to the sunbottle.domain.sharp.http.SharpHttp*Retriever classes to scrape without Firefox.
+GENERATION_RETRIEVER_CLASS = env.str(
+    "GENERATION_RETRIEVER_CLASS", default="sunbottle.domain.sharp.generation.SharpGenerationRetriever"
+)
+STORAGE_RETRIEVER_CLASS = env.str(
+    "STORAGE_RETRIEVER_CLASS", default="sunbottle.domain.sharp.storage.SharpStorageRetriever"
+)
+BUYSELL_RETRIEVER_CLASS = env.str(
+    "BUYSELL_RETRIEVER_CLASS", default="sunbottle.domain.sharp.buysell.SharpBuySellRetriever"
+)
+CONSUMPTION_RETRIEVER_CLASS = env.str(
+    "CONSUMPTION_RETRIEVER_CLASS", default="sunbottle.domain.sharp.consumption.SharpConsumptionRetriever"
+)
 
 WEBDRIVER_INSTALL_PATH = env.str("WEBDRIVER_INSTALL_PATH", default="/opt/sunbottle/")
 SHARP_LOGIN_MEMBERID = env.str("SHARP_LOGIN_MEMBERID", default="")
 SHARP_LOGIN_PASSWORD = env.str("SHARP_LOGIN_PASSWORD", default="")
 
+# Used by the sunbottle.domain.sharp.http retrievers, which talk to the JSON endpoints without a browser.
+SHARP_BASE_URL = env.str("SHARP_BASE_URL", default="https://hems.cloudlabs.sharp.co.jp/cloudhems/pvt/")
+SHARP_HTTP_TIMEOUT = env.float("SHARP_HTTP_TIMEOUT", default=30.0)
+SHARP_HTTP_POOL_SIZE = env.int("SHARP_HTTP_POOL_SIZE", default=4)
+
+# Logged-in browsers are kept warm between scrapes and recycled once they've loaded this many pages or
+# Firefox grows past the memory ceiling.
+SCRAPE_BROWSER_POOL_SIZE = env.int("SCRAPE_BROWSER_POOL_SIZE", default=1)
+SCRAPE_BROWSER_MAX_PAGE_LOADS = env.int("SCRAPE_BROWSER_MAX_PAGE_LOADS", default=50)
+SCRAPE_BROWSER_MAX_MEMORY_MB = env.int("SCRAPE_BROWSER_MAX_MEMORY_MB", default=600)
+
+# Seconds to wait for a Sharp page to reach the state we need before giving up, how often to check, and how long a
+# single wait may take before it's logged as slow.
+SHARP_WAIT_TIMEOUT = env.float("SHARP_WAIT_TIMEOUT", default=30.0)
+SHARP_WAIT_POLL_INTERVAL = env.float("SHARP_WAIT_POLL_INTERVAL", default=0.25)
+SHARP_SLOW_WAIT_SECONDS = env.float("SHARP_SLOW_WAIT_SECONDS", default=5.0)
+# JavaScript expression for the date a Sharp page rendered, e.g. "2023/06/01", which is checked against the date asked
+# for after changing it.
+SHARP_RENDERED_DATE_EXPRESSION = env.str("SHARP_RENDERED_DATE_EXPRESSION", default="onRenderResult.displayDate")
+
+# How often the uWSGI timer scrapes. Only intervals after each series' watermark are written, so this can be short.
+SCRAPE_INTERVAL_MINUTES = env.int("SCRAPE_INTERVAL_MINUTES", default=30)
+
+# Sharp publishes readings with a delay. Intervals older than this are treated as final and not written again.
+SHARP_PUBLISHING_DELAY_MINUTES = env.int("SHARP_PUBLISHING_DELAY_MINUTES", default=30)
+
+# Raw payloads from Sharp are archived here so readings can be rebuilt with replay_sharp_archive.
+SHARP_ARCHIVE_ENABLED = env.bool("SHARP_ARCHIVE_ENABLED", default=True)
+SHARP_ARCHIVE_PATH = env.str("SHARP_ARCHIVE_PATH", default="/opt/sunbottle/data/archive")
+
+# Backfills never make more than this many requests a minute to Sharp, however many workers they use.
+SHARP_MAX_REQUESTS_PER_MINUTE = env.int("SHARP_MAX_REQUESTS_PER_MINUTE", default=30)
+
+# compact_readings deletes the rows of readings older than row_days, leaving them packed in their DailySeries rows,
+# moves days older than raw_days to columnar files under RETENTION_ARCHIVE_PATH, and deletes hourly rollups older than
+# hourly_days, leaving daily and monthly rollups. None keeps a tier forever.
+RETENTION_ARCHIVE_PATH = env.str("RETENTION_ARCHIVE_PATH", default="/opt/sunbottle/data/readings")
+RETENTION_ROW_DAYS = env.int("RETENTION_ROW_DAYS", default=31)
+RETENTION_RAW_DAYS = env.int("RETENTION_RAW_DAYS", default=730)
+RETENTION_HOURLY_DAYS = env.int("RETENTION_HOURLY_DAYS", default=1825)
+RETENTION_POLICIES: dict[str, dict[str, int | None]] = {
+    "generation": {
+        "row_days": RETENTION_ROW_DAYS,
+        "raw_days": RETENTION_RAW_DAYS,
+        "hourly_days": RETENTION_HOURLY_DAYS,
+    },
+    "storage": {
+        "row_days": RETENTION_ROW_DAYS,
+        "raw_days": RETENTION_RAW_DAYS,
+        "hourly_days": None,
+    },
+    "purchase": {
+        "row_days": RETENTION_ROW_DAYS,
+        "raw_days": RETENTION_RAW_DAYS,
+        "hourly_days": RETENTION_HOURLY_DAYS,
+    },
+    "sale": {
+        "row_days": RETENTION_ROW_DAYS,
+        "raw_days": RETENTION_RAW_DAYS,
+        "hourly_days": RETENTION_HOURLY_DAYS,
+    },
+    "consumption": {
+        "row_days": RETENTION_ROW_DAYS,
+        "raw_days": RETENTION_RAW_DAYS,
+        "hourly_days": RETENTION_HOURLY_DAYS,
+    },
+}
+
 # Feed in Tariff
 FIT = env.int("FIT", default=17)  # JPY per kWh
 
@@ -161,39 +271,9 @@ FIRST_BILLING_PERIOD_START = datetime.date(
     BILLING_PERIOD_START_YEAR, BILLING_PERIOD_START_MONTH, BILLING_PERIOD_START_DAY
 )
 
-# TODO: Move these to the database when someone tries to use Sunbottle with a non-Octopus provider.
-FUEL_ADJUSTMENT_CHARGES: dict[datetime.date, decimal.Decimal] = {
-    datetime.date(year=2022, month=10, day=15): decimal.Decimal("9.72"),
-    datetime.date(year=2022, month=11, day=15): decimal.Decimal("11.92"),
-    datetime.date(year=2022, month=12, day=15): decimal.Decimal("12.99"),
-    datetime.date(year=2023, month=1, day=15): decimal.Decimal("13.04"),
-    datetime.date(year=2023, month=2, day=15): decimal.Decimal("11.69"),
-    datetime.date(year=2023, month=3, day=15): decimal.Decimal("10.25"),
-    datetime.date(year=2023, month=4, day=15): decimal.Decimal("9.21"),
-    datetime.date(year=2023, month=5, day=15): decimal.Decimal("7.21"),
-    datetime.date(year=2023, month=6, day=15): decimal.Decimal("6.54"),
-}
+# Closed billing periods are snapshotted by snapshot_billing_periods once this many days have passed since they ended.
+BILLING_SNAPSHOT_SETTLE_DAYS = env.int("BILLING_SNAPSHOT_SETTLE_DAYS", default=7)
 
-RENEWABLE_ENERGY_CHARGES: dict[datetime.date, decimal.Decimal] = {
-    datetime.date(year=2022, month=10, day=15): decimal.Decimal("3.45"),
-    datetime.date(year=2022, month=11, day=15): decimal.Decimal("3.45"),
-    datetime.date(year=2022, month=12, day=15): decimal.Decimal("3.45"),
-    datetime.date(year=2023, month=1, day=15): decimal.Decimal("3.45"),
-    datetime.date(year=2023, month=2, day=15): decimal.Decimal("3.45"),
-    datetime.date(year=2023, month=3, day=15): decimal.Decimal("3.45"),
-    datetime.date(year=2023, month=4, day=15): decimal.Decimal("3.45"),
-    datetime.date(year=2023, month=5, day=15): decimal.Decimal("1.40"),
-    datetime.date(year=2023, month=6, day=15): decimal.Decimal("1.40"),
-    datetime.date(year=2023, month=7, day=15): decimal.Decimal("1.40"),
-}
-
-
-GREEN_OCTOPUS: dict[tuple[int, int | None], decimal.Decimal] = {
-    (0, 120): decimal.Decimal("19.68"),
-    (121, 300): decimal.Decimal("24.05"),
-    (301, None): decimal.Decimal("26.45"),
-}
-
-AGREEMENTS: dict[datetime.date, dict[tuple[int, int | None], decimal.Decimal]] = {
-    datetime.date(year=2022, month=10, day=15): GREEN_OCTOPUS,
-}
+# Tariffs and charges are edited in the admin. Each process caches them for this long, other than the one that changed
+# them, which picks up the change straight away.
+RATES_CACHE_SECONDS = env.int("RATES_CACHE_SECONDS", default=60)